@@ -96,6 +96,33 @@ class CCDCesquePixel263(PixelTimeseries):
             model = CCDCesque(**kwargs)
             model.fit(setup['X'], setup['Y'], setup['dates'])
 
+    def time_ccdcesque_warm_start(self, setup):
+        """ Bench with remove_noise and warm started Lasso fits
+        """
+        kwargs = version_kwargs(setup['kwargs'])
+        kwargs.update({'remove_noise': True})
+        model = CCDCesque(warm_start=True, **kwargs)
+        for i in range(n):
+            model.fit(setup['X'], setup['Y'], setup['dates'])
+
+    def time_ccdcesque_lazy_fit(self, setup):
+        """ Bench with remove_noise and lazy fits of untested bands
+        """
+        kwargs = version_kwargs(setup['kwargs'])
+        kwargs.update({'remove_noise': True})
+        for i in range(n):
+            model = CCDCesque(lazy_fit=True, **kwargs)
+            model.fit(setup['X'], setup['Y'], setup['dates'])
+
+    def time_ccdcesque_stable_fast_path(self, setup):
+        """ Bench with remove_noise and skipping of stable periods
+        """
+        kwargs = version_kwargs(setup['kwargs'])
+        kwargs.update({'remove_noise': True})
+        for i in range(n):
+            model = CCDCesque(stable_fast_path=True, **kwargs)
+            model.fit(setup['X'], setup['Y'], setup['dates'])
+
 
 class CCDCesqueLine(object):
     """ Benchmark CCDC-esque algorithm on a line with TODO observations
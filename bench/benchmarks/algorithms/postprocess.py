@@ -0,0 +1,47 @@
+""" Benchmarks for ``yatsm.algorithms.postprocess``
+"""
+import copy
+
+import numpy as np
+import sklearn.linear_model
+
+from yatsm.algorithms import CCDCesque, postprocess
+from yatsm.regression.robust_fit import RLM
+
+from ..bench_utils.example_timeseries import PixelTimeseries
+
+n = 50
+
+
+class PostprocessPixel263(PixelTimeseries):
+    """ Benchmark postprocessing of a CCDC-esque model fit to one pixel
+    """
+    def setup_cache(self):
+        super(PostprocessPixel263, self).setup_cache()
+        model = CCDCesque(
+            test_indices=np.array([2, 3, 4, 5]),
+            estimator={'object': sklearn.linear_model.Lasso(alpha=20),
+                       'fit': {}},
+            consecutive=5, threshold=3, min_obs=16, min_rmse=100,
+            remove_noise=True)
+        model.fit(self.X, self.Y, self.dates)
+        return {'model': model}
+
+    def setup(self, setup):
+        self.model = copy.deepcopy(setup['model'])
+
+    def time_commission_test(self, setup):
+        for i in range(n):
+            postprocess.commission_test(self.model, alpha=0.10)
+
+    def time_refit_record_OLS(self, setup):
+        estimator = sklearn.linear_model.LinearRegression()
+        for i in range(n):
+            postprocess.refit_record(self.model, 'ols', estimator,
+                                     keep_regularized=True)
+
+    def time_refit_record_RLM(self, setup):
+        estimator = RLM(maxiter=10)
+        for i in range(n):
+            postprocess.refit_record(self.model, 'robust', estimator,
+                                     keep_regularized=True)
@@ -0,0 +1,88 @@
+""" Benchmark time and memory used while preprocessing pixels of a line
+"""
+import os
+
+import numpy as np
+
+from yatsm.algorithms import CCDCesque
+from yatsm.algorithms.workspace import Workspace
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+
+class _PreprocessLine(object):
+    """ Preprocess pixels of an example line with and without a workspace
+    """
+    example_data = os.path.join(
+        os.path.dirname(__file__),
+        '../../../tests/data/p013r030_r50_n423_b8.npz')
+
+    params = [False, True]
+    param_names = ['workspace']
+
+    def setup_cache(self):
+        dat = np.load(self.example_data)
+        config = {
+            'dataset': {
+                'min_values': np.zeros(8, dtype=np.int16),
+                'max_values': np.repeat(10000, 8).astype(np.int16),
+                'mask_band': 8,
+                'mask_values': [2, 3, 4, 255]
+            }
+        }
+        return {'X': dat['X'], 'Y': dat['Y'], 'dates': dat['dates'],
+                'config': config}
+
+    def setup(self, setup, workspace):
+        self.model = CCDCesque()
+        self.workspace = (Workspace(setup['X'], setup['dates'],
+                                    setup['Y'].shape[0])
+                          if workspace else None)
+
+    def _preprocess(self, setup, col):
+        return self.model.preprocess(setup['X'], setup['Y'][..., col],
+                                     setup['dates'], workspace=self.workspace,
+                                     **setup['config'])
+
+
+class PreprocessLine(_PreprocessLine):
+    """ Benchmark time and peak memory to preprocess pixels with and without
+    a workspace
+    """
+    def time_preprocess(self, setup, workspace):
+        for col in range(setup['Y'].shape[-1]):
+            self._preprocess(setup, col)
+
+    def peakmem_preprocess(self, setup, workspace):
+        for col in range(setup['Y'].shape[-1]):
+            self._preprocess(setup, col)
+
+
+class PreprocessLineMemory(_PreprocessLine):
+    """ Benchmark peak memory traced while preprocessing each pixel
+
+    Unlike ``PreprocessLine.peakmem_preprocess``, which measures the peak
+    memory of the whole process, this isolates memory allocated for each
+    pixel. Requires Python >= 3.4 and NumPy >= 1.13, which reports its
+    allocations to ``tracemalloc``.
+    """
+    def setup(self, setup, workspace):
+        if tracemalloc is None:
+            raise NotImplementedError('Requires tracemalloc (Python >= 3.4)')
+        super(PreprocessLineMemory, self).setup(setup, workspace)
+
+    def track_peak_bytes_per_pixel(self, setup, workspace):
+        """ Mean peak memory (bytes) allocated while preprocessing a pixel
+        """
+        peaks = []
+        tracemalloc.start()
+        for col in range(setup['Y'].shape[-1]):
+            tracemalloc.clear_traces()
+            self._preprocess(setup, col)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        return np.mean(peaks)
+    track_peak_bytes_per_pixel.unit = 'bytes'
@@ -0,0 +1,85 @@
+""" Synthetic YATSM results for benchmarking mapping functions
+"""
+import os
+
+import numpy as np
+import patsy
+
+from yatsm.regression.transforms import harm  # noqa
+
+
+class ExampleImage(object):
+    """ Stand-in for the attributes of a ``gdal.Dataset`` used in mapping
+    """
+    def __init__(self, nrow, ncol):
+        self.RasterYSize = nrow
+        self.RasterXSize = ncol
+
+
+def make_results(directory, nrow, ncol,
+                 design_matrix='1 + x + harm(x, 1) + harm(x, 2) + harm(x, 3)',
+                 n_band=7, max_segments=3, start=723180, end=735234, seed=0):
+    """ Save synthetic YATSM results, one file per row, into ``directory``
+
+    Args:
+        directory (str): directory to save results to
+        nrow (int): number of rows (result files)
+        ncol (int): number of columns in each row
+        design_matrix (str): Patsy design specification of coefficients in
+            each record, saved in result metadata
+        n_band (int): number of bands in each record
+        max_segments (int): maximum number of segments per pixel
+        start (int): ordinal date of first observation
+        end (int): ordinal date of last observation
+        seed (int): random number generator seed
+
+    Returns:
+        list: filenames of results saved
+    """
+    rng = np.random.RandomState(seed)
+    design = patsy.dmatrix(design_matrix, {'x': [start]}).design_info
+    n_coef = len(design.column_names)
+    metadata = {
+        'YATSM': {
+            'design': design.column_name_indexes,
+            'design_matrix': design_matrix
+        }
+    }
+    dtype = [
+        ('start', 'i4'),
+        ('end', 'i4'),
+        ('break', 'i4'),
+        ('coef', 'float32', (n_coef, n_band)),
+        ('rmse', 'float32', n_band),
+        ('magnitude', 'float32', n_band),
+        ('px', 'u2'),
+        ('py', 'u2')
+    ]
+
+    filenames = []
+    for row in range(nrow):
+        n_segment = rng.randint(1, max_segments + 1, size=ncol)
+        rec = np.zeros(n_segment.sum(), dtype=dtype)
+        rec['px'] = np.repeat(np.arange(ncol), n_segment)
+        rec['py'] = row
+
+        i = 0
+        for n in n_segment:
+            bounds = np.sort(rng.randint(start, end, size=n - 1))
+            seg_start = np.concatenate(([start], bounds + 1))
+            seg_end = np.concatenate((bounds, [end]))
+            rec['start'][i:i + n] = seg_start
+            rec['end'][i:i + n] = seg_end
+            rec['break'][i:i + n - 1] = bounds + 1
+            i += n
+        changed = rec['break'] != 0
+        rec['magnitude'][changed] = rng.normal(
+            scale=500, size=(changed.sum(), n_band))
+        rec['coef'] = rng.normal(size=rec['coef'].shape)
+        rec['rmse'] = rng.uniform(50, 200, size=rec['rmse'].shape)
+
+        filename = os.path.join(directory, 'yatsm_r%i.npz' % row)
+        np.savez(filename, record=rec, metadata=metadata)
+        filenames.append(filename)
+
+    return filenames
@@ -0,0 +1,149 @@
+""" Example and synthetic stacked timeseries images for benchmarking lines
+"""
+from datetime import datetime as dt
+import fnmatch
+import os
+import tarfile
+
+import numpy as np
+from osgeo import gdal, gdal_array
+import yaml
+
+gdal.AllRegister()
+gdal.UseExceptions()
+
+tests_data = os.path.join(os.path.dirname(__file__),
+                          '..', '..', '..', 'tests', 'data')
+example_config = os.path.join(tests_data, 'p035r032_config.yaml')
+example_stack = os.path.join(tests_data, 'p035r032_testdata.tar.gz')
+
+
+def write_config(directory, dates, filenames, use_bip_reader=False,
+                 cache_line_dir=None):
+    """ Write an input file and configuration file for a stack of images
+
+    Configuration is copied from the example configuration in ``tests/data``
+    with the input file and output location within ``directory``.
+
+    Args:
+        directory (str): directory to write input file and configuration to
+        dates (list): ordinal dates of images
+        filenames (list): filenames of images
+        use_bip_reader (bool): configure dataset to use BIP reader
+        cache_line_dir (str): directory for line cache files, or None to
+            always read from images
+
+    Returns:
+        str: filename of configuration file
+    """
+    input_file = os.path.join(directory, 'images.csv')
+    with open(input_file, 'w') as fid:
+        fid.write('date,sensor,filename\n')
+        for d, f in sorted(zip(dates, filenames)):
+            fid.write('{date},{sensor},{filename}\n'.format(
+                date=dt.fromordinal(int(d)).strftime('%Y%j'),
+                sensor=os.path.basename(f)[:3],
+                filename=f))
+
+    with open(example_config) as fid:
+        config = yaml.safe_load(fid)
+    config['dataset'].update({
+        'input_file': input_file,
+        'output': os.path.join(directory, 'YATSM'),
+        'cache_line_dir': cache_line_dir,
+        'use_bip_reader': use_bip_reader
+    })
+
+    filename = os.path.join(directory, 'config.yaml')
+    with open(filename, 'w') as fid:
+        yaml.safe_dump(config, fid)
+    return filename
+
+
+def extract_example_stack(directory):
+    """ Extract the example stack of images from ``tests/data``
+
+    Args:
+        directory (str): directory to extract images to
+
+    Returns:
+        str: filename of configuration file for the example stack
+    """
+    with tarfile.open(example_stack) as tgz:
+        tgz.extractall(directory)
+
+    filenames = []
+    for root, dnames, fnames in os.walk(directory):
+        for fname in fnmatch.filter(fnames, 'L*stack.gtif'):
+            filenames.append(os.path.join(root, fname))
+    dates = [dt.strptime(os.path.basename(f)[9:16], '%Y%j').toordinal()
+             for f in filenames]
+
+    return write_config(directory, dates, filenames)
+
+
+def make_stack(directory, nrow, ncol, n_images, n_band=8,
+               start=723180, end=735234, driver='GTiff', seed=0):
+    """ Write a synthetic stack of Landsat-like images into ``directory``
+
+    Each band follows an annual cycle plus noise, and a third of the pixels
+    change abruptly at a random date. The last band is a Fmask-like mask band
+    with roughly 20% of observations flagged as cloud (4).
+
+    Args:
+        directory (str): directory to write images to, with each image in a
+            subdirectory named by the image ID
+        nrow (int): number of rows
+        ncol (int): number of columns
+        n_images (int): number of images
+        n_band (int): number of bands, including mask band
+        start (int): ordinal date of first image
+        end (int): ordinal date of last image
+        driver (str): GDAL driver name. ``ENVI`` images are written as Band
+            Interleaved by Pixel (BIP) for the BIP reader
+        seed (int): random number generator seed
+
+    Returns:
+        tuple (list, list): ordinal dates and filenames of images
+    """
+    rng = np.random.RandomState(seed)
+    dates = np.sort(rng.choice(np.arange(start, end), n_images,
+                               replace=False))
+    doy = 2 * np.pi * (dates % 365.25) / 365.25
+
+    base = rng.uniform(500, 3000, size=(n_band - 1, 1, ncol))
+    amplitude = rng.uniform(100, 1000, size=(n_band - 1, 1, ncol))
+    change = np.where(rng.uniform(size=ncol) < 1 / 3.,
+                      rng.randint(start, end, size=ncol), end + 1)
+    magnitude = rng.uniform(-1000, 1000, size=(n_band - 1, 1, ncol))
+
+    options = ['INTERLEAVE=BIP'] if driver == 'ENVI' else []
+    ext = '' if driver == 'ENVI' else '.gtif'
+    _driver = gdal.GetDriverByName(driver)
+
+    filenames = []
+    for d, _doy in zip(dates, doy):
+        image_ID = 'LT5035032{0}XXX01'.format(
+            dt.fromordinal(int(d)).strftime('%Y%j'))
+        image_dir = os.path.join(directory, image_ID)
+        if not os.path.isdir(image_dir):
+            os.makedirs(image_dir)
+        filename = os.path.join(image_dir, image_ID + '_stack' + ext)
+
+        data = np.empty((n_band, nrow, ncol), dtype=np.int16)
+        data[:-1] = np.clip(
+            base + amplitude * np.cos(_doy) + magnitude * (d >= change) +
+            rng.normal(scale=100, size=(n_band - 1, nrow, ncol)),
+            0, 10000)
+        data[-1] = np.where(rng.uniform(size=(nrow, ncol)) < 0.2, 4, 0)
+
+        ds = _driver.Create(filename, ncol, nrow, n_band,
+                            gdal_array.NumericTypeCodeToGDALTypeCode(
+                                np.int16),
+                            options)
+        for b in range(n_band):
+            ds.GetRasterBand(b + 1).WriteArray(data[b])
+        ds = None
+        filenames.append(filename)
+
+    return list(dates), filenames
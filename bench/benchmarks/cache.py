@@ -0,0 +1,49 @@
+""" Benchmarks for ``yatsm.cache``
+"""
+import os
+
+from yatsm.cache import update_cache_file, write_cache_file
+from yatsm.io import gdal_reader
+from yatsm.utils import get_image_IDs
+
+from .bench_utils.example_stack import make_stack
+
+
+class UpdateCache(object):
+    """ Benchmark updating a line cache file to remove and add images
+    """
+    nrow, ncol, n_images = 2, 1000, 500
+    n_remove, n_add = 10, 25
+
+    timeout = 600
+
+    def setup_cache(self):
+        location = os.path.abspath('images')
+        dates, images = make_stack(location, self.nrow, self.ncol,
+                                   self.n_images)
+        image_IDs = get_image_IDs(images)
+
+        # Cache data for all but the newest images, including some images
+        # that will be removed
+        old = slice(0, self.n_images - self.n_add)
+        new = slice(self.n_remove, self.n_images)
+        old_cache = os.path.abspath('old_cache.npz')
+        Y = gdal_reader.read_row(images, 0)
+        write_cache_file(old_cache, Y[:, old, :], image_IDs[old])
+
+        return {
+            'images': images[new],
+            'image_IDs': image_IDs[new],
+            'old_cache': old_cache,
+            'new_cache': os.path.abspath('new_cache.npz')
+        }
+
+    def time_update_cache_file(self, setup):
+        update_cache_file(setup['images'], setup['image_IDs'],
+                          setup['old_cache'], setup['new_cache'],
+                          0, gdal_reader)
+
+    def peakmem_update_cache_file(self, setup):
+        update_cache_file(setup['images'], setup['image_IDs'],
+                          setup['old_cache'], setup['new_cache'],
+                          0, gdal_reader)
@@ -0,0 +1,50 @@
+""" Benchmarks for ``yatsm.cli.classify``
+"""
+import os
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from yatsm.cli import classify
+
+from ..bench_utils.example_results import make_results
+
+
+class ClassifyLines(object):
+    """ Benchmark classification of lines of results
+    """
+    nrow, ncol = 10, 2000
+
+    timeout = 360
+
+    def setup_cache(self):
+        location = os.path.abspath('results')
+        if not os.path.isdir(location):
+            os.makedirs(location)
+        filenames = make_results(location, self.nrow, self.ncol)
+
+        # Train on random labels of synthetic records
+        rec = np.load(filenames[0])['record']
+        X = np.hstack((rec['coef'].reshape(rec.shape[0], -1), rec['rmse']))
+        y = np.random.RandomState(0).randint(1, 6, size=rec.shape[0])
+        classifier = RandomForestClassifier(n_estimators=50, random_state=0)
+        classifier.fit(X, y)
+
+        return {'filenames': filenames, 'classifier': classifier}
+
+    def time_classify_line(self, setup):
+        """ Classify one line at a time
+        """
+        for filename in setup['filenames']:
+            classify.classify_line(filename, setup['classifier'])
+
+    def time_classify_lines(self, setup):
+        """ Classify all lines together
+        """
+        if not hasattr(classify, 'classify_lines'):
+            raise NotImplementedError('Batch classification not available')
+        classify.classify_lines(setup['filenames'], setup['classifier'])
+
+    def peakmem_classify_line(self, setup):
+        for filename in setup['filenames']:
+            classify.classify_line(filename, setup['classifier'])
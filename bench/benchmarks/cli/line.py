@@ -0,0 +1,64 @@
+""" Benchmarks for ``yatsm line``
+
+Lines are run end to end, including reading data, fitting the time series
+model for each pixel, and saving results.
+"""
+import os
+
+from yatsm.cli.main import cli
+from yatsm.config_parser import parse_config_file
+from yatsm.io import get_image_attribute
+from yatsm.utils import csvfile_to_dataframe
+
+from ..bench_utils.example_stack import (extract_example_stack, make_stack,
+                                         write_config)
+
+
+def _run_line(setup):
+    """ Run first line of dataset in ``setup``
+    """
+    cli.main(args=['line', setup['config'], '1', str(setup['nrow'])],
+             standalone_mode=False)
+
+
+def _setup(config):
+    cfg = parse_config_file(config)
+    df = csvfile_to_dataframe(cfg['dataset']['input_file'],
+                              cfg['dataset']['date_format'])
+    return {'config': config,
+            'nrow': get_image_attribute(df['filename'][0])[0]}
+
+
+class LineExample(object):
+    """ Benchmark ``yatsm line`` on a line of the example dataset
+    """
+    timeout = 600
+
+    def setup_cache(self):
+        return _setup(extract_example_stack(os.path.abspath('p035r032')))
+
+    def time_line(self, setup):
+        _run_line(setup)
+
+    def peakmem_line(self, setup):
+        _run_line(setup)
+
+
+class LineSynthetic(object):
+    """ Benchmark ``yatsm line`` on a line of a synthetic dataset
+    """
+    nrow, ncol, n_images = 2, 250, 400
+
+    timeout = 1200
+
+    def setup_cache(self):
+        location = os.path.abspath('synthetic')
+        dates, images = make_stack(os.path.join(location, 'images'),
+                                   self.nrow, self.ncol, self.n_images)
+        return _setup(write_config(location, dates, images))
+
+    def time_line(self, setup):
+        _run_line(setup)
+
+    def peakmem_line(self, setup):
+        _run_line(setup)
@@ -0,0 +1,41 @@
+""" Benchmarks for ``yatsm.cli.main``
+
+Array jobs start many short lived ``yatsm`` processes, so the time it takes to
+start the command line interface is measured in a new interpreter.
+"""
+import subprocess
+import sys
+
+_COUNT_MODULES = ('import sys; {0}; '
+                  'print(len([m for m in sys.modules.values() if m]))')
+
+
+def _run(code):
+    return subprocess.check_output([sys.executable, '-c', code])
+
+
+class CLIStartup(object):
+    """ Benchmark import of the YATSM command line interface
+    """
+    timeout = 120
+
+    def time_import_cli(self):
+        """ Time import of the main ``yatsm`` command group
+        """
+        _run('import yatsm.cli.main')
+
+    def time_cli_help(self):
+        """ Time ``yatsm --help``, which imports all commands
+        """
+        _run('from yatsm.cli.main import cli; cli(["--help"])')
+
+    def time_cli_cache_help(self):
+        """ Time ``yatsm cache --help``, which imports one command
+        """
+        _run('from yatsm.cli.main import cli; cli(["cache", "--help"])')
+
+    def track_modules_import_cli(self):
+        """ Track number of modules imported with ``yatsm.cli.main``
+        """
+        return int(_run(_COUNT_MODULES.format('import yatsm.cli.main')))
+    track_modules_import_cli.unit = 'modules'
@@ -0,0 +1,70 @@
+""" Benchmarks for reading lines of data in ``yatsm.io.readers``
+"""
+import os
+
+import numpy as np
+
+from yatsm.io import read_line
+from yatsm.utils import get_image_IDs
+
+from ..bench_utils.example_stack import make_stack
+
+
+class ReadLine(object):
+    """ Benchmark reading one line of a stack with GDAL, VRT, BIP, or cache
+    readers
+    """
+    nrow, ncol, n_images, n_band = 2, 1000, 500, 8
+
+    params = ['GDAL', 'VRT', 'BIP', 'cache']
+    param_names = ['reader']
+    timeout = 600
+
+    def setup_cache(self):
+        setup = {}
+        for reader, driver in (('GDAL', 'GTiff'), ('BIP', 'ENVI')):
+            location = os.path.abspath(reader)
+            dates, images = make_stack(location, self.nrow, self.ncol,
+                                       self.n_images, n_band=self.n_band,
+                                       driver=driver)
+            setup[reader] = {
+                'images': images,
+                'dataset': {'use_bip_reader': reader == 'BIP',
+                            'cache_line_dir': os.path.abspath('cache')}
+            }
+        setup['VRT'] = {
+            'images': setup['GDAL']['images'],
+            'dataset': {'use_bip_reader': False, 'use_vrt_reader': True,
+                        'cache_line_dir': os.path.abspath('vrt')}
+        }
+        os.makedirs(setup['VRT']['dataset']['cache_line_dir'])
+        setup['cache'] = setup['GDAL'].copy()
+
+        os.makedirs(setup['cache']['dataset']['cache_line_dir'])
+        self._read_line(setup['cache'], write_cache=True)
+
+        return setup
+
+    def _read_line(self, setup, read_cache=False, write_cache=False):
+        return read_line(0, setup['images'],
+                         get_image_IDs(setup['images']),
+                         setup['dataset'], self.ncol, self.n_band, np.int16,
+                         read_cache=read_cache, write_cache=write_cache)
+
+    def time_read_line(self, setup, reader):
+        self._read_line(setup[reader], read_cache=reader == 'cache')
+
+    def peakmem_read_line(self, setup, reader):
+        self._read_line(setup[reader], read_cache=reader == 'cache')
+
+
+class ReadLineSubset(ReadLine):
+    """ Benchmark reading half of the bands and images of one line
+    """
+    def _read_line(self, setup, read_cache=False, write_cache=False):
+        return read_line(0, setup['images'],
+                         get_image_IDs(setup['images']),
+                         setup['dataset'], self.ncol, self.n_band, np.int16,
+                         read_cache=read_cache, write_cache=write_cache,
+                         bands=np.arange(0, self.n_band, 2),
+                         image_index=np.arange(0, self.n_images, 2))
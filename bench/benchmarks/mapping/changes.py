@@ -0,0 +1,83 @@
+""" Benchmarks for ``yatsm.mapping.changes``
+"""
+import os
+
+import numpy as np
+
+from yatsm.mapping import changes
+
+from ..bench_utils.example_results import ExampleImage, make_results
+
+try:
+    from yatsm.utils import ordinal2datefmt
+except ImportError:
+    ordinal2datefmt = None
+
+
+class ChangeMaps(object):
+    """ Benchmark creation of change date and number of change maps
+    """
+    nrow, ncol = 100, 500
+    start, end = 723180, 735234
+
+    timeout = 360
+
+    def setup_cache(self):
+        location = os.path.abspath('results')
+        if not os.path.isdir(location):
+            os.makedirs(location)
+        make_results(location, self.nrow, self.ncol,
+                     start=self.start, end=self.end)
+        return {'location': location}
+
+    def setup(self, setup):
+        self.image_ds = ExampleImage(self.nrow, self.ncol)
+
+    def time_get_change_date_ordinal(self, setup):
+        """ Map change dates without date format conversion
+        """
+        changes.get_change_date(self.start, self.end, setup['location'],
+                                self.image_ds, out_format='ordinal')
+
+    def time_get_change_date_yeardoy(self, setup):
+        """ Map change dates formatted as YYYYDOY
+        """
+        changes.get_change_date(self.start, self.end, setup['location'],
+                                self.image_ds, out_format='%Y%j')
+
+    def time_get_change_date_ymd_first(self, setup):
+        """ Map first change dates formatted as YYYYMMDD
+        """
+        changes.get_change_date(self.start, self.end, setup['location'],
+                                self.image_ds, first=True,
+                                out_format='%Y%m%d')
+
+    def time_get_change_num(self, setup):
+        """ Map number of changes
+        """
+        changes.get_change_num(self.start, self.end, setup['location'],
+                               self.image_ds)
+
+    def peakmem_get_change_date(self, setup):
+        changes.get_change_date(self.start, self.end, setup['location'],
+                                self.image_ds, out_format='ordinal')
+
+
+class OrdinalDateFormat(object):
+    """ Benchmark conversion of ordinal dates to integer date formats
+    """
+    start, end = 723180, 735234
+
+    def setup(self):
+        if ordinal2datefmt is None:
+            raise NotImplementedError('Vectorized date conversion not '
+                                      'available')
+        rng = np.random.RandomState(0)
+        self.ordinal = rng.randint(self.start, self.end, size=100000)
+
+    def time_ordinal2datefmt_yeardoy(self):
+        ordinal2datefmt(self.ordinal, '%Y%j', first=self.start, last=self.end)
+
+    def time_ordinal2datefmt_ymd(self):
+        ordinal2datefmt(self.ordinal, '%Y%m%d', first=self.start,
+                        last=self.end)
@@ -0,0 +1,43 @@
+""" Benchmarks for ``yatsm.mapping.prediction``
+"""
+import os
+
+from yatsm.mapping import prediction
+
+from ..bench_utils.example_results import ExampleImage, make_results
+
+
+class CoefficientMaps(object):
+    """ Benchmark creation of coefficient maps
+    """
+    nrow, ncol = 100, 500
+    date = 730000
+
+    timeout = 360
+
+    def setup_cache(self):
+        location = os.path.abspath('results')
+        if not os.path.isdir(location):
+            os.makedirs(location)
+        make_results(location, self.nrow, self.ncol)
+        return {'location': location}
+
+    def setup(self, setup):
+        self.image_ds = ExampleImage(self.nrow, self.ncol)
+
+    def time_get_coefficients(self, setup):
+        """ Map all coefficients and RMSE for all bands
+        """
+        prediction.get_coefficients(self.date, setup['location'],
+                                    self.image_ds, 'all', ['all'])
+
+    def time_get_coefficients_amplitude(self, setup):
+        """ Map seasonal amplitude and RMSE for all bands
+        """
+        prediction.get_coefficients(self.date, setup['location'],
+                                    self.image_ds, 'all', ['all'],
+                                    amplitude=True)
+
+    def peakmem_get_coefficients(self, setup):
+        prediction.get_coefficients(self.date, setup['location'],
+                                    self.image_ds, 'all', ['all'])
@@ -0,0 +1,29 @@
+""" Benchmarks for ``yatsm.regression.smoothing_spline``
+"""
+import numpy as np
+
+from yatsm.regression.smoothing_spline import SmoothingSpline, _BASIS_CACHE
+
+
+class BenchSmoothingSpline(object):
+    """ Benchmark smoothing spline fits to EVI-like data by day of year
+    """
+    n_series = 50
+
+    def setup(self):
+        rng = np.random.RandomState(0)
+        self.doy = np.arange(1, 366)
+        self.Y = (np.sin(self.doy / 365. * np.pi) ** 2 +
+                  rng.normal(scale=0.1, size=(self.n_series, self.doy.size)))
+        _BASIS_CACHE.clear()
+
+    def time_fit_each(self):
+        """ Time fitting and predicting each series separately
+        """
+        for y in self.Y:
+            SmoothingSpline().fit(self.doy, y).predict(np.arange(1, 367))
+
+    def time_fit_batch(self):
+        """ Time fitting and predicting all series together
+        """
+        SmoothingSpline().fit(self.doy, self.Y).predict(np.arange(1, 367))
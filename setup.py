@@ -6,7 +6,7 @@ import sys
 from distutils.command.clean import clean as _clean
 from setuptools.command.install import install as _install
 from setuptools.command.develop import develop as _develop
-from setuptools import find_packages, setup
+from setuptools import Command, find_packages, setup
 from setuptools.extension import Extension
 
 logging.basicConfig(level=logging.INFO)
@@ -57,10 +57,27 @@ class my_develop(_develop):
         _develop.run(self)
 
 
+# Optionally compile Numba accelerated functions ahead of time
+class build_aot(Command):
+    description = 'Compile Numba accelerated functions ahead of time'
+    user_options = []
+
+    def initialize_options(self):
+        pass
+
+    def finalize_options(self):
+        pass
+
+    def run(self):
+        from yatsm.accel import build_aot as _build_aot
+        self.execute(_build_aot, [], msg='Compiling yatsm._accel_aot')
+
+
 cmdclass = {
     'clean': my_clean,  # python setup.py clean
     'install': my_install,  # call when pip install
-    'develop': my_develop  # called when pip install -e
+    'develop': my_develop,  # called when pip install -e
+    'build_aot': build_aot  # python setup.py build_aot
 }
 
 # Get version
@@ -141,6 +158,7 @@ entry_points = '''
     classify=yatsm.cli.classify:classify
     map=yatsm.cli.map:map
     changemap=yatsm.cli.changemap:changemap
+    monitor=yatsm.cli.monitor:monitor
 '''
 
 desc = ('Algorithms for remote sensing land cover and condition monitoring '
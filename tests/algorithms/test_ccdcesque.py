@@ -69,3 +69,70 @@ def test_CCDCesque_coef(record):
 def test_CCDCesque_rmse(record):
     swir1_rmse = 77.21417999
     np.testing.assert_allclose(record[0]['rmse'][4], swir1_rmse)
+
+
+def test_CCDCesque_doy_neighbors(model):
+    rng = np.random.RandomState(0)
+    model.dates = np.sort(rng.choice(np.arange(723180, 723180 + 3000), 300,
+                                     replace=False))
+    model.reset()
+    # Advancing `here` updates neighbors, while restarting rebuilds them
+    for start, here in ((0, 100), (0, 101), (0, 130), (50, 60), (50, 55),
+                        (50, 90), (120, 290)):
+        model.start, model.here = start, here
+        date = model.dates[here + model.consecutive]
+        truth = np.argsort(np.mod(model.dates[start:here] - date,
+                                  model.ndays))[:model.min_obs] + start
+        neighbors = model._get_doy_neighbors(date)
+        np.testing.assert_equal(np.sort(neighbors), np.sort(truth))
+
+
+def test_CCDCesque_residuals(masked_ts, model):
+    X, Y, ordinal = masked_ts['X'], masked_ts['Y'][:-1, :], masked_ts['dates']
+    model.fit(X, Y, ordinal)
+    # Cached residuals, including any removed as noise, match predictions
+    resid = model._resid
+    truth = np.array([model.Y[b, :] - model.models[b].predict(model.X)
+                      for b in model.test_indices])
+    assert model._resid_X is model.X
+    np.testing.assert_allclose(resid, truth)
+    assert model._get_residuals() is resid
+
+
+def test_CCDCesque_warm_start(masked_ts, model):
+    X, Y, ordinal = masked_ts['X'], masked_ts['Y'][:-1, :], masked_ts['dates']
+    cold = model.fit(X, Y, ordinal)
+
+    model.warm_start = True
+    # Twice, with second fit warm started from previous "pixel"
+    for i in range(2):
+        warm = model.fit(X, Y, ordinal)
+        for key in ('start', 'end', 'break'):
+            np.testing.assert_equal(warm[key], cold[key])
+        np.testing.assert_allclose(warm['rmse'], cold['rmse'], rtol=1e-3)
+        assert all(m.warm_start for m in model.models)
+
+    model.cold_start()
+    assert not np.any(model._warm)
+
+
+def test_CCDCesque_lazy_fit(masked_ts, model, record):
+    X, Y, ordinal = masked_ts['X'], masked_ts['Y'][:-1, :], masked_ts['dates']
+    model.lazy_fit = True
+    lazy = model.fit(X, Y, ordinal)
+    for name in record.dtype.names:
+        np.testing.assert_equal(lazy[name], record[name])
+
+
+@pytest.mark.parametrize('remove_noise', (True, False))
+def test_CCDCesque_stable_fast_path(masked_ts, model, remove_noise):
+    X, Y, ordinal = masked_ts['X'], masked_ts['Y'][:-1, :], masked_ts['dates']
+    model.remove_noise = remove_noise
+    # Fast path requires RMSE that is constant between model updates
+    model.get_rmse = model._get_model_rmse
+    truth = model.fit(X, Y, ordinal)
+
+    model.stable_fast_path = True
+    fast = model.fit(X, Y, ordinal)
+    for name in truth.dtype.names:
+        np.testing.assert_equal(fast[name], truth[name])
@@ -0,0 +1,104 @@
+""" Tests for yatsm.algorithms.monitor
+"""
+import numpy as np
+import pytest
+import sklearn.linear_model
+
+from yatsm.algorithms.ccdc import CCDCesque
+from yatsm.algorithms.monitor import get_state, update_state
+
+
+@pytest.fixture(scope='function')
+def model():
+    return CCDCesque(
+        test_indices=np.array([2, 3, 4, 5]),
+        estimator={'object': sklearn.linear_model.Lasso(alpha=20), 'fit': {}},
+        consecutive=6,
+        threshold=3.5,
+        min_obs=24,
+        min_rmse=100,
+        retrain_time=365.25,
+        screening='RLM',
+        screening_crit=400.0,
+        green_band=1,
+        swir1_band=4,
+        remove_noise=True,
+        dynamic_rmse=False,
+        slope_test=True,
+        idx_slope=1
+    )
+
+
+@pytest.fixture(scope='module')
+def ts(masked_ts):
+    return masked_ts['X'], masked_ts['Y'][:-1, :], masked_ts['dates']
+
+
+def test_get_state(ts, model):
+    X, Y, dates = ts
+    record = model.fit(X, Y, dates)
+    state, pending = get_state(model)
+    assert state.shape == (1, )
+    np.testing.assert_equal(state, record[-1:])
+    assert np.all(pending['date'] > state['end'][0])
+    idx = np.in1d(model.dates, pending['date'])
+    np.testing.assert_equal(pending['X'], model.X[idx, :])
+    np.testing.assert_equal(pending['Y'], model.Y[:, idx].T)
+
+
+def test_get_state_none(ts, model):
+    X, Y, dates = ts
+    record = model.fit(X, Y, dates)
+    model.record = record[:1]
+    assert get_state(model) == (None, None)
+
+
+@pytest.mark.parametrize(('test_indices', 'min_rmse'), [
+    (np.array([2, 3, 4, 5]), 100),
+    (np.asarray([]), None),
+])
+def test_update_state_change(ts, model, test_indices, min_rmse):
+    """ Empty ``test_indices`` test all series and ``min_rmse=None`` uses
+    the smallest float, as in ``CCDCesque.fit``
+    """
+    model.test_indices, model.min_rmse = test_indices, min_rmse
+    X, Y, dates = ts
+    truth = model.fit(X, Y, dates)[0]
+
+    # Monitoring from the end of first segment finds the same change
+    i = np.searchsorted(dates, truth['break'])
+    model.fit(X[:i], Y[:, :i], dates[:i])
+    state, pending = get_state(model)
+    # ``yatsm monitor`` uses models with parameters as configured
+    model.test_indices, model.min_rmse = test_indices, min_rmse
+    record, state, pending = update_state(model, state, pending,
+                                          X[i:], Y[:, i:], dates[i:])
+    assert record.shape == (1, )
+    assert record['start'][0] == truth['start']
+    assert record['end'][0] == truth['end']
+    assert record['break'][0] == truth['break']
+    assert state.size == 0
+    assert pending.size == 0
+
+
+def test_update_state_no_change(ts, model):
+    X, Y, dates = ts
+    n = dates.size
+    model.fit(X[:n - 20], Y[:, :n - 20], dates[:n - 20])
+    state, pending = get_state(model)
+
+    # Adding images all at once or in two runs gives the same state
+    record, state_1, pending_1 = update_state(
+        model, state, pending, X[n - 20:], Y[:, n - 20:], dates[n - 20:])
+    assert record.size == 0
+    assert state_1['end'][0] > state['end'][0]
+    assert pending_1.size < model.consecutive
+    assert np.all(pending_1['date'] > state_1['end'][0])
+
+    _, state_2, pending_2 = update_state(
+        model, state, pending,
+        X[n - 20:n - 10], Y[:, n - 20:n - 10], dates[n - 20:n - 10])
+    _, state_2, pending_2 = update_state(
+        model, state_2, pending_2, X[n - 10:], Y[:, n - 10:], dates[n - 10:])
+    np.testing.assert_equal(state_2, state_1)
+    np.testing.assert_equal(pending_2, pending_1)
@@ -0,0 +1,77 @@
+""" Tests for yatsm.algorithms.workspace
+"""
+import os
+
+import numpy as np
+import pytest
+
+from yatsm.algorithms import CCDCesque
+from yatsm.algorithms.workspace import Workspace
+
+here = os.path.dirname(__file__)
+example_line = os.path.join(here, '..', 'data', 'p013r030_r50_n423_b8.npz')
+
+
+@pytest.fixture(scope='module')
+def line():
+    return np.load(example_line)
+
+
+@pytest.fixture(scope='function')
+def config():
+    return {
+        'dataset': {
+            'min_values': np.zeros(8, dtype=np.int16),
+            'max_values': np.repeat(10000, 8).astype(np.int16),
+            'mask_band': 8,
+            'mask_values': [2, 3, 4, 255]
+        }
+    }
+
+
+@pytest.mark.parametrize('mask_band', (8, 1))
+def test_preprocess_workspace(line, config, mask_band):
+    config['dataset']['mask_band'] = mask_band
+    X, Y, dates = line['X'], line['Y'], line['dates']
+    workspace = Workspace(X, dates, Y.shape[0])
+    model = CCDCesque()
+    for col in range(0, Y.shape[-1], 25):
+        truth = model.preprocess(X, Y[..., col], dates, **config)
+        test = model.preprocess(X, Y[..., col], dates, workspace=workspace,
+                                **config)
+        for _truth, _test in zip(truth, test):
+            np.testing.assert_equal(_test, _truth)
+        # Views of workspace buffers, not new arrays
+        assert test[0].base is workspace._X
+        assert test[1].dtype == np.float64
+
+
+def test_workspace_too_small(line):
+    X, Y, dates = line['X'], line['Y'], line['dates']
+    workspace = Workspace(X, dates, 2)
+    with pytest.raises(ValueError):
+        workspace.take(np.ones(dates.size, dtype=bool), Y[..., 0], range(3))
+
+
+def test_workspace_fit(line, config):
+    X, Y, dates = line['X'], line['Y'], line['dates']
+    workspace = Workspace(X, dates, Y.shape[0])
+    model = CCDCesque(test_indices=np.array([2, 3, 4, 5]), min_obs=24)
+    for col in range(0, Y.shape[-1], 100):
+        truth = model.fit(*model.preprocess(X, Y[..., col], dates, **config))
+        test = model.fit(*model.preprocess(X, Y[..., col], dates,
+                                           workspace=workspace, **config))
+        for name in truth.dtype.names:
+            np.testing.assert_equal(test[name], truth[name])
+
+
+@pytest.mark.parametrize('mask_band', (8, 1))
+def test_count_valid(line, config, mask_band):
+    config['dataset']['mask_band'] = mask_band
+    X, Y, dates = line['X'], line['Y'], line['dates']
+    model = CCDCesque()
+    n_valid = model.count_valid(Y, **config)
+    assert n_valid.shape == (Y.shape[-1], )
+    for col in range(Y.shape[-1]):
+        _, _, _dates = model.preprocess(X, Y[..., col], dates, **config)
+        assert n_valid[col] == _dates.size
@@ -1,5 +1,6 @@
 """ Tests for ``yatsm.classifiers``
 """
+import numpy as np
 import pytest
 import yaml
 
@@ -61,3 +62,22 @@ def test_cfg_to_algorithm_fail_3(tmpdir):
     f = tmpdir.mkdir('clf').join('test').strpath
     with pytest.raises(IOError):
         classifiers.cfg_to_algorithm(f)
+
+
+def test_record_features():
+    """ Test ``yatsm.classifiers.record_features`` rescales intercepts to
+    the middle of each segment without modifying the record
+    """
+    rec = np.zeros(2, dtype=[('start', 'i4'), ('end', 'i4'),
+                             ('coef', 'f4', (2, 3)), ('rmse', 'f4', 3)])
+    rec['start'], rec['end'] = [10, 100], [20, 300]
+    rec['coef'][:, 0, :] = 1
+    rec['coef'][:, 1, :] = 0.5
+    rec['rmse'] = [[1, 2, 3], [4, 5, 6]]
+
+    X = classifiers.record_features(rec)
+    assert X.shape == (2, 9)
+    np.testing.assert_equal(X[:, :3], [[8.5] * 3, [101] * 3])
+    np.testing.assert_equal(X[:, 3:6], 0.5)
+    np.testing.assert_equal(X[:, 6:], rec['rmse'])
+    np.testing.assert_equal(rec['coef'][:, 0, :], 1)
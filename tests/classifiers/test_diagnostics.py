@@ -0,0 +1,46 @@
+""" Tests for ``yatsm.classifiers.diagnostics``
+"""
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from yatsm.classifiers import diagnostics
+
+
+@pytest.fixture(scope='function')
+def regions():
+    """ Labeled samples in 4 regions, two of which share rows and columns
+    """
+    row = np.array([0, 0, 1, 1, 5, 5, 0, 5, 9])
+    col = np.array([0, 1, 0, 1, 5, 6, 6, 0, 9])
+    y = np.array([1, 1, 1, 1, 2, 2, 3, 3, 4])
+    return y, row, col
+
+
+def test_spatial_kfold(regions):
+    y, row, col = regions
+    kf = diagnostics.SpatialKFold(y, row, col, n_folds=3)
+    tests = []
+    for train, test in kf:
+        assert np.intersect1d(train, test).size == 0
+        assert train.size + test.size == y.size
+        tests.append(test)
+
+    # Each sample is tested exactly once, together with its region
+    np.testing.assert_equal(np.sort(np.concatenate(tests)), np.arange(y.size))
+    for test in tests:
+        labels = kf.labeled[row[test], col[test]]
+        assert np.in1d(kf.labeled[row, col], labels).sum() == test.size
+
+
+def test_kfold_scores_n_jobs():
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(100, 3))
+    y = (X[:, 0] > 0).astype(int)
+    kf = [(np.arange(50, 100), np.arange(50)),
+          (np.arange(50), np.arange(50, 100))]
+    algo = DecisionTreeClassifier(random_state=0)
+
+    scores = diagnostics.kfold_scores(X, y, algo, kf)
+    assert diagnostics.kfold_scores(X, y, algo, kf, n_jobs=2) == scores
+    assert not hasattr(algo, 'tree_')
@@ -6,6 +6,12 @@ from click.testing import CliRunner
 import numpy as np
 
 from yatsm.cli.main import cli
+from yatsm.io import results
+
+
+def _result_files(results_dir):
+    return [os.path.join(results_dir, f) for f in os.listdir(results_dir)
+            if not f.startswith(results.CLASSIFICATION_PREFIX)]
 
 
 def test_classify_pass_1(example_timeseries, example_results, modify_config):
@@ -23,6 +29,31 @@ def test_classify_pass_1(example_timeseries, example_results, modify_config):
             ]
         )
         assert result.exit_code == 0
+        # Check that results are untouched and classification saved
+        for result in _result_files(example_results['results_dir']):
+            z = np.load(result)
+            assert 'classes' not in z
+            assert 'class' not in z['record'].dtype.names
+            assert os.path.isfile(results.classification_filename(result))
+            assert 'class' in results.load_record(result).dtype.names
+
+
+def test_classify_pass_in_place(example_timeseries, example_results,
+                                modify_config):
+    """ Correctly run classification script, saving into result files
+    """
+    mod_cfg = {'dataset': {'output': example_results['results_dir']}}
+    with modify_config(example_timeseries['config'], mod_cfg) as cfg:
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, [
+                '-v', 'classify', '--in-place',
+                cfg,
+                example_results['example_classify_pickle'],
+                '1', '1'
+            ]
+        )
+        assert result.exit_code == 0
         # Try opening & check that classes are in the files
         for result in os.listdir(example_results['results_dir']):
             z = np.load(os.path.join(example_results['results_dir'], result))
@@ -30,6 +61,26 @@ def test_classify_pass_1(example_timeseries, example_results, modify_config):
             assert 'class' in z['record'].dtype.names
 
 
+def test_classify_pass_processes(example_timeseries, example_results,
+                                 modify_config):
+    """ Correctly run classification script using multiple processes
+    """
+    mod_cfg = {'dataset': {'output': example_results['results_dir']}}
+    with modify_config(example_timeseries['config'], mod_cfg) as cfg:
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, [
+                '-v', 'classify', '--processes', '2', '--batch', '1',
+                cfg,
+                example_results['example_classify_pickle'],
+                '1', '1'
+            ]
+        )
+        assert result.exit_code == 0
+        for result in _result_files(example_results['results_dir']):
+            assert 'class' in results.load_record(result).dtype.names
+
+
 def test_classify_pass_2(example_timeseries, example_results, modify_config):
     """ Correctly run classification script with --resume option
     """
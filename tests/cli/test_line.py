@@ -1,7 +1,15 @@
 """ Test ``yatsm line``
 """
+import glob
+import json
+import os
+import pstats
+import sys
+
 from click.testing import CliRunner
+import numpy as np
 import pytest
+import yaml
 
 from yatsm.cli import line
 
@@ -79,6 +87,155 @@ def test_cli_line_pass_refit_rlm(example_timeseries, modify_config):
         assert result.exit_code == 0
 
 
+
+def test_cli_line_pass_profile(example_timeseries, tmpdir):
+    """ Run correctly, saving metrics and cProfile statistics
+    """
+    metrics = tmpdir.join('metrics.json').strpath
+    stats = tmpdir.join('line.prof').strpath
+    runner = CliRunner()
+    result = runner.invoke(
+        line.line,
+        ['--profile', metrics, '--cprofile', stats,
+         example_timeseries['config'], '1', '5'],
+        catch_exceptions=False)
+    assert result.exit_code == 0
+
+    with open(metrics) as fid:
+        lines = json.load(fid)
+    assert len(lines) > 0
+    for _line in lines:
+        assert set(['read', 'preprocess', 'fit', 'save']).issubset(
+            _line['timers'])
+        assert _line['counters']['monitor'] > 0
+    assert pstats.Stats(stats).total_calls > 0
+
+
+def test_cli_line_pass_pixel_stats(example_timeseries):
+    """ Run correctly, saving pixel statistics and all pixels as slow
+    """
+    runner = CliRunner()
+    result = runner.invoke(
+        line.line,
+        ['--pixel-stats', '--slow-pixels', '0',
+         example_timeseries['config'], '1', '5'],
+        catch_exceptions=False)
+    assert result.exit_code == 0
+
+    with open(example_timeseries['config']) as fid:
+        output = yaml.safe_load(fid)['dataset']['output']
+    results = glob.glob(os.path.join(output, 'yatsm_r*'))
+    assert len(results) > 0
+    for result in results:
+        stats = np.load(result)['pixel_stats']
+        assert stats.size > 0
+        assert np.all(stats['n_train'][stats['n_record'] > 0] > 0)
+
+    pixels = glob.glob(os.path.join(output, 'slow_pixels', 'pixel_r*.npz'))
+    assert len(pixels) > 0
+    pixel = np.load(pixels[0])
+    assert pixel['X'].shape[0] == pixel['Y'].shape[1] == pixel['dates'].size
+
+
+def test_cli_line_pass_async_write(example_timeseries):
+    """ Run correctly, saving results in a background thread
+    """
+    runner = CliRunner()
+    result = runner.invoke(
+        line.line,
+        ['--async-write', example_timeseries['config'], '1', '5'],
+        catch_exceptions=False)
+    assert result.exit_code == 0
+
+    with open(example_timeseries['config']) as fid:
+        output = yaml.safe_load(fid)['dataset']['output']
+    results = glob.glob(os.path.join(output, 'yatsm_r*'))
+    assert len(results) > 0
+    assert not glob.glob(os.path.join(output, '.*.tmp'))
+    for result in results:
+        assert 'record' in np.load(result).files
+
+
+@pytest.mark.parametrize('async_write', [[], ['--async-write']])
+def test_cli_line_pass_checkpoint(example_timeseries, monkeypatch,
+                                  async_write):
+    """ Run correctly, continuing an interrupted line from its checkpoint
+    """
+    from yatsm.algorithms import CCDCesque
+    with open(example_timeseries['config']) as fid:
+        output = yaml.safe_load(fid)['dataset']['output']
+
+    def run(*args):
+        for f in glob.glob(os.path.join(output, 'yatsm_r*')):
+            os.remove(f)
+        return CliRunner().invoke(
+            line.line, list(args) + [example_timeseries['config'], '1', '5'],
+            catch_exceptions=False)
+
+    result = run()
+    assert result.exit_code == 0
+    truth = dict((os.path.basename(f), np.load(f)['record'])
+                 for f in glob.glob(os.path.join(output, 'yatsm_r*')))
+
+    # Interrupt after some pixels
+    fit, calls = CCDCesque.fit, []
+
+    def interrupted_fit(self, *args, **kwargs):
+        calls.append(self.px)
+        if len(calls) > 10:
+            raise RuntimeError('Interrupted')
+        return fit(self, *args, **kwargs)
+
+    monkeypatch.setattr(CCDCesque, 'fit', interrupted_fit)
+    with pytest.raises(RuntimeError):
+        run('--checkpoint-interval', '0')
+    assert glob.glob(os.path.join(output, '.yatsm_r*.checkpoint'))
+    monkeypatch.setattr(CCDCesque, 'fit', fit)
+
+    result = CliRunner().invoke(
+        line.line,
+        ['--resume'] + async_write + [example_timeseries['config'], '1', '5'],
+        catch_exceptions=False)
+    assert result.exit_code == 0
+    assert not glob.glob(os.path.join(output, '.yatsm_r*.checkpoint'))
+    for name, record in truth.items():
+        test = np.load(os.path.join(output, name))['record']
+        np.testing.assert_equal(test, record)
+
+
+def test_cli_line_pass_process_mask(example_timeseries, modify_config,
+                                    tmpdir):
+    """ Run correctly, skipping a masked line and masked pixels
+    """
+    from osgeo import gdal, gdal_array
+    ds = gdal.Open(example_timeseries['images'][0], gdal.GA_ReadOnly)
+    mask = np.ones((ds.RasterYSize, ds.RasterXSize), dtype=np.uint8)
+    mask[0, :] = 0
+    mask[:, ::2] = 0
+    mask_file = tmpdir.join('mask.gtif').strpath
+    mask_ds = gdal.GetDriverByName('GTiff').Create(
+        mask_file, ds.RasterXSize, ds.RasterYSize, 1,
+        gdal_array.NumericTypeCodeToGDALTypeCode(np.uint8))
+    mask_ds.GetRasterBand(1).WriteArray(mask)
+    mask_ds = None
+
+    with modify_config(example_timeseries['config'],
+                       {'dataset': {'process_mask': mask_file}}) as cfg:
+        runner = CliRunner()
+        result = runner.invoke(line.line,
+                               ['--pixel-stats', cfg, '1', '5'],
+                               catch_exceptions=False)
+        assert result.exit_code == 0
+
+    with open(example_timeseries['config']) as fid:
+        output = yaml.safe_load(fid)['dataset']['output']
+    for result in glob.glob(os.path.join(output, 'yatsm_r*')):
+        z = np.load(result)
+        assert np.all(z['record']['px'] % 2 == 1)
+        assert np.all(z['record']['py'] != 0)
+        assert np.all(z['pixel_stats']['n_train'][::2] == 0)
+
+
 # FAILURES
 def test_cli_line_fail_1(example_timeseries):
     """ Run correctly, but fail with 6 of 5 jobs
@@ -105,13 +262,9 @@ def test_cli_line_fail_2(example_timeseries, modify_config):
 
 # PHENOLOGY
 @pytest.fixture(scope='function')
-def break_pheno(request):
-    def fix_pheno():
-        line.pheno = pheno_status
-    pheno_status = line.pheno
-    line.pheno = None
-    line.pheno_exception = "Don't panic -- disabled for a test"
-    request.addfinalizer(fix_pheno)
+def break_pheno(monkeypatch):
+    # Phenology is imported when requested, so make the import fail
+    monkeypatch.setitem(sys.modules, 'yatsm.phenology', None)
 
 
 def test_cli_line_pheno_pass_1(example_timeseries, modify_config):
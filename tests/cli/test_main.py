@@ -0,0 +1,48 @@
+""" Test ``yatsm`` command group
+"""
+import sys
+
+from click.testing import CliRunner
+
+from yatsm.cli import main
+
+
+def test_cli_commands_lazy():
+    """ Commands are not imported until requested
+    """
+    for name in main.COMMANDS:
+        sys.modules.pop('yatsm.cli.%s' % name, None)
+    main.cli.commands.clear()
+
+    runner = CliRunner()
+    result = runner.invoke(main.cli, ['cache', '--help'])
+    assert result.exit_code == 0
+    assert list(main.cli.commands) == ['cache']
+    assert 'yatsm.cli.changemap' not in sys.modules
+
+
+def test_cli_commands_list():
+    """ All commands included with YATSM are listed
+    """
+    commands = main.cli.list_commands(None)
+    assert set(main.COMMANDS).issubset(commands)
+    assert commands == sorted(commands)
+
+
+def test_cli_command_missing():
+    runner = CliRunner()
+    result = runner.invoke(main.cli, ['not_a_command'])
+    assert result.exit_code == 2
+    assert 'No such command' in result.output
+
+
+def test_argv_option():
+    """ Options parsed before click handle both forms and missing values
+    """
+    opt = '--numba_cache_dir'
+    assert main._argv_option(opt, ['-v', opt, 'dir', 'line']) == 'dir'
+    assert main._argv_option(opt, [opt + '=dir', 'line']) == 'dir'
+    assert main._argv_option(opt, ['line', opt]) is None
+    assert main._argv_option(opt, [opt, '--verbose']) is None
+    assert main._argv_option(opt, [opt + '=']) is None
+    assert main._argv_option(opt, ['line']) is None
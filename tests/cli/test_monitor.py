@@ -0,0 +1,102 @@
+""" Test ``yatsm monitor``
+"""
+import glob
+import os
+
+from click.testing import CliRunner
+import numpy as np
+import pytest
+import yaml
+
+from yatsm.cli import line, monitor
+from yatsm.io.results import STATE_PREFIX, monitor_filename
+
+
+@pytest.fixture(scope='function')
+def output(example_timeseries):
+    """ Return output directory, removing any saved states or changes """
+    with open(example_timeseries['config']) as fid:
+        output = yaml.safe_load(fid)['dataset']['output']
+    for pattern in ('state_yatsm_r*', 'monitor_yatsm_r*'):
+        for f in glob.glob(os.path.join(output, pattern)):
+            os.remove(f)
+    return output
+
+
+@pytest.fixture(scope='function')
+def saved_state(example_timeseries, modify_config, output, tmpdir):
+    """ Save states using all but the last 50 images """
+    df = example_timeseries['images.csv']
+    input_file = tmpdir.join('images.csv').strpath
+    df.iloc[:-50].to_csv(input_file, index=False)
+    with modify_config(example_timeseries['config'],
+                       {'dataset': {'input_file': input_file}}) as cfg:
+        result = CliRunner().invoke(line.line,
+                                    ['--save-state', cfg, '1', '5'],
+                                    catch_exceptions=False)
+        assert result.exit_code == 0
+    return output
+
+
+# PASSES
+def test_cli_monitor_pass_1(example_timeseries, saved_state):
+    """ Run correctly, saving changes and updating states with new images
+    """
+    states = sorted(glob.glob(os.path.join(saved_state, 'state_yatsm_r*')))
+    assert states
+    last_date = dict((f, int(np.load(f)['last_date'])) for f in states)
+
+    runner = CliRunner()
+    result = runner.invoke(monitor.monitor,
+                           [example_timeseries['config'], '1', '5'],
+                           catch_exceptions=False)
+    assert result.exit_code == 0
+
+    for f in states:
+        z = np.load(f)
+        assert int(z['last_date']) > last_date[f]
+        result = os.path.join(saved_state,
+                              os.path.basename(f)[len(STATE_PREFIX):])
+        changes = monitor_filename(result)
+        if os.path.exists(changes):
+            record = np.load(changes)['record']
+            assert np.all(record['break'] > record['end'])
+            # Pixels with a change are no longer monitored
+            assert not np.in1d(record['px'], z['state']['px']).any()
+
+    # Without new images, nothing changes
+    before = dict((f, np.load(f)['state']) for f in states)
+    result = runner.invoke(monitor.monitor,
+                           [example_timeseries['config'], '1', '5'],
+                           catch_exceptions=False)
+    assert result.exit_code == 0
+    for f in states:
+        np.testing.assert_equal(np.load(f)['state'], before[f])
+
+
+def test_cli_monitor_pass_no_state(example_timeseries, output):
+    """ Run correctly, skipping lines without saved states
+    """
+    result = CliRunner().invoke(monitor.monitor,
+                                [example_timeseries['config'], '1', '5'],
+                                catch_exceptions=False)
+    assert result.exit_code == 0
+    assert not glob.glob(os.path.join(output, 'monitor_yatsm_r*'))
+
+
+# FAILURES
+def test_cli_monitor_fail_reverse(example_timeseries, modify_config):
+    """ Fail to monitor or save states of models fit in reverse
+    """
+    with modify_config(example_timeseries['config'],
+                       {'YATSM': {'reverse': True}}) as cfg:
+        runner = CliRunner()
+        result = runner.invoke(monitor.monitor, [cfg, '1', '5'],
+                               catch_exceptions=False)
+        assert result.exit_code == 1
+        assert 'reverse' in result.output
+
+        result = runner.invoke(line.line, ['--save-state', cfg, '1', '5'],
+                               catch_exceptions=False)
+        assert result.exit_code == 1
+        assert 'reverse' in result.output
@@ -4,9 +4,12 @@ import os
 
 from click.testing import CliRunner
 import matplotlib as mpl
+import numpy as np
 import pytest
 
+from yatsm.cli import train
 from yatsm.cli.main import cli
+from yatsm.errors import TrainingDataException
 
 mpl_skip = pytest.mark.skipif(
     mpl.get_backend() != 'agg' and "DISPLAY" not in os.environ,
@@ -87,3 +90,51 @@ def test_train_fail_1(example_timeseries, example_results, modify_config,
         )
     assert result.exit_code == 1
     assert '<model> exists and --overwrite was not specified' in result.output
+
+
+def test_train_pass_processes(example_timeseries, example_results,
+                              modify_config, tmpdir):
+    """ Correctly run training script, extracting training data in parallel
+    """
+    mod_cfg = {'dataset': {'output': example_results['results_dir']}}
+    tmppkl = tmpdir.join('tmp.pkl').strpath
+    with modify_config(example_timeseries['config'], mod_cfg) as cfg:
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, [
+                '-v', 'train', '--processes', '2',
+                cfg,
+                example_results['classify_config'],
+                tmppkl
+            ]
+        )
+    assert result.exit_code == 0
+
+
+def test_get_training_features():
+    """ Find models spanning training period for columns of training data
+    """
+    rec = np.zeros(5, dtype=[('start', 'i4'), ('end', 'i4'),
+                             ('coef', 'f4', (2, 1)), ('rmse', 'f4', (1, )),
+                             ('px', 'u2')])
+    rec['start'] = [1, 10, 1, 1, 10]
+    rec['end'] = [9, 20, 20, 20, 20]
+    rec['px'] = [3, 3, 1, 0, 0]
+    rec['coef'][:, 0, 0] = np.arange(5)
+    rec['coef'][:, 1, 0] = 1
+
+    X, found = train.get_training_features(rec, np.array([0, 1, 2, 3]),
+                                           5, 15)
+    np.testing.assert_equal(found, [True, True, False, False])
+    np.testing.assert_equal(X[:, 0], [3 + 10.5, 2 + 10.5])
+
+
+def test_get_training_features_fail():
+    """ Fail because more than one model spans training period
+    """
+    rec = np.zeros(2, dtype=[('start', 'i4'), ('end', 'i4'),
+                             ('coef', 'f4', (2, 1)), ('rmse', 'f4', (1, )),
+                             ('px', 'u2')])
+    rec['start'], rec['end'] = 1, 20
+    with pytest.raises(TrainingDataException):
+        train.get_training_features(rec, np.array([0]), 5, 15)
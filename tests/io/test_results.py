@@ -0,0 +1,221 @@
+""" Tests for ``yatsm.io.results``
+"""
+import glob
+import os
+
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+from yatsm.io import results
+
+here = os.path.dirname(__file__)
+example_results = os.path.join(here, '..', 'data', 'results', 'YATSM')
+
+
+@pytest.fixture(scope='function')
+def record():
+    rec = np.zeros(5, dtype=[
+        ('start', 'i4'),
+        ('end', 'i4'),
+        ('break', 'i4'),
+        ('coef', 'float32', (4, 3)),
+        ('rmse', 'float32', 3),
+        ('magnitude', 'float32', 3),
+        ('px', 'u2'),
+        ('py', 'u2')
+    ])
+    rng = np.random.RandomState(1234)
+    rec['start'] = 723000 + np.arange(5) * 1000
+    rec['end'] = rec['start'] + 900
+    rec['break'][:3] = rec['end'][:3] + 16
+    rec['coef'] = rng.normal(scale=500, size=rec['coef'].shape)
+    rec['rmse'] = rng.uniform(50, 200, size=rec['rmse'].shape)
+    rec['magnitude'][:3] = rng.normal(scale=1000, size=(3, 3))
+    rec['px'] = np.arange(5)
+    rec['py'] = 42
+    return rec
+
+
+def test_parse_record_schema_default():
+    assert results.parse_record_schema() == results.DEFAULT_RECORD_SCHEMA
+    assert results.is_default_schema({'coef': 'float32'})
+    assert not results.is_default_schema({'dates': 'delta'})
+
+
+@pytest.mark.parametrize('schema', [
+    {'coef': 'float64'},
+    {'dates': 'julian'},
+    {'coords': 'i8'}
+])
+def test_parse_record_schema_fail(schema):
+    with pytest.raises(ValueError):
+        results.parse_record_schema(schema)
+
+
+def test_encode_record_default(record):
+    encoded, sidecar = results.encode_record(record)
+    assert encoded.dtype == record.dtype
+    npt.assert_equal(results.decode_record(encoded, sidecar), record)
+
+
+def test_encode_record_float16(record):
+    encoded, sidecar = results.encode_record(record, {'coef': 'float16'})
+    assert encoded.dtype['coef'].base == np.float16
+    assert encoded.nbytes < record.nbytes
+
+    decoded = results.decode_record(encoded, sidecar)
+    assert decoded.dtype == record.dtype
+    npt.assert_allclose(decoded['coef'], record['coef'], rtol=1e-3)
+
+
+def test_encode_record_int16(record):
+    encoded, sidecar = results.encode_record(record, {'coef': 'int16'})
+    assert encoded.dtype['coef'].base == np.int16
+    assert set(sidecar['fields']) == set(['coef', 'rmse', 'magnitude'])
+
+    decoded = results.decode_record(encoded, sidecar)
+    for name in ('coef', 'rmse', 'magnitude'):
+        scale = sidecar['fields'][name]['scale']
+        assert np.all(np.abs(decoded[name] - record[name]) <= scale)
+    # Records without a break keep a magnitude of exactly zero
+    npt.assert_equal(decoded['magnitude'][3:], 0)
+
+    # Values of a single record are decoded exactly
+    encoded, sidecar = results.encode_record(record[:1], {'coef': 'int16'})
+    for name in ('coef', 'rmse', 'magnitude'):
+        npt.assert_equal(encoded[name], 0)
+    decoded = results.decode_record(encoded, sidecar)
+    for name in ('coef', 'rmse', 'magnitude'):
+        npt.assert_equal(decoded[name], record[:1][name])
+
+
+@pytest.fixture(scope='module')
+def real_record():
+    """ Return records and design matrix columns of example result files """
+    filenames = sorted(glob.glob(os.path.join(example_results, 'yatsm_r*')))
+    record = np.concatenate([np.load(f)['record'] for f in filenames])
+    design = np.load(filenames[0])['metadata'].item()['YATSM']['design']
+    return record, design
+
+
+def _predict(record, design, name='coef'):
+    """ Predict each segment at its start and end (sensor dummies as zero)
+    """
+    w = 2 * np.pi / 365.25
+    preds = []
+    for date in ('start', 'end'):
+        x = record[date].astype(np.float64)
+        X = np.zeros((record.size, len(design)))
+        for column, idx in design.items():
+            if column == 'Intercept':
+                X[:, idx] = 1
+            elif column == 'x':
+                X[:, idx] = x
+            elif column == 'harm(x, 1)[0]':
+                X[:, idx] = np.cos(w * x)
+            elif column == 'harm(x, 1)[1]':
+                X[:, idx] = np.sin(w * x)
+        preds.append(np.einsum('nk,nkb->nb', X,
+                               record[name].astype(np.float64)))
+    return np.array(preds)
+
+
+@pytest.mark.parametrize('coef', ['float16', 'int16'])
+def test_encode_record_real(real_record, coef):
+    # Intercepts of ordinal date designs are larger than float16 can hold
+    record, design = real_record
+    assert np.abs(record['coef']).max() > np.finfo(np.float16).max
+
+    encoded, sidecar = results.encode_record(record, {'coef': coef})
+    assert encoded.dtype['coef'].base == np.float32
+    assert encoded.dtype['rmse'].base == np.dtype(coef)
+    assert encoded.nbytes < record.nbytes
+
+    decoded = results.decode_record(encoded, sidecar)
+    for name in record.dtype.names:
+        if results._is_coef_field(name):
+            assert np.all(np.isfinite(decoded[name]))
+    for name in ('coef', 'ols_coef', 'rlm_coef'):
+        npt.assert_allclose(_predict(decoded, design, name),
+                            _predict(record, design, name), atol=1)
+    npt.assert_allclose(decoded['rmse'], record['rmse'], rtol=1e-3, atol=1)
+
+
+def test_encode_record_dates_delta(record):
+    encoded, sidecar = results.encode_record(record, {'dates': 'delta'})
+    assert encoded.dtype['start'] == np.uint16
+    assert sidecar['origin'] == record['start'].min()
+
+    decoded = results.decode_record(encoded, sidecar)
+    npt.assert_equal(decoded['start'], record['start'])
+    npt.assert_equal(decoded['end'], record['end'])
+    npt.assert_equal(decoded['break'], record['break'])
+
+
+def test_encode_record_coords(record):
+    encoded, sidecar = results.encode_record(record, {'coords': 'u4'})
+    assert encoded.dtype['px'] == np.uint32
+    npt.assert_equal(results.decode_record(encoded, sidecar)['px'],
+                     record['px'])
+
+
+def test_encode_record_coords_fail(record):
+    record = record.astype([(n, 'u4' if n in ('px', 'py') else
+                             record.dtype[n].base, record.dtype[n].shape)
+                            for n in record.dtype.names])
+    record['px'][0] = 70000
+    with pytest.raises(ValueError):
+        results.encode_record(record, {'coords': 'u2'})
+
+
+def test_load_record(tmpdir, record):
+    schema = {'coef': 'int16', 'dates': 'delta'}
+    encoded, sidecar = results.encode_record(record, schema)
+    filename = tmpdir.join('yatsm_r0.npz').strpath
+    np.savez(filename, **{'record': encoded,
+                          results.RECORD_SCHEMA_KEY: sidecar})
+
+    decoded = results.load_record(filename)
+    npt.assert_equal(decoded['start'], record['start'])
+    npt.assert_allclose(decoded['coef'], record['coef'], atol=0.1)
+
+
+def test_save_load_classification(tmpdir, record):
+    filename = tmpdir.join('yatsm_r0.npz').strpath
+    np.savez(filename, record=record)
+    assert results.load_classification(filename) is None
+
+    classes = np.array([1, 5, 7])
+    classified = np.zeros(record.shape,
+                          dtype=results.classification_dtype(classes.size))
+    classified['class'] = classes[np.arange(record.size) % 3]
+    classified['class_proba'] = 0.5
+    out = results.save_classification(filename, classified, classes)
+    assert out == tmpdir.join('class_yatsm_r0.npz').strpath
+
+    _classified, _classes = results.load_classification(filename)
+    npt.assert_equal(_classified, classified)
+    npt.assert_equal(_classes, classes)
+
+    rec = results.load_record(filename)
+    npt.assert_equal(rec['class'], classified['class'])
+    npt.assert_equal(rec['coef'], record['coef'])
+    assert 'class' not in results.load_record(
+        filename, classification=False).dtype.names
+
+
+def test_merge_classification_replace(record):
+    classified = np.ones(record.shape, dtype=results.classification_dtype(2))
+    merged = results.merge_classification(record, classified)
+
+    classified = np.zeros(record.shape, dtype=results.classification_dtype(4))
+    merged = results.merge_classification(merged, classified)
+    assert merged.dtype['class_proba'].shape == (4, )
+    npt.assert_equal(merged['class'], 0)
+
+
+def test_merge_classification_fail(record):
+    classified = np.zeros(3, dtype=results.classification_dtype(2))
+    with pytest.raises(ValueError):
+        results.merge_classification(record, classified)
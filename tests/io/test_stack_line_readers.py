@@ -0,0 +1,68 @@
+""" Tests for ``yatsm.io.stack_line_readers``
+"""
+import os
+import stat
+
+import numpy as np
+import pytest
+
+from yatsm.io import stack_line_readers
+
+
+@pytest.mark.parametrize(('bands', 'index'), [
+    (None, None),
+    ([0, 3, 7], None),
+    (None, [0, 5, 10]),
+    ([7, 1], [3, 2])
+])
+def test_gdal_reader_subset(example_timeseries, bands, index):
+    images = example_timeseries['images']
+    reader = stack_line_readers._GDALStackReader()
+    Y = reader.read_row(images, 0)
+    test = reader.read_row(images, 0, bands=bands, index=index)
+
+    truth = Y if bands is None else Y[bands]
+    truth = truth if index is None else truth[:, index]
+    np.testing.assert_equal(test, truth)
+
+
+@pytest.mark.parametrize(('bands', 'index'), [
+    (None, None),
+    ([0, 3, 7], None),
+    (None, [0, 5, 10]),
+    ([7, 1], [3, 2])
+])
+def test_vrt_reader(example_timeseries, tmpdir, bands, index):
+    images = example_timeseries['images']
+    truth = stack_line_readers._GDALStackReader().read_row(
+        images, 1, bands=bands, index=index)
+
+    reader = stack_line_readers._VRTStackReader()
+    reader.vrt_dir = tmpdir.strpath
+    test = reader.read_row(images, 1, bands=bands, index=index)
+    np.testing.assert_equal(test, truth)
+    assert tmpdir.join(os.path.basename(reader.vrt_filename)).check()
+    # VRT can be read by other users, unless the umask prevents it
+    mode = stat.S_IMODE(os.stat(reader.vrt_filename).st_mode)
+    assert mode == 0o666 & ~stack_line_readers._umask()
+
+    # VRT is reused by other readers
+    other = stack_line_readers._VRTStackReader()
+    other.vrt_dir = tmpdir.strpath
+    np.testing.assert_equal(other.read_row(images, 1, bands=bands,
+                                           index=index), truth)
+    assert other.vrt_filename == reader.vrt_filename
+    assert len(tmpdir.listdir()) == 1
+
+
+def test_vrt_reader_failure(example_timeseries, tmpdir, monkeypatch):
+    """ Temporary VRT is removed if it cannot be written """
+    def _vrt_xml(self, ds):
+        raise ValueError('Cannot write VRT')
+    monkeypatch.setattr(stack_line_readers._VRTStackReader, '_vrt_xml',
+                        _vrt_xml)
+    reader = stack_line_readers._VRTStackReader()
+    reader.vrt_dir = tmpdir.strpath
+    with pytest.raises(ValueError):
+        reader.read_row(example_timeseries['images'], 1)
+    assert tmpdir.listdir() == []
@@ -0,0 +1,103 @@
+""" Tests for ``yatsm.io.writers``
+"""
+import os
+
+import numpy as np
+import pytest
+
+from yatsm.io import writers
+
+
+def test_save_results(tmpdir):
+    filename = tmpdir.join('yatsm_r0.npz').strpath
+    writers.save_results(filename, {'record': np.arange(5)})
+    np.testing.assert_equal(np.load(filename)['record'], np.arange(5))
+    assert os.listdir(tmpdir.strpath) == ['yatsm_r0.npz']
+
+
+def test_save_results_failure(tmpdir):
+    filename = tmpdir.join('yatsm_r0.npz').strpath
+    with pytest.raises(Exception):
+        writers.save_results(filename, {'record': np.arange(5),
+                                        'bad': lambda x: x})
+    assert os.listdir(tmpdir.strpath) == []
+
+
+def test_ResultWriter(tmpdir):
+    with writers.ResultWriter(maxsize=1) as writer:
+        for i in range(5):
+            writer.write(tmpdir.join('yatsm_r%i.npz' % i).strpath,
+                         {'record': np.arange(i)})
+    for i in range(5):
+        z = np.load(tmpdir.join('yatsm_r%i.npz' % i).strpath)
+        np.testing.assert_equal(z['record'], np.arange(i))
+
+
+def test_ResultWriter_error(tmpdir):
+    writer = writers.ResultWriter()
+    writer.write(tmpdir.join('missing', 'yatsm_r0.npz').strpath,
+                 {'record': np.arange(5)})
+    with pytest.raises(IOError):
+        writer.close()
+
+
+def test_ResultWriter_error_repeated(tmpdir):
+    """ Every write after a failure raises instead of dropping results """
+    writer = writers.ResultWriter()
+    writer.write(tmpdir.join('missing', 'yatsm_r0.npz').strpath,
+                 {'record': np.arange(5)})
+    with pytest.raises(IOError):
+        writer.close()
+    for i in range(1, 3):
+        with pytest.raises(IOError):
+            writer.write(tmpdir.join('yatsm_r%i.npz' % i).strpath,
+                         {'record': np.arange(i)})
+    with pytest.raises(IOError):
+        writer.close()
+    assert os.listdir(tmpdir.strpath) == []
+
+
+def test_ResultWriter_exception(tmpdir):
+    """ Queued results are saved if an error is raised in the context """
+    with pytest.raises(ValueError):
+        with writers.ResultWriter() as writer:
+            writer.write(tmpdir.join('yatsm_r0.npz').strpath,
+                         {'record': np.arange(5)})
+            raise ValueError('error while processing')
+    np.testing.assert_equal(
+        np.load(tmpdir.join('yatsm_r0.npz').strpath)['record'], np.arange(5))
+
+
+def test_ResultWriter_not_threaded(tmpdir):
+    filename = tmpdir.join('yatsm_r0.npz').strpath
+    with writers.ResultWriter(threaded=False) as writer:
+        writer.write(filename, {'record': np.arange(5)})
+        np.testing.assert_equal(np.load(filename)['record'], np.arange(5))
+        with pytest.raises(IOError):
+            writer.write(tmpdir.join('missing', 'yatsm_r1.npz').strpath,
+                         {'record': np.arange(5)})
+
+
+@pytest.mark.parametrize('threaded', [True, False])
+def test_ResultWriter_callback(tmpdir, threaded):
+    """ Callback is run once results are saved, but not if saving fails """
+    filename = tmpdir.join('yatsm_r0.npz').strpath
+    called = []
+
+    def callback():
+        called.append(os.path.exists(filename))
+
+    with writers.ResultWriter(threaded=threaded) as writer:
+        writer.write(filename, {'record': np.arange(5)}, callback=callback)
+    assert called == [True]
+
+    with pytest.raises(IOError):
+        with writers.ResultWriter(threaded=threaded) as writer:
+            writer.write(tmpdir.join('missing', 'yatsm_r1.npz').strpath,
+                         {'record': np.arange(5)}, callback=callback)
+    assert called == [True]
+
+
+def test_checkpoint_filename():
+    assert (writers.checkpoint_filename('/results/yatsm_r5.npz') ==
+            '/results/.yatsm_r5.npz.checkpoint')
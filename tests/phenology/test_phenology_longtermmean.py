@@ -1,5 +1,7 @@
 """ Tests for yatsm.phenology.longtermmean
 """
+from datetime import datetime as dt
+
 import numpy as np
 
 import yatsm.phenology.longtermmean as ltm
@@ -11,3 +13,59 @@ def test_scale_EVI(df):
                                    err_msg='Scaled EVI max is not correct')
     np.testing.assert_almost_equal(evi_norm.min(), -0.2385107, decimal=5,
                                    err_msg='Scaled EVI min is not correct')
+
+
+def test_scale_EVI_periods(df):
+    """ Scaling matches percentiles calculated for each period """
+    evi, periods = df['evi'].values, df['prd'].values
+    evi_norm = ltm.scale_EVI(evi, periods)
+    for period in np.unique(periods):
+        _evi = evi[periods == period]
+        evi_min, evi_max = np.percentile(_evi, [10, 90])
+        np.testing.assert_allclose(evi_norm[periods == period],
+                                   (_evi - evi_min) / (evi_max - evi_min))
+
+
+def test_group_years():
+    years = np.array([2000, 2000, 2001, 2003, 2004, 2006, 2007, 2008])
+    np.testing.assert_equal(ltm.group_years(years, interval=3),
+                            [0, 0, 0, 1, 1, 2, 2, 2])
+    np.testing.assert_equal(ltm.group_years(years[:3], interval=3), 0)
+
+
+def test_ordinal2yeardoy():
+    ordinal = np.arange(dt(1999, 12, 25).toordinal(),
+                        dt(2001, 1, 5).toordinal())
+    truth = [(int(d.strftime('%Y')), int(d.strftime('%j'))) for d in
+             map(dt.fromordinal, ordinal)]
+    np.testing.assert_equal(ltm.ordinal2yeardoy(ordinal), truth)
+
+
+def test_LongTermMeanPhenology_fit(df):
+    """ Records fit together match records fit individually """
+    ordinal = np.array([
+        dt(int(yr), 1, 1).toordinal() + int(doy) - 1
+        for yr, doy in zip(df['yr'], df['doy'])])
+    order = np.argsort(ordinal)
+
+    class Model(object):
+        dates = ordinal[order]
+        Y = np.vstack((np.zeros(ordinal.size), df['evi'].values[order]))
+        record = np.zeros(3, dtype=[('start', 'i4'), ('end', 'i4')])
+
+    middle = Model.dates[Model.dates.size // 2]
+    Model.record['start'] = [Model.dates[0], Model.dates[0], middle]
+    Model.record['end'] = [Model.dates[-1], middle - 1, Model.dates[-1]]
+
+    pheno = ltm.LongTermMeanPhenology(evi_index=1, evi_scale=1.0)
+    record = pheno.fit(Model)
+    assert np.all(record['pheno_nobs'] > 0)
+    assert np.all(record['spring_doy'] < record['autumn_doy'])
+
+    for rec in record:
+        index = (pheno.ordinal >= rec['start']) & (pheno.ordinal <= rec['end'])
+        result = pheno._fit_record(pheno.evi[index], pheno.yeardoy[index],
+                                   3, 10, 90)
+        assert result[0] == rec['spring_doy']
+        assert result[1] == rec['autumn_doy']
+        np.testing.assert_allclose(result[5], rec['spline_evi'])
@@ -0,0 +1,94 @@
+""" Tests for yatsm.regression.design
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import patsy
+import pytest
+
+from yatsm.regression import design
+from yatsm.regression.transforms import harm  # noqa
+
+
+@pytest.fixture(scope='function')
+def dataset():
+    x = np.arange(723180, 723180 + 16 * 100, 16)
+    return pd.DataFrame({
+        'x': x,
+        'sensor': np.where(np.arange(x.size) % 2, 'LT5', 'LE7')
+    })
+
+
+@pytest.mark.parametrize('formula', [
+    '1 + x',
+    '1 + x + harm(x, 1)',
+    '1 + x + harm(x, 1) + harm(x, 2) + harm(x, 3)',
+    '0 + harm(x, 2) + x'
+])
+def test_design_for_dates(dataset, formula):
+    truth = patsy.dmatrix(formula, data=dataset)
+    X = design.design_for_dates(truth.design_info.column_names,
+                                dataset['x'].values)
+    np.testing.assert_equal(X, np.asarray(truth))
+
+
+def test_design_for_dates_scalar():
+    X = design.design_for_dates(['Intercept', 'x', 'harm(x, 1)[0]'], 730000)
+    assert X.shape == (1, 3)
+
+
+def test_design_for_dates_categorical():
+    with pytest.raises(ValueError):
+        design.design_for_dates(['Intercept', 'C(sensor)[T.LT5]'], 730000)
+
+
+@pytest.mark.parametrize('formula', [
+    '1 + x + np.log(x) + harm(x, 1)',
+    '1 + x + C(sensor) + harm(x, 1) + np.log(x)',
+    "1 + x + C(sensor, Treatment(reference='LE7')) + harm(x, 2)"
+])
+def test_design_for_dates_formula(dataset, formula):
+    # Columns that are not supported are evaluated using the formula
+    truth = patsy.dmatrix(formula, data=dataset)
+    idx = [i for i, c in enumerate(truth.design_info.column_names)
+           if not c.startswith('C(')]
+    columns = [truth.design_info.column_names[i] for i in idx]
+    X = design.design_for_dates(columns, dataset['x'].values,
+                                formula=formula)
+    np.testing.assert_allclose(X, np.asarray(truth)[:, idx])
+
+
+def test_design_for_dates_formula_fail():
+    with pytest.raises(ValueError):
+        design.design_for_dates(['Intercept', 'np.log(x)'], 730000,
+                                formula='1 + x')
+
+
+@pytest.mark.parametrize('formula', [
+    '1 + x + harm(x, 1)',
+    '1 + x + C(sensor)'
+])
+def test_get_design_matrix(tmpdir, dataset, formula):
+    truth = patsy.dmatrix(formula, data=dataset)
+
+    X = design.get_design_matrix(formula, dataset, cache_dir=tmpdir.strpath)
+    np.testing.assert_equal(np.asarray(X), np.asarray(truth))
+    assert (X.design_info.column_name_indexes ==
+            truth.design_info.column_name_indexes)
+    assert len(os.listdir(tmpdir.strpath)) == 1
+
+    # Read from disk cache
+    design._DESIGN_CACHE.clear()
+    X = design.get_design_matrix(formula, dataset, cache_dir=tmpdir.strpath)
+    np.testing.assert_equal(np.asarray(X), np.asarray(truth))
+    assert (X.design_info.column_name_indexes ==
+            truth.design_info.column_name_indexes)
+
+
+def test_get_design_matrix_key(dataset):
+    formula = '1 + x + harm(x, 1)'
+    X1 = design.get_design_matrix(formula, dataset)
+    X2 = design.get_design_matrix(formula, dataset.iloc[:50])
+    assert X1.shape[0] == 100
+    assert X2.shape[0] == 50
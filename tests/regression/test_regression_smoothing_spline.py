@@ -0,0 +1,135 @@
+""" Tests for yatsm.regression.smoothing_spline
+"""
+import numpy as np
+import pytest
+
+from yatsm.regression.smoothing_spline import (SmoothingSpline,
+                                               bspline_basis, nknots_smspl)
+
+
+@pytest.fixture(scope='module')
+def xy():
+    rng = np.random.RandomState(42)
+    x = np.sort(rng.uniform(1, 365, 200))
+    y = np.sin(x / 365. * 2 * np.pi) + rng.normal(scale=0.2, size=x.size)
+    return x, y
+
+
+@pytest.fixture(scope='module')
+def cars():
+    """ R's ``cars`` dataset (``speed`` has duplicates) and the fit printed
+    by the example in ``?smooth.spline``, ``smooth.spline(speed, dist)``
+    """
+    speed = np.array([4, 4, 7, 7, 8, 9, 10, 10, 10, 11, 11, 12, 12, 12, 12,
+                      13, 13, 13, 13, 14, 14, 14, 14, 15, 15, 15, 16, 16,
+                      17, 17, 17, 18, 18, 18, 18, 19, 19, 19, 20, 20, 20,
+                      20, 20, 22, 23, 24, 24, 24, 24, 25], dtype=float)
+    dist = np.array([2, 10, 4, 22, 16, 10, 18, 26, 34, 17, 28, 14, 20, 24,
+                     28, 26, 34, 34, 46, 26, 36, 60, 80, 20, 26, 54, 32, 40,
+                     32, 40, 50, 42, 56, 76, 84, 36, 46, 68, 32, 48, 52, 56,
+                     64, 66, 54, 70, 92, 93, 120, 85], dtype=float)
+    r = {'spar': 0.7801305, 'lambda': 0.1112206, 'df': 2.635278,
+         'rss': 4187.776, 'gcv': 244.1044}
+    return speed, dist, r
+
+
+@pytest.mark.parametrize(('n', 'nknots'), [
+    (20, 20), (49, 49), (120, 69), (365, 109), (1000, 144), (5000, 204)
+])
+def test_nknots_smspl(n, nknots):
+    assert nknots_smspl(n) == nknots
+
+
+def test_bspline_basis_partition(xy):
+    spl = SmoothingSpline().fit(*xy)
+    B = bspline_basis(np.linspace(0, 1, 101), spl.knots_)
+    np.testing.assert_allclose(B.sum(axis=1), 1)
+
+
+def test_smoothing_spline_interpolate(xy):
+    """ Very little smoothing interpolates data """
+    x, y = xy[0][:40], xy[1][:40]
+    spl = SmoothingSpline(spar=-1.5).fit(x, y)
+    np.testing.assert_allclose(spl.predict(x), y, atol=1e-6)
+
+
+def test_smoothing_spline_linear(xy):
+    """ A lot of smoothing approaches least squares linear fit """
+    x, y = xy
+    spl = SmoothingSpline(spar=1.8).fit(x, y)
+    np.testing.assert_allclose(spl.predict(x),
+                               np.polyval(np.polyfit(x, y, 1), x),
+                               atol=1e-3)
+
+
+def test_smoothing_spline_extrapolate(xy):
+    """ Predictions beyond range of x are linear """
+    spl = SmoothingSpline().fit(*xy)
+    x = np.arange(xy[0].max() + 1, xy[0].max() + 11)
+    assert np.allclose(np.diff(spl.predict(x), 2), 0)
+
+
+def test_smoothing_spline_duplicates(xy):
+    """ Duplicate x are equivalent to weighted mean """
+    x, y = xy
+    spl_dup = SmoothingSpline().fit(np.concatenate((x, x)),
+                                    np.concatenate((y, y + 0.2)))
+    spl_w = SmoothingSpline().fit(x, y + 0.1, w=2 * np.ones_like(x))
+    np.testing.assert_allclose(spl_dup.coef_, spl_w.coef_)
+
+
+def test_smoothing_spline_batch(xy):
+    """ Fitting multiple series at once matches fitting each """
+    x, y = xy
+    Y = np.vstack((y, y ** 2, -y))
+    W = np.ones_like(Y)
+    W[1, ::3] = 0
+    W[2, 5:20] = 3
+    spl = SmoothingSpline().fit(x, Y, w=W)
+    pred = spl.predict(np.arange(1, 367))
+    assert pred.shape == (3, 366)
+    for i in range(3):
+        _spl = SmoothingSpline().fit(x, Y[i], w=W[i])
+        np.testing.assert_allclose(spl.coef_[i], _spl.coef_)
+        np.testing.assert_allclose(pred[i], _spl.predict(np.arange(1, 367)))
+
+
+def test_smoothing_spline_R_lambda(cars):
+    """ ``lambda`` from ``spar`` matches R's, within R's tolerance for the
+    ``spar`` found by cross-validation
+    """
+    x, y, r = cars
+    spl = SmoothingSpline(spar=r['spar']).fit(x, y)
+    np.testing.assert_allclose(spl.lambda_, r['lambda'], rtol=1e-3)
+
+
+def test_smoothing_spline_R_fit(cars):
+    """ Fit using R's ``lambda`` matches R's degrees of freedom, residual
+    sum of squares of unique ``x``, and GCV criterion
+    """
+    x, y, r = cars
+    n = x.size
+    # Find ``spar`` giving R's ``lambda``
+    spl = SmoothingSpline(spar=r['spar']).fit(x, y)
+    spar = r['spar'] + np.log(r['lambda'] / spl.lambda_) / np.log(256) / 3
+    spl = SmoothingSpline(spar=spar).fit(x, y)
+    np.testing.assert_allclose(spl.lambda_, r['lambda'])
+
+    # Trace of the hat matrix, by smoothing each observation's indicator
+    hat = SmoothingSpline(spar=spar).fit(x, np.eye(n)).predict(x)
+    df = np.trace(hat)
+    np.testing.assert_allclose(df, r['df'], rtol=1e-6)
+
+    ux = np.unique(x)
+    count = np.bincount(np.searchsorted(ux, x))
+    ybar = np.bincount(np.searchsorted(ux, x), weights=y) / count
+    rss = np.sum(count * (ybar - spl.predict(ux)) ** 2)
+    np.testing.assert_allclose(rss, r['rss'], rtol=1e-6)
+
+    gcv = np.mean(((y - spl.predict(x)) / (1 - df / n)) ** 2)
+    np.testing.assert_allclose(gcv, r['gcv'], rtol=1e-6)
+
+
+def test_smoothing_spline_fail():
+    with pytest.raises(ValueError):
+        SmoothingSpline().fit(np.arange(3), np.arange(3))
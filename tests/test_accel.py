@@ -87,3 +87,27 @@ def test_accel_no_nb(fn):
     """ Test function isn't JIT-ed if no numba """
     accel.has_numba = False
     assert accel.try_jit(fn) is fn
+
+
+def test_parse_aot_signature():
+    arg_types = accel._parse_aot_signature(
+        'void(f8[:, :], i8, f8[:], f4[:, :])')
+    assert arg_types == [(np.dtype('f8'), 2), (np.dtype('i8'), 0),
+                         (np.dtype('f8'), 1), (np.dtype('f4'), 2)]
+
+
+def test_aot_kernel_fallback():
+    """ Only call AOT kernel if arguments match signature """
+    def py_func(x, scale=2.0):
+        return x.sum() * scale
+
+    def aot_func(x, scale):
+        return 'aot'
+
+    kernel = accel.AOTKernel(aot_func, py_func, py_func, 'f8(f8[:], f8)')
+    x = np.arange(5, dtype=np.float64)
+    assert kernel(x) == 'aot'
+    assert kernel(x, scale=3.0) == 'aot'
+    assert kernel(x.astype(np.float32)) == 20.0
+    assert kernel(x[:, None]) == 20.0
+    assert kernel.__name__ == 'py_func'
@@ -145,3 +145,20 @@ def test_update_cache_file_add_obs(cachefile, example_cache,
 
     os.remove('test.npz')
     os.remove('test_new.npz')
+
+
+def test_read_cache_file_bands(cachefile, example_cache, tmpdir):
+    # Cache files without bands are assumed to contain all bands
+    bands = np.arange(example_cache['Y'].shape[0])
+    np.testing.assert_equal(example_cache['Y'],
+                            cache.read_cache_file(cachefile, bands=bands))
+    assert None is cache.read_cache_file(cachefile, bands=bands[:-1])
+
+    # Cache files with subset of bands
+    subset = tmpdir.join('test.npz').strpath
+    cache.write_cache_file(subset, example_cache['Y'][[0, 2]],
+                           example_cache['image_IDs'], bands=[0, 2])
+    np.testing.assert_equal(np.load(subset)['bands'], [0, 2])
+    np.testing.assert_equal(example_cache['Y'][[0, 2]],
+                            cache.read_cache_file(subset, bands=[0, 2]))
+    assert None is cache.read_cache_file(subset, bands=[0, 1])
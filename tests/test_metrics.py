@@ -0,0 +1,81 @@
+""" Tests for ``yatsm.metrics``
+"""
+import csv
+import json
+import os
+
+import numpy as np
+import pytest
+
+from yatsm.metrics import (Metrics, pixel_stats_dtype, update_pixel_stats,
+                           write_metrics, write_pixel)
+
+example_pixel = os.path.join(os.path.dirname(__file__), 'algorithms', 'data',
+                             'example_timeseries_masked.npz')
+
+
+@pytest.fixture(scope='function')
+def records():
+    m = Metrics()
+    m.enable()
+    records = []
+    for line in range(2):
+        m.reset()
+        for i in range(line + 1):
+            with m.timer('fit'):
+                m.count('monitor', 5)
+        records.append(dict(line=line, **m.to_dict()))
+    return records
+
+
+def test_metrics(records):
+    assert records[1]['counters'] == {'fit': 2, 'monitor': 10}
+    assert records[1]['timers']['fit'] >= 0
+
+
+def test_metrics_disabled():
+    m = Metrics()
+    with m.timer('fit'):
+        m.count('monitor')
+    assert m.to_dict() == {'counters': {}, 'timers': {}}
+
+
+def test_write_metrics_json(tmpdir, records):
+    f = tmpdir.join('metrics.json').strpath
+    write_metrics(f, records)
+    with open(f) as fid:
+        assert json.load(fid) == records
+
+
+def test_write_metrics_csv(tmpdir, records):
+    f = tmpdir.join('metrics.csv').strpath
+    write_metrics(f, records)
+    with open(f) as fid:
+        rows = list(csv.DictReader(fid))
+    assert [int(row['line']) for row in rows] == [0, 1]
+    assert [int(row['monitor']) for row in rows] == [5, 10]
+    assert all(float(row['time_fit']) >= 0 for row in rows)
+
+
+def test_update_pixel_stats():
+    stats = np.zeros(2, dtype=pixel_stats_dtype('u4'))
+    update_pixel_stats(stats[1], {'train': 3, 'monitor': 10, 'other': 1},
+                       {'train': 1})
+    assert stats['px'].dtype == np.dtype('u4')
+    assert stats[1]['n_train'] == 2
+    assert stats[1]['n_monitor'] == 10
+    assert stats[1]['n_noise'] == 0
+    assert stats[0]['n_train'] == 0
+
+
+def test_write_pixel(tmpdir):
+    masked_ts = np.load(example_pixel)
+    f = tmpdir.join('pixel.npz').strpath
+    write_pixel(f, masked_ts['X'], masked_ts['Y'], masked_ts['dates'],
+                design_str=masked_ts['design_str'].item(),
+                design_dict=masked_ts['design_dict'].item())
+    pixel = np.load(f)
+    assert set(pixel.files) == set(masked_ts.files)
+    for key in ('X', 'Y', 'dates'):
+        np.testing.assert_equal(pixel[key], masked_ts[key])
+    assert pixel['design_dict'].item() == masked_ts['design_dict'].item()
@@ -29,3 +29,23 @@ def test_distribute_jobs_sequential(nrow, njob):
 def test_distribute_jobs_sequential_onejob(nrow, njob):
     with pytest.raises(ValueError):
         utils.distribute_jobs(nrow, nrow, njob, interlaced=False)
+
+
+@pytest.mark.parametrize('date_format', ['%Y%j', '%Y%m%d', '%Y'])
+def test_ordinal2datefmt(date_format):
+    from datetime import datetime as dt
+    ordinal = np.array([723180, 730120, 730120, 735234, 724000])
+    answer = np.array([int(dt.fromordinal(d).strftime(date_format))
+                       for d in ordinal])
+    np.testing.assert_equal(utils.ordinal2datefmt(ordinal, date_format),
+                            answer)
+    np.testing.assert_equal(
+        utils.ordinal2datefmt(ordinal, date_format,
+                              first=ordinal.min() - 10,
+                              last=ordinal.max() + 10),
+        answer)
+
+
+def test_ordinal2datefmt_outside():
+    with pytest.raises(ValueError):
+        utils.ordinal2datefmt([723180, 730120], first=723181, last=730120)
@@ -1,11 +1,54 @@
 """ Decorator ``try_jit`` accelerates computation via Numba, when available
+
+Functions compiled in ``nopython`` mode are cached to disk so that the cost of
+compilation is paid once instead of once per process. The cache is stored
+in the ``__pycache__`` directory next to the source file or, if set, in the
+directory given by the ``NUMBA_CACHE_DIR`` environment variable (see
+:func:`set_cache_dir`).
+
+Kernels decorated with an ``aot`` signature can also be compiled ahead of
+time into the extension module ``yatsm._accel_aot`` using :func:`build_aot`
+(or ``python setup.py build_aot``). When this module is available, calls to
+these kernels will use the ahead of time compiled version if the argument
+types match the signature, falling back to the JIT compiled function
+otherwise.
+
+Time spent compiling (or loading from cache) each kernel is recorded in
+:data:`compile_times` and reported using :func:`log_compile_times`.
 """
+from collections import defaultdict
 from functools import wraps
+import importlib
+import inspect
 import logging
 import os
+import time
+
+import numpy as np
 
 logger = logging.getLogger('yatsm')
 
+#: str: Name of ahead of time compiled extension module within ``yatsm``
+AOT_MODULE = '_accel_aot'
+#: list: Modules containing kernels that are compiled ahead of time
+AOT_KERNEL_MODULES = [
+    'yatsm.regression.diagnostics',
+    'yatsm.regression.robust_fit'
+]
+
+#: dict: JIT compiled kernels created by ``try_jit`` (name: dispatcher)
+kernels = {}
+#: dict: Total time spent compiling, or loading from cache, each kernel
+compile_times = defaultdict(float)
+
+_aot_signatures = {}
+_aot_module = None
+_aot_dtypes = {
+    'f8': np.dtype(np.float64), 'f4': np.dtype(np.float32),
+    'i8': np.dtype(np.int64), 'i4': np.dtype(np.int32),
+    'u2': np.dtype(np.uint16), 'b1': np.dtype(np.bool_)
+}
+
 has_numba = True
 try:
     import numba as nb
@@ -59,11 +102,184 @@ def _doublewrap(f):
     return new_dec
 
 
+def set_cache_dir(cache_dir):
+    """ Set directory used to cache compiled kernels
+
+    Only kernels decorated after this function is called are affected, so
+    call before importing the modules that define them.
+
+    Args:
+        cache_dir (str): directory to store cached kernels
+
+    """
+    os.environ['NUMBA_CACHE_DIR'] = cache_dir
+    if has_numba:
+        nb.config.CACHE_DIR = cache_dir
+
+
+def log_compile_times(level=logging.DEBUG):
+    """ Log time spent compiling, or loading from cache, each kernel
+
+    Args:
+        level (int): logging level
+
+    """
+    for name in sorted(compile_times, key=compile_times.get, reverse=True):
+        stats = getattr(kernels.get(name), 'stats', None)
+        hits = sum(getattr(stats, 'cache_hits', {}).values())
+        misses = sum(getattr(stats, 'cache_misses', {}).values())
+        logger.log(level, 'Compiled %s in %.3fs (cache hits: %i, misses: %i)'
+                   % (name, compile_times[name], hits, misses))
+
+
+def _kernel_name(f):
+    return '%s.%s' % (f.__module__, f.__name__)
+
+
+def _time_compilation(name, dispatcher):
+    """ Record time spent compiling new specializations of ``dispatcher``
+    """
+    compile_for_args = getattr(dispatcher, '_compile_for_args', None)
+    if compile_for_args is None:
+        return
+
+    @wraps(compile_for_args)
+    def timed_compile_for_args(*args, **kwargs):
+        start = time.time()
+        try:
+            return compile_for_args(*args, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            compile_times[name] += elapsed
+            logger.debug('Compiled %s in %.3fs' % (name, elapsed))
+
+    try:
+        dispatcher._compile_for_args = timed_compile_for_args
+    except AttributeError:
+        pass
+
+
+def _aot_name(name):
+    return name.replace('.', '_')
+
+
+def _parse_aot_signature(signature):
+    """ Return data type and number of dimensions of each argument
+    """
+    args = signature[signature.index('(') + 1:signature.rindex(')')]
+    tokens, depth, token = [], 0, ''
+    for char in args:
+        depth += (char == '[') - (char == ']')
+        if char == ',' and depth == 0:
+            tokens.append(token)
+            token = ''
+        else:
+            token += char
+    if token.strip():
+        tokens.append(token)
+
+    return [(_aot_dtypes[t.split('[')[0].strip()], t.count(':'))
+            for t in tokens]
+
+
+def _find_aot(name):
+    """ Return ahead of time compiled kernel, if available
+    """
+    global _aot_module
+    if _aot_module is None:
+        try:
+            _aot_module = importlib.import_module('yatsm.' + AOT_MODULE)
+        except ImportError:
+            _aot_module = False
+    return getattr(_aot_module, _aot_name(name), None) if _aot_module else None
+
+
+class AOTKernel(object):
+    """ Call an ahead of time compiled kernel, falling back to ``func``
+
+    Ahead of time compiled kernels have one signature and do not accept
+    default or keyword arguments. Arguments are bound to the signature of the
+    original Python function before calling the kernel, and calls with
+    arguments that do not match the compiled signature are passed to
+    ``func``. Array arguments must match the data type and dimensions of
+    the signature exactly because compiled kernels do not check them.
+
+    Args:
+        aot_func (callable): ahead of time compiled kernel
+        func (callable): JIT compiled (or Python) function
+        py_func (callable): original Python function
+        signature (str): signature of ``aot_func``
+
+    """
+    def __init__(self, aot_func, func, py_func, signature):
+        self.aot_func = aot_func
+        self.func = func
+        self.py_func = py_func
+        self.signature = signature
+        self._arg_types = _parse_aot_signature(signature)
+        argspec = inspect.getargspec(py_func)
+        self._args = argspec.args
+        self._defaults = dict(zip(argspec.args[::-1],
+                                  (argspec.defaults or ())[::-1]))
+        self.__name__ = py_func.__name__
+        self.__doc__ = py_func.__doc__
+
+    def _bind(self, args, kwargs):
+        args = list(args)
+        for arg in self._args[len(args):]:
+            args.append(kwargs[arg] if arg in kwargs else self._defaults[arg])
+        return args
+
+    def _match(self, args):
+        for arg, (dtype, ndim) in zip(args, self._arg_types):
+            if ndim:
+                if not (isinstance(arg, np.ndarray) and arg.ndim == ndim and
+                        arg.dtype == dtype):
+                    return False
+            elif not np.isscalar(arg):
+                return False
+        return True
+
+    def __call__(self, *args, **kwargs):
+        try:
+            args = self._bind(args, kwargs)
+        except KeyError:
+            return self.func(*args, **kwargs)
+        if self._match(args):
+            return self.aot_func(*args)
+        return self.func(*args)
+
+
+def build_aot(output_dir=None):
+    """ Compile kernels with ``aot`` signatures into an extension module
+
+    Args:
+        output_dir (str): directory to write ``_accel_aot`` extension to
+            (default: the ``yatsm`` package directory)
+
+    """
+    from numba.pycc import CC
+
+    for module in AOT_KERNEL_MODULES:
+        importlib.import_module(module)
+
+    cc = CC(AOT_MODULE)
+    cc.output_dir = output_dir or os.path.dirname(os.path.abspath(__file__))
+    for name, (py_func, signature) in sorted(_aot_signatures.items()):
+        logger.info('Exporting %s with signature %s' % (name, signature))
+        cc.export(_aot_name(name), signature)(py_func)
+    cc.compile()
+
+
 @_doublewrap
 def try_jit(f, *args, **kwargs):
     """ Apply numba.jit to function ``f`` if Numba is available
 
     Accepts arguments to Numba jit function (signature, nopython, etc.).
+    Functions compiled in ``nopython`` mode are cached to disk unless
+    ``cache=False`` is given. The ``aot`` keyword argument registers a
+    signature used to compile the function ahead of time (see
+    :func:`build_aot`).
 
     Examples:
 
@@ -73,12 +289,32 @@ def try_jit(f, *args, **kwargs):
         @try_jit()
         @try_jit(nopython=True)
         @try_jit("float32[:](float32[:], float32[:])", nopython=True)
+        @try_jit(nopython=True, aot="f8(f8[:], f8[:])")
 
     """
+    name = _kernel_name(f)
+    aot_signature = kwargs.pop('aot', None)
+    if aot_signature:
+        _aot_signatures[name] = (f, aot_signature)
+
+    func = f
     if has_numba:
-        @wraps(f)
-        def wrap(*args, **kwargs):
-            return nb.jit(*args, **kwargs)
-        return wrap(f, *args, **kwargs)
-    else:
-        return f
+        if kwargs.get('nopython'):
+            kwargs.setdefault('cache', True)
+        try:
+            func = nb.jit(*args, **kwargs)(f)
+        except RuntimeError as e:
+            # Raised if functions cannot be cached (e.g., defined in a REPL)
+            if not kwargs.pop('cache', False):
+                raise
+            logger.debug('Not caching %s: %s' % (name, e))
+            func = nb.jit(*args, **kwargs)(f)
+        _time_compilation(name, func)
+        kernels[name] = func
+
+    if aot_signature:
+        aot_func = _find_aot(name)
+        if aot_func is not None:
+            return AOTKernel(aot_func, func, f, aot_signature)
+
+    return func
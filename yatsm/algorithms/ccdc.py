@@ -1,5 +1,6 @@
 from __future__ import print_function, division
 
+import bisect
 import logging
 import sys
 
@@ -8,26 +9,40 @@ import numpy as np
 import sklearn.linear_model
 
 from .yatsm import YATSM
-from ..accel import try_jit
 from ..errors import TSLengthException
 from ..masking import smooth_mask, multitemp_mask
-from ..regression.diagnostics import rmse
+from ..metrics import metrics
 
 # Setup
 logger = logging.getLogger('yatsm_algo')
 
 
-@try_jit(nopython=True)
-def _monitor_calc_scores(X, Y, here, scores, predictions, rmse,
-                         test_indices, min_rmse):
-    """ Calculate monitoring period scaled residuals
+def setup_test_indices_min_rmse(test_indices, min_rmse, n_series):
+    """ Return test indices and minimum RMSE of each series, with defaults
+
+    Args:
+        test_indices (np.ndarray): indices of series to test for change, or
+            None (or empty) to test all series
+        min_rmse (float or np.ndarray): minimum RMSE for all series or for
+            each series, or None to use the smallest positive float
+
+    Returns:
+        tuple (np.ndarray, np.ndarray): indices of series to test for change
+            and minimum RMSE of each series (``n_series``)
+
     """
-    for i in range(scores.shape[1]):
-        for i_b, b in enumerate(test_indices):
-            scores[i_b, i] = (
-                (Y[b, here + i] - predictions[i_b, i]) /
-                max(min_rmse[b], rmse[i_b])
-            )
+    # Setup test indices
+    if not np.any(np.asarray(test_indices)):
+        test_indices = np.arange(n_series)
+    # Setup minimum RMSE
+    if isinstance(min_rmse, (list, np.ndarray)):
+        min_rmse = np.asarray(min_rmse)
+    elif isinstance(min_rmse, (int, float)):
+        min_rmse = np.array([min_rmse] * n_series)
+    else:
+        min_rmse = np.array([sys.float_info.min] * n_series)
+
+    return test_indices, min_rmse
 
 
 class CCDCesque(YATSM):
@@ -70,10 +85,25 @@ class CCDCesque(YATSM):
             test but overrides the test criterion threshold. (default: False)
         idx_slope (int): if ``slope_test`` is enabled, provide index of ``X``
             containing slope term (default: 1)
+        warm_start (bool): initialize each fit of estimators supporting
+            ``warm_start`` (e.g., ``Lasso``) with the previous solution,
+            including solutions from previous pixels, and only fit from
+            scratch after a change is detected (default: False)
+        lazy_fit (bool): only fit models of bands not in ``test_indices``
+            when a segment's record is written (at a break or at the end of
+            the time series) using the observations of the last fit of the
+            tested bands, instead of at every model update (default: False)
+        stable_fast_path (bool): skip over monitoring periods between model
+            updates where no observation could be change or noise using one
+            vectorized test, which mostly benefits pixels that do not
+            change. Results are unchanged. Not used with ``dynamic_rmse``
+            (default: False)
 
 
     .. document private functions
     .. automethod:: _get_dynamic_rmse
+    .. automethod:: _get_doy_neighbors
+    .. automethod:: _get_residuals
     .. automethod:: _get_model_rmse
 
     """
@@ -88,7 +118,7 @@ class CCDCesque(YATSM):
                  retrain_time=365.25, screening='RLM', screening_crit=400.0,
                  remove_noise=True, green_band=1, swir1_band=4,
                  dynamic_rmse=False, slope_test=False, idx_slope=1,
-                 **kwargs):
+                 lazy_fit=False, stable_fast_path=False, **kwargs):
         # Parent sets up test_indices and lm
         super(CCDCesque, self).__init__(test_indices, estimator, **kwargs)
 
@@ -117,11 +147,15 @@ class CCDCesque(YATSM):
         if self.slope_test is True:
             self.slope_test = threshold
         self.idx_slope = idx_slope
+        self.lazy_fit = lazy_fit
+        self._record_template, self._record_template_key = None, None
 
         if dynamic_rmse:
             self.get_rmse = self._get_dynamic_rmse
         else:
             self.get_rmse = self._get_model_rmse
+        # RMSE must be constant between model updates to skip stable periods
+        self.stable_fast_path = stable_fast_path and not dynamic_rmse
 
     @property
     def record_template(self):
@@ -130,25 +164,37 @@ class CCDCesque(YATSM):
         Record template will set `px` and `py` if defined as class attributes.
         Otherwise `px` and `py` coordinates will default to 0.
 
+        The record datatype is only created when the number of features,
+        series, or the coordinate datatype change, and each call returns a
+        new copy of the template.
+
         Returns:
             numpy.ndarray: NumPy structured array containing a template of a
                 YATSM record
 
         """
-        record_template = np.zeros(1, dtype=[
+        key = (self.n_features, self.n_series, self.coord_dtype)
+        if self._record_template_key != key:
+            self._record_template = self._make_record_template()
+            self._record_template_key = key
+
+        record_template = self._record_template.copy()
+        record_template['px'] = self.px
+        record_template['py'] = self.py
+
+        return record_template
+
+    def _make_record_template(self):
+        return np.zeros(1, dtype=[
             ('start', 'i4'),
             ('end', 'i4'),
             ('break', 'i4'),
             ('coef', 'float32', (self.n_features, self.n_series)),
             ('rmse', 'float32', (self.n_series)),
             ('magnitude', 'float32', self.n_series),
-            ('px', 'u2'),
-            ('py', 'u2')
+            ('px', self.coord_dtype),
+            ('py', self.coord_dtype)
         ])
-        record_template['px'] = self.px
-        record_template['py'] = self.py
-
-        return record_template
 
 # HELPER PROPERTIES
     @property
@@ -171,6 +217,12 @@ class CCDCesque(YATSM):
         """ Determine if timeseries can monitor the future consecutive obs """
         return self.here < len(self.dates) - self.consecutive - 1
 
+    @property
+    def min_fit_obs(self):
+        """ Minimum number of valid observations required by :func:`~fit`
+        """
+        return self.min_obs + self.consecutive
+
 # MAIN LOOP
     def fit(self, X, Y, dates):
         """ Fit timeseries model
@@ -196,16 +248,8 @@ class CCDCesque(YATSM):
         self.n_features = X.shape[1]
         self.n_series = Y.shape[0]
 
-        # Setup test indices
-        if not np.any(np.asarray(self.test_indices)):
-            self.test_indices = np.arange(self.n_series)
-        # Setup minimum RMSE
-        if isinstance(self.min_rmse, (list, np.ndarray)):
-            self.min_rmse = np.asarray(self.min_rmse)
-        elif isinstance(self.min_rmse, (int, float)):
-            self.min_rmse = np.array([self.min_rmse] * self.n_series)
-        else:
-            self.min_rmse = np.array([sys.float_info.min] * self.n_series)
+        self.test_indices, self.min_rmse = setup_test_indices_min_rmse(
+            self.test_indices, self.min_rmse, self.n_series)
 
         # Set or reset state variables
         self.reset()
@@ -214,7 +258,7 @@ class CCDCesque(YATSM):
                                     len(dates))
 
         self.n_record = 0
-        self.record = np.copy(self.record_template)
+        self.record = self.record_template
 
         while self.running:
 
@@ -225,6 +269,9 @@ class CCDCesque(YATSM):
             while self.monitoring and self.can_monitor:
                 # Update model if required
                 self._update_model()
+                # Skip ahead to next observation that could be change or noise
+                if self.stable_fast_path and self._skip_stable():
+                    continue
                 # Perform monitoring check
                 self.monitor()
                 # Iterate forward
@@ -233,6 +280,7 @@ class CCDCesque(YATSM):
             self.here += 1
 
         # Update record for last model
+        self._fit_lazy_models()
         self.record[self.n_record]['start'] = self.dates[self.start]
         # Re-adjust end for consecutive, and for two ``self.here += 1`` calls
         offset = 1 + (1 if self.monitoring else 0)
@@ -259,6 +307,7 @@ class CCDCesque(YATSM):
         self._here = self.here
         self.trained_date = 0
         self.monitoring = False
+        self._lazy_XY = None
         # Populate prediction models
         if len(self.models) == 0:
             self.models = np.array([sklearn.clone(self.estimator) for
@@ -266,15 +315,27 @@ class CCDCesque(YATSM):
             for m in self.models:  # initialize additional attributes
                 m.rmse = 0.0
                 m.coef = np.zeros(self.X.shape[1])
-        # Training period test calculations
-        self.start_resid = np.zeros(len(self.test_indices))
-        self.end_resid = np.zeros(len(self.test_indices))
-        self.slope_resid = np.zeros(len(self.test_indices))
-        # Monitoring period calculations
-        self.predictions = np.zeros((len(self.test_indices), self.consecutive),
-                                    dtype=np.float64)
-        self.scores = np.zeros((len(self.test_indices), self.consecutive),
-                               dtype=np.float64)
+            self.cold_start()
+        # Training period test calculations and monitoring period scores,
+        # reused between fits if the number of tested bands is unchanged
+        n_test = len(self.test_indices)
+        if getattr(self, 'scores', None) is None or \
+                self.scores.shape != (n_test, self.consecutive):
+            self.start_resid = np.zeros(n_test)
+            self.end_resid = np.zeros(n_test)
+            self.slope_resid = np.zeros(n_test)
+            self.scores = np.zeros((n_test, self.consecutive),
+                                   dtype=np.float64)
+        else:
+            for a in (self.start_resid, self.end_resid, self.slope_resid,
+                      self.scores):
+                a.fill(0)
+        # Residuals of test indices for all observations since last fit
+        self._resid, self._resid_X = None, None
+        self._stable_resid, self._stable_mag = None, None
+        # Dynamic RMSE calculations
+        self._doy_keys, self._doy_dates = None, None
+        self._doy_start, self._doy_here = None, None
 
     def train(self):
         """ Train time series model if stability criteria are met
@@ -311,8 +372,12 @@ class CCDCesque(YATSM):
             logger.debug('Could not train - moving forward')
             return
 
+        metrics.count('train')
+
         # Check if screening was OK
-        if not self.screen_timeseries():
+        with metrics.timer('screening'):
+            screened = self.screen_timeseries()
+        if not screened:
             return
 
         # Test if we can still run after noise removal
@@ -324,6 +389,7 @@ class CCDCesque(YATSM):
         self.fit_models(self._X[self.start:self.here + 1, :],
                         self._Y[:, self.start:self.here + 1],
                         bands=self.test_indices)
+        self._resid = None
 
         # Ensure first and last points aren't unusual
         for i, b in enumerate(self.test_indices):
@@ -402,18 +468,18 @@ class CCDCesque(YATSM):
         the first of ``consecutive`` observations will be removed if first
         scaled residual is above ``threshold`` but not all ``consecutive``
         scaled residuals exceed ``threshold``.
-        """
-        _rmse = self.get_rmse()
 
-        for idx, model in enumerate(self.models[self.test_indices]):
-            self.predictions[idx, :] = model.predict(
-                self.X[self.here:self.here + self.consecutive, :])
+        Residuals are calculated for all observations once after each model
+        fit (see :func:`~_get_residuals`), so each monitoring step only
+        scales the residuals of the next ``consecutive`` observations.
+        """
+        metrics.count('monitor')
+        _rmse = np.maximum(self.min_rmse[self.test_indices], self.get_rmse())
 
-        _monitor_calc_scores(self.X, self.Y, self.here,
-                             self.scores,
-                             self.predictions, _rmse,
-                             self.test_indices,
-                             self.min_rmse)
+        np.divide(
+            self._get_residuals()[:, self.here:self.here + self.consecutive],
+            _rmse[:, np.newaxis],
+            out=self.scores)
 
         # Check for scores above critical value
         mag = np.linalg.norm(self.scores, axis=0)
@@ -422,6 +488,7 @@ class CCDCesque(YATSM):
             logger.debug('CHANGE DETECTED')
 
             # Update record for last model
+            self._fit_lazy_models()
             self.record[self.n_record]['start'] = self.dates[self.start]
             self.record[self.n_record]['end'] = self.dates[self.here]
             self.record[self.n_record]['break'] = self.dates[self.here + 1]
@@ -443,14 +510,22 @@ class CCDCesque(YATSM):
 
             self.trained_date = 0
             self.monitoring = False
+            # Don't start next segment from coefficients before the break
+            self.cold_start()
 
         elif mag[0] > self.threshold and self.remove_noise:
+            metrics.count('remove_noise')
             # Masking way of deleting is faster than `np.delete`
             m = np.ones(self.X.shape[0], dtype=bool)
             m[self.here] = False
+            keep_resid = self._resid is not None and self._resid_X is self.X
             self.X = self.X[m, :]
             self.Y = self.Y[:, m]
             self.dates = self.dates[m]
+            # Models are unchanged, so keep residuals of other observations
+            if keep_resid:
+                self._resid = self._resid[:, m]
+                self._resid_X = self.X
             self.here -= 1
 
 # MODEL FITTING UTILITIES
@@ -460,13 +535,74 @@ class CCDCesque(YATSM):
                 self.retrain_time):
             logger.debug('Monitoring - retraining (%s days since last)' %
                          str(self.dates[self.here] - self.trained_date))
-
-            # Fit timeseries models
-            self.fit_models(self.X[self.start:self.here + 1, :],
-                            self.Y[:, self.start:self.here + 1])
+            metrics.count('update_model')
+
+            # Fit timeseries models, deferring untested bands if lazy
+            fit = slice(self.start, self.here + 1)
+            if self.lazy_fit:
+                self.fit_models(self.X[fit, :], self.Y[:, fit],
+                                bands=self.test_indices)
+                # Keep views, since observations may be removed as noise
+                self._lazy_XY = (self.X[fit, :], self.Y[:, fit])
+            else:
+                self.fit_models(self.X[fit, :], self.Y[:, fit])
+            self._resid = None
 
             self.trained_date = self.dates[self.here]
 
+    def _skip_stable(self):
+        """ Skip monitoring of observations that cannot be change or noise
+
+        Until the next model update, the scaled residuals of every
+        observation are known from the current models. Monitoring only acts
+        on an observation if the magnitude of its scaled residuals is above
+        :paramref:`threshold <.CCDCesque.threshold>`, so observations before
+        the first such observation are skipped.
+
+        Returns:
+          bool: True if any observations were skipped
+
+        """
+        # Observations before the next model update that can be monitored
+        n = len(self.dates) - self.consecutive - 1
+        stop = self.here + np.searchsorted(
+            np.abs(self.dates[self.here:n] - self.trained_date),
+            self.retrain_time, side='right')
+        if stop <= self.here:
+            return False
+
+        # Magnitudes of scaled residuals change only with the residuals
+        resid = self._get_residuals()
+        if self._stable_resid is not resid:
+            _rmse = np.maximum(self.min_rmse[self.test_indices],
+                               self.get_rmse())
+            self._stable_mag = np.linalg.norm(resid / _rmse[:, np.newaxis],
+                                              axis=0)
+            self._stable_resid = resid
+
+        above = self._stable_mag[self.here:stop] > self.threshold
+        n_skip = np.argmax(above) if above.any() else above.size
+        if n_skip == 0:
+            return False
+
+        metrics.count('skip_stable', n_skip)
+        self.here += n_skip
+        return True
+
+    def _fit_lazy_models(self):
+        """ Fit models of untested bands deferred by ``lazy_fit``
+
+        Models are fit using the observations of the last update of the
+        tested bands' models, so records match those fit without
+        ``lazy_fit``.
+        """
+        if self._lazy_XY is None:
+            return
+        bands = np.setdiff1d(np.arange(self.n_series), self.test_indices)
+        if bands.size:
+            self.fit_models(*self._lazy_XY, bands=bands)
+        self._lazy_XY = None
+
 
 # MULTITEMP SCREENING
     def _screen_timeseries_LOWESS(self, span=None):
@@ -567,16 +703,69 @@ class CCDCesque(YATSM):
           numpy.ndarray: dynamic RMSE of each tested model
 
         """
-        # Indices of closest observations based on DOY
-        i_doy = np.argsort(
-            np.mod(self.dates[self.start:self.here] -
-                   self.dates[self.here + self.consecutive],
-                   self.ndays))[:self.min_obs]
-
-        _rmse = np.zeros(len(self.test_indices), np.float32)
-        _X = self.X.take(i_doy, axis=0)
-        for i_b, b in enumerate(self.test_indices):
-            m = self.models[b]
-            _rmse[i_b] = rmse(self.Y[b, :].take(i_doy), m.predict(_X))
+        # Indices of closest observations based on DOY. Note that these are
+        # offsets from `self.start`, which are used to index observations
+        # from the beginning of the time series for consistency with
+        # previous results
+        i_doy = self._get_doy_neighbors(
+            self.dates[self.here + self.consecutive]) - self.start
+
+        return np.sqrt(np.mean(self._get_residuals().take(i_doy, axis=1) ** 2,
+                               axis=1)).astype(np.float32)
+
+    def _get_residuals(self):
+        """ Return residuals of each tested model for all observations
+
+        Residuals only change when models are refit, so they are calculated
+        with one prediction for each tested model after each fit and reused
+        until the next fit. Residuals of observations removed as noise are
+        removed from the cached residuals.
+
+        Returns:
+          numpy.ndarray: residuals of each tested model (number of test
+            indices x number of observations)
+
+        """
+        if self._resid is None or self._resid_X is not self.X:
+            self._resid = np.array([
+                self.Y[b, :] - self.models[b].predict(self.X)
+                for b in self.test_indices
+            ])
+            self._resid_X = self.X
+        return self._resid
+
+    def _get_doy_neighbors(self, date):
+        """ Return indices of observations in model closest in DOY to `date`
+
+        Observations from `self.start` to `self.here` are kept in a list
+        sorted by day of year, with ties in observation order, that is
+        extended as `self.here` advances and is rebuilt only when the model
+        restarts or ``dates`` change. The `self.min_obs` observations that
+        follow ``date`` in the day of year, wrapping around the end of the
+        year, are found with a bisection search of this list.
+
+        Args:
+          date (int): ordinal date
+
+        Returns:
+          numpy.ndarray: indices of up to `self.min_obs` observations
+
+        """
+        if (self._doy_dates is not self.dates or
+                self._doy_start != self.start or self._doy_here > self.here):
+            doy = np.mod(self.dates[self.start:self.here], self.ndays)
+            self._doy_keys = sorted(zip(doy.tolist(),
+                                        range(self.start, self.here)))
+            self._doy_dates, self._doy_start = self.dates, self.start
+        else:
+            for i in range(self._doy_here, self.here):
+                bisect.insort(self._doy_keys,
+                              (np.mod(self.dates[i], self.ndays).item(), i))
+        self._doy_here = self.here
+
+        keys = self._doy_keys
+        first = bisect.bisect_left(keys, (np.mod(date, self.ndays).item(), ))
+        n = min(self.min_obs, len(keys))
 
-        return _rmse
+        return np.array([keys[i % len(keys)][1]
+                         for i in range(first, first + n)], dtype=np.intp)
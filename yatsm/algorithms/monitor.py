@@ -0,0 +1,147 @@
+""" Update saved CCDCesque model states with new observations
+
+Rerunning :class:`~yatsm.algorithms.ccdc.CCDCesque` over the entire archive
+to incorporate a few new acquisitions repeats the work of fitting every
+segment. Instead, the state of the last, unbroken segment of each pixel can
+be saved at the end of a run (see :func:`get_state`) and monitored for change
+using only new observations (see :func:`update_state`).
+
+The state of a pixel is:
+
+    * ``state``: the record of the last segment, which has no ``break``, with
+      its ``start``, ``end``, coefficients, and RMSE
+    * ``pending``: observations after the ``end`` of the segment that have
+      not yet been confirmed as stable or as a change because fewer than
+      ``consecutive`` observations follow them (see :func:`pending_dtype`)
+
+New observations are tested against the saved coefficients and RMSE using
+the same criteria as :func:`CCDCesque.monitor
+<yatsm.algorithms.ccdc.CCDCesque.monitor>`, but models are not retrained as
+stable observations are added. Once a change is detected, the pixel has no
+state until a new segment is trained (e.g., by ``yatsm line``).
+"""
+import logging
+
+import numpy as np
+
+from .ccdc import setup_test_indices_min_rmse
+
+logger = logging.getLogger('yatsm')
+
+
+def pending_dtype(n_features, n_series, coord_dtype='u2'):
+    """ Return NumPy structured array datatype of pending observations
+
+    Args:
+        n_features (int): number of features in the design matrix
+        n_series (int): number of series in ``Y``
+        coord_dtype (str): data type of pixel coordinates
+
+    Returns:
+        np.dtype: datatype of pending observations
+
+    """
+    return np.dtype([
+        ('px', coord_dtype),
+        ('date', 'i4'),
+        ('X', 'f8', (n_features, )),
+        ('Y', 'f8', (n_series, ))
+    ])
+
+
+def get_state(model):
+    """ Return the state of the last segment of a fitted CCDCesque model
+
+    Args:
+        model (yatsm.algorithms.ccdc.CCDCesque): model fit to a pixel
+
+    Returns:
+        tuple (np.ndarray, np.ndarray): the record of the last, unbroken
+            segment and observations pending after its ``end``, or None and
+            None if the time series ended without a segment being monitored
+
+    """
+    if model.record is None or len(model.record) == 0 or \
+            model.record[-1]['break'] != 0:
+        return None, None
+
+    state = model.record[-1:].copy()
+    pending = np.flatnonzero(model.dates > state['end'][0])
+
+    _pending = np.zeros(pending.size, dtype=pending_dtype(
+        model.X.shape[1], model.Y.shape[0], model.coord_dtype))
+    _pending['px'] = model.px
+    _pending['date'] = model.dates[pending]
+    _pending['X'] = model.X[pending, :]
+    _pending['Y'] = model.Y[:, pending].T
+
+    return state, _pending
+
+
+def update_state(model, state, pending, X, Y, dates):
+    """ Monitor new observations of a pixel using its saved model state
+
+    Args:
+        model (yatsm.algorithms.ccdc.CCDCesque): model with the parameters
+            (e.g., ``test_indices``, ``consecutive``, ``threshold``,
+            ``min_rmse``, and ``remove_noise``) used to fit the state
+        state (np.ndarray): record of the last segment (see
+            :func:`get_state`)
+        pending (np.ndarray): pending observations of the pixel (see
+            :func:`pending_dtype`)
+        X (numpy.ndarray): design matrix of new observations (number of
+            observations x number of features)
+        Y (numpy.ndarray): independent variable matrix of new observations
+            (number of series x number of observations)
+        dates (numpy.ndarray): ordinal dates of new observations, which must
+            all be after dates of ``pending`` observations
+
+    Returns:
+        tuple (np.ndarray, np.ndarray, np.ndarray): record of the segment if
+            a change is detected (otherwise empty), the updated state, and the
+            updated pending observations. The state and pending observations
+            are empty after a change
+
+    """
+    # Test the same series, with the same minimum RMSE, as the fit
+    test, min_rmse = setup_test_indices_min_rmse(model.test_indices,
+                                                 model.min_rmse, Y.shape[0])
+    consecutive, threshold = model.consecutive, model.threshold
+
+    _X = np.concatenate((pending['X'], X))
+    _Y = np.concatenate((pending['Y'].T, Y), axis=1)
+    _dates = np.concatenate((pending['date'], dates))
+
+    # Scale residuals of test indices by RMSE, as in ``CCDCesque.monitor``
+    rmse = np.maximum(min_rmse[test], state['rmse'][0][test])
+    coef = state['coef'][0][:, test].astype(np.float64)
+    scores = (_Y[test, :] - np.dot(_X, coef).T) / rmse[:, np.newaxis]
+    mag = np.linalg.norm(scores, axis=0)
+
+    state = state.copy()
+    record = state[:0]
+    index = np.arange(_dates.size)
+    here = 0
+    while here + consecutive <= index.size:
+        window = index[here:here + consecutive]
+        if np.all(mag[window] > threshold):
+            # Record dates as in ``CCDCesque.monitor``
+            record = state.copy()
+            record['end'] = _dates[window[0]]
+            record['break'] = _dates[index[min(here + 1, index.size - 1)]]
+            record['magnitude'][0, test] = np.mean(scores[:, window], axis=1)
+            return record, state[:0], pending[:0]
+        elif mag[window[0]] > threshold and model.remove_noise:
+            index = np.delete(index, here)
+        else:
+            state['end'] = _dates[window[0]]
+            here += 1
+
+    index = index[here:]
+    _pending = np.zeros(index.size, dtype=pending.dtype)
+    _pending['px'] = state['px'][0]
+    _pending['date'] = _dates[index]
+    _pending['X'] = _X[index, :]
+    _pending['Y'] = _Y[:, index].T
+
+    return record, state, _pending
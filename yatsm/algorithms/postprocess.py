@@ -8,7 +8,6 @@ import logging
 import numpy as np
 import numpy.lib.recfunctions as nprf
 import scipy.stats
-import statsmodels.api as sm
 
 from ..regression.diagnostics import rmse
 from ..utils import date2index
@@ -155,6 +154,9 @@ def omission_test(model, crit=0.05, behavior='ANY', indices=None):
             True indicates omitted break point
 
     """
+    # statsmodels is slow to import and only needed here
+    import statsmodels.api as sm
+
     if behavior.lower() not in ['any', 'all']:
         raise ValueError('`behavior` must be "any" or "all"')
 
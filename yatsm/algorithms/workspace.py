@@ -0,0 +1,81 @@
+""" Reusable buffers for preprocessing the pixels of a line
+
+Pixels within a line share the same design matrix and dates and differ only
+in which observations are valid. A :class:`Workspace` converts the design
+matrix to ``float64`` once and is sized for all observations, so each pixel
+is preprocessed into the same buffers and algorithms are given views of them
+instead of newly allocated arrays.
+"""
+import numpy as np
+
+
+class Workspace(object):
+    """ Buffers for preprocessed observations of pixels sharing ``X``
+
+    Views returned by :func:`~take` are only valid until the next call, so
+    results that must outlive a pixel (e.g., records) must not reference
+    them.
+
+    Args:
+        X (numpy.ndarray): design matrix for all observations (number of
+            observations x number of features)
+        dates (numpy.ndarray): ordinal dates for all observations
+        n_series (int): maximum number of series in preprocessed ``Y``
+
+    Attributes:
+        X (numpy.ndarray): ``float64`` design matrix for all observations
+        dates (numpy.ndarray): ordinal dates for all observations
+
+    """
+    def __init__(self, X, dates, n_series):
+        self.X = np.asarray(X, dtype=np.float64)
+        self.dates = np.asarray(dates)
+        if self.X.shape[0] != self.dates.size:
+            raise ValueError('X and dates must have same number of '
+                             'observations')
+        n_obs = self.dates.size
+
+        self._X = np.empty_like(self.X)
+        self._Y = np.empty(n_series * n_obs, dtype=np.float64)
+        self._dates = np.empty_like(self.dates)
+        self._series = np.empty(n_obs, dtype=np.float64)
+
+    def take(self, valid, Y, bands):
+        """ Return views of ``X``, ``Y``, and dates for valid observations
+
+        Args:
+            valid (numpy.ndarray): boolean mask of valid observations
+            Y (numpy.ndarray): independent variable matrix for all
+                observations (number of bands x number of observations)
+            bands (iterable): indices of bands of ``Y`` to return
+
+        Returns:
+            tuple (numpy.ndarray, numpy.ndarray, numpy.ndarray): ``float64``
+                design matrix, ``float64`` independent variable matrix
+                (number of ``bands`` x number of valid observations), and
+                dates of valid observations
+
+        """
+        index = np.flatnonzero(valid)
+        n = index.size
+        n_series = len(bands)
+        if n_series * self.dates.size > self._Y.size:
+            raise ValueError('Workspace is too small for %i series' %
+                             n_series)
+
+        X = self._X[:n]
+        np.take(self.X, index, axis=0, out=X, mode='clip')
+        dates = self._dates[:n]
+        np.take(self.dates, index, out=dates, mode='clip')
+
+        # Assignment converts into ``float64`` without a temporary copy, but
+        # ``np.take`` requires an output of the same type as ``Y``
+        if self._series.dtype != Y.dtype:
+            self._series = np.empty(self.dates.size, dtype=Y.dtype)
+        series = self._series[:n]
+        _Y = self._Y[:n_series * n].reshape(n_series, n)
+        for i, b in enumerate(bands):
+            np.take(Y[b], index, out=series, mode='clip')
+            _Y[i] = series
+
+        return X, _Y, dates
@@ -1,13 +1,13 @@
 """ Yet Another TimeSeries Model baseclass
 """
 import numpy as np
-import patsy
 import sklearn
 import sklearn.linear_model
 
 from .._cyprep import get_valid_mask
+from ..metrics import metrics
+from ..regression.design import get_design_matrix
 from ..regression.diagnostics import rmse
-from ..regression.transforms import harm  # noqa
 
 
 class YATSM(object):
@@ -61,6 +61,12 @@ class YATSM(object):
         px (int): pixel X location or index
         n_features (int): number of coefficients in ``X`` design matrix
         py (int): pixel Y location or index
+        coord_dtype (str): NumPy data type of ``px`` and ``py`` in the record
+            (default: ``u2``). Use ``u4`` for images wider or taller than
+            65535 pixels
+        warm_start (bool): initialize fits of estimators supporting
+            ``warm_start`` (e.g., ``Lasso``) with the previous solution for
+            each band, until :func:`~cold_start` is called (default: False)
 
     """
 
@@ -80,6 +86,9 @@ class YATSM(object):
         self.n_series, self.n_features = 0, 0
         self.px = kwargs.get('px', 0)
         self.py = kwargs.get('py', 0)
+        self.coord_dtype = kwargs.get('coord_dtype', 'u2')
+        self.warm_start = kwargs.get('warm_start', False)
+        self._warm = None
 
     @property
     def record_template(self):
@@ -99,14 +108,26 @@ class YATSM(object):
             ('break', 'i4'),
             ('coef', 'float32', (self.n_coef, self.n_series)),
             ('rmse', 'float32', (self.n_series)),
-            ('px', 'u2'),
-            ('py', 'u2')
+            ('px', self.coord_dtype),
+            ('py', self.coord_dtype)
         ])
         record_template['px'] = self.px
         record_template['py'] = self.py
 
         return record_template
 
+    @property
+    def min_fit_obs(self):
+        """ Minimum number of valid observations required by :func:`~fit`
+
+        Pixels with fewer valid observations (see :func:`~count_valid`) can be
+        skipped without being preprocessed or fit.
+
+        Returns:
+            int: minimum number of valid observations
+        """
+        return 0
+
 # SETUP & PREPROCESSING
     def setup(self, df, **config):
         """ Setup model for input dataset and (optionally) return design matrix
@@ -120,10 +141,12 @@ class YATSM(object):
         Returns:
             numpy.ndarray or None: return design matrix if used by algorithm
         """
-        X = patsy.dmatrix(config['YATSM']['design_matrix'], data=df)
+        cache_dir = config.get('dataset', {}).get('output')
+        X = get_design_matrix(config['YATSM']['design_matrix'], df,
+                              cache_dir=cache_dir)
         return X
 
-    def preprocess(self, X, Y, dates, **config):
+    def preprocess(self, X, Y, dates, workspace=None, **config):
         """ Preprocess a unit area of data (e.g., pixel, segment, etc.)
 
         Args:
@@ -132,6 +155,10 @@ class YATSM(object):
             Y (numpy.ndarray): independent variable matrix (number of series x
                 number of observations)
             dates (numpy.ndarray): ordinal dates for each observation in X/Y
+            workspace (yatsm.algorithms.workspace.Workspace): if provided,
+                return views of preprocessed data in ``workspace`` buffers
+                instead of new arrays. The design matrix and dates of the
+                ``workspace`` are used instead of ``X`` and ``dates``
             config (dict): YATSM configuration dictionary from user, including
                 'dataset' and 'YATSM' sub-configurations
 
@@ -140,12 +167,16 @@ class YATSM(object):
         valid = get_valid_mask(
             Y,
             config['dataset']['min_values'],
-            config['dataset']['max_values']).astype(bool)
+            config['dataset']['max_values']).view(np.bool_)
         # Apply mask band
         idx_mask = config['dataset']['mask_band'] - 1
-        valid *= np.in1d(Y.take(idx_mask, axis=0),
+        valid &= np.in1d(Y[idx_mask, :],
                          config['dataset']['mask_values'],
-                         invert=True).astype(np.bool)
+                         invert=True)
+
+        if workspace is not None:
+            bands = [b for b in range(Y.shape[0]) if b != idx_mask]
+            return workspace.take(valid, Y, bands)
 
         Y = np.delete(Y, idx_mask, axis=0)[:, valid]
         X = X[valid, :]
@@ -153,6 +184,37 @@ class YATSM(object):
 
         return X, Y, dates
 
+    def count_valid(self, Y, **config):
+        """ Count valid observations of many unit areas at once
+
+        Observations are valid using the same criteria as
+        :func:`~preprocess`, but are evaluated for an entire block of data
+        (e.g., all pixels within a line) in one step.
+
+        Args:
+            Y (numpy.ndarray): independent variable matrix (number of series x
+                number of observations x number of unit areas)
+            config (dict): YATSM configuration dictionary from user, including
+                'dataset' and 'YATSM' sub-configurations
+
+        Returns:
+            numpy.ndarray: number of valid observations of each unit area
+                (``Y.shape[2:]``)
+
+        """
+        mins = config['dataset']['min_values']
+        maxes = config['dataset']['max_values']
+        idx_mask = config['dataset']['mask_band'] - 1
+
+        # Accumulate band by band to avoid a mask the size of ``Y``
+        valid = np.in1d(Y[idx_mask], config['dataset']['mask_values'],
+                        invert=True).reshape(Y.shape[1:])
+        for b in range(Y.shape[0]):
+            valid &= Y[b] >= mins[b]
+            valid &= Y[b] <= maxes[b]
+
+        return valid.sum(axis=0)
+
 # TIMESERIES ENSEMBLE FIT/PREDICT
     def fit(self, X, Y, dates):
         """ Fit timeseries model
@@ -187,12 +249,22 @@ class YATSM(object):
         """
         if bands is None:
             bands = np.arange(self.n_series)
+        metrics.count('fit_models')
+
+        warm_start = (self.warm_start and
+                      hasattr(self.estimator, 'warm_start'))
+        if warm_start and self._warm is None:
+            self.cold_start()
 
         for b in bands:
             y = Y[b, :]
 
             model = self.models[b]
+            if warm_start:
+                model.warm_start = self._warm[b]
             model.fit(X, y, **self.estimator_fit)
+            if warm_start:
+                self._warm[b] = True
 
             # Add in RMSE calculation
             model.rmse = rmse(y, model.predict(X))
@@ -201,6 +273,24 @@ class YATSM(object):
             model.coef = model.coef_.copy()
             model.coef[0] += model.intercept_
 
+    def cold_start(self, bands=None):
+        """ Fit models for ``bands`` from scratch the next time they are fit
+
+        Only used if :attr:`warm_start` is enabled. Otherwise, models are
+        always fit from scratch.
+
+        Args:
+            bands (iterable): Subset of bands to cold start. If None are
+                provided, cold start all bands
+
+        """
+        if self._warm is None or self._warm.size != len(self.models):
+            self._warm = np.zeros(len(self.models), dtype=bool)
+        if bands is None:
+            self._warm[:] = False
+        else:
+            self._warm[bands] = False
+
     def predict(self, X, dates, series=None):
         """ Return a 2D NumPy array of y-hat predictions for a given X
 
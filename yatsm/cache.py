@@ -7,6 +7,7 @@ import numpy as np
 from log_yatsm import logger
 
 _image_ID_str = 'image_IDs'
+_bands_str = 'bands'
 
 
 def get_line_cache_name(dataset_config, n_images, row, nbands):
@@ -97,18 +98,25 @@ def test_cache(dataset_config):
     return read_cache, write_cache
 
 
-def read_cache_file(cache_filename, image_IDs=None):
+def read_cache_file(cache_filename, image_IDs=None, bands=None):
     """ Returns image data from a cache file
 
     If ``image_IDs`` is not None this function will try to ensure data from
     cache file come from the list of image IDs provided. If cache file does not
     contain a list of image IDs, it will skip the check and return cache data.
 
+    If ``bands`` is not None this function will ensure data from cache file
+    contain the bands provided. Cache files that do not record which bands
+    they contain are assumed to contain all bands.
+
     Args:
         cache_filename (str): cache filename
         image_IDs (iterable, optional): list of image IDs corresponding to data
             in cache file. If not specified, function will not check for
             correspondence (default: None)
+        bands (iterable, optional): indices of bands (indexed on 0)
+            corresponding to data in cache file. If not specified, function
+            will not check for correspondence (default: None)
 
     Returns:
         np.ndarray, or None: Return Y as np.ndarray if possible and if the
@@ -127,10 +135,20 @@ def read_cache_file(cache_filename, image_IDs=None):
                            'specified'.format(f=cache_filename))
             return None
 
+    if bands is not None:
+        if _bands_str in cache.files:
+            cache_bands = cache[_bands_str]
+        else:
+            cache_bands = np.arange(cache['Y'].shape[0])
+        if not np.array_equal(bands, cache_bands):
+            logger.warning('Cache file data in {f} do not match bands '
+                           'specified'.format(f=cache_filename))
+            return None
+
     return cache['Y']
 
 
-def write_cache_file(cache_filename, Y, image_IDs):
+def write_cache_file(cache_filename, Y, image_IDs, bands=None):
     """ Writes data to a cache file using np.savez_compressed
 
     Args:
@@ -138,10 +156,15 @@ def write_cache_file(cache_filename, Y, image_IDs):
         Y (np.ndarray): data to write to cache file
         image_IDs (iterable): list of image IDs corresponding to data in cache
             file. If not specified, function will not check for correspondence
+        bands (iterable, optional): indices of bands (indexed on 0)
+            corresponding to data in cache file. If not specified, data are
+            assumed to contain all bands (default: None)
 
     """
+    if bands is None:
+        bands = np.arange(Y.shape[0])
     np.savez_compressed(cache_filename, **{
-        'Y': Y, _image_ID_str: image_IDs
+        'Y': Y, _image_ID_str: image_IDs, _bands_str: np.asarray(bands)
     })
 
 
@@ -187,6 +210,8 @@ def update_cache_file(images, image_IDs,
     old_IDs = old_cache[_image_ID_str]
     old_Y = old_cache['Y']
     nband, _, ncol = old_Y.shape
+    bands = (old_cache[_bands_str] if _bands_str in old_cache.files
+             else None)
 
     # Create new Y and add in values retained from old cache
     new_Y = np.zeros((nband, image_IDs.size, ncol),
@@ -225,11 +250,11 @@ def update_cache_file(images, image_IDs,
     if insert.size > 0:
         logger.debug('Inserting {n} new images into cache'.format(
             n=insert.size))
-        insert_Y = reader.read_row(images[insert], line)
+        insert_Y = reader.read_row(images[insert], line, bands=bands)
         new_Y[:, insert, :] = insert_Y
         new_IDs[insert] = image_IDs[insert]
 
     np.testing.assert_equal(new_IDs, image_IDs)
 
     # Save
-    write_cache_file(new_cache_filename, new_Y, image_IDs)
+    write_cache_file(new_cache_filename, new_Y, image_IDs, bands=bands)
@@ -5,6 +5,7 @@ using YATSM change detection.
 """
 import logging
 
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 import yaml
 
@@ -64,3 +65,26 @@ def cfg_to_algorithm(config_file):
         raise
 
     return sklearn_algo, config
+
+
+def record_features(rec):
+    """ Return classification features for each record
+
+    Features include the coefficients, with the intercept rescaled to the
+    middle of each segment, and the RMSE of each band.
+
+    Args:
+        rec (np.ndarray): YATSM record
+
+    Returns:
+        np.ndarray: 2D array of features (n_record x n_feature)
+
+    """
+    # Rescale intercept term
+    coef = rec['coef'].copy()  # copy so we don't transform npz coef
+    coef[:, 0, :] = (coef[:, 0, :] + coef[:, 1, :] *
+                     ((rec['start'] + rec['end']) / 2.0)[:, np.newaxis])
+
+    # Include RMSE for full X matrix
+    newdim = (coef.shape[0], coef.shape[1] * coef.shape[2])
+    return np.hstack((coef.reshape(newdim), rec['rmse']))
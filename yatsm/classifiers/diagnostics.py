@@ -3,29 +3,37 @@ import logging
 import numpy as np
 import scipy.ndimage
 
+from sklearn.base import clone
+from sklearn.externals.joblib import Parallel, delayed
 from sklearn.utils import check_random_state
 # from sklearn.cross_validation import KFold, StratifiedKFold
 
 logger = logging.getLogger('yatsm')
 
 
-def kfold_scores(X, y, algo, kf_generator):
+def kfold_scores(X, y, algo, kf_generator, n_jobs=1):
     """ Performs KFold crossvalidation and reports mean/std of scores
 
+    Each fold is fit using a copy of ``algo``, so folds may be fit in
+    parallel and ``algo`` itself is not modified.
+
     Args:
       X (np.ndarray): X feature input used in classification
       y (np.ndarray): y labeled examples
       algo (sklean classifier): classifier used from scikit-learn
       kf_generator (sklearn crossvalidation generator): generator for indices
         used in crossvalidation
+      n_jobs (int, optional): number of processes fitting folds. Use -1 for
+        one process per CPU (default: 1)
 
     Returns:
       (mean, std): mean and standard deviation of crossvalidation scores
 
     """
-    scores = np.zeros(kf_generator.n_folds)
-    for i, (train, test) in enumerate(kf_generator):
-        scores[i] = algo.fit(X[train, :], y[train]).score(X[test, :], y[test])
+    scores = np.array(Parallel(n_jobs=n_jobs)(
+        delayed(_fit_score)(clone(algo), X, y, train, test)
+        for train, test in kf_generator
+    ))
 
     logger.info('scores: {0}'.format(scores))
     logger.info('score mean/std: {0}/{1}'.format(scores.mean(), scores.std()))
@@ -33,6 +41,12 @@ def kfold_scores(X, y, algo, kf_generator):
     return scores.mean(), scores.std()
 
 
+def _fit_score(algo, X, y, train, test):
+    """ Return score of ``algo`` on test data after fitting to training data
+    """
+    return algo.fit(X[train, :], y[train]).score(X[test, :], y[test])
+
+
 class SpatialKFold(object):
     """ Spatial cross validation iterator
 
@@ -88,14 +102,14 @@ class SpatialKFold(object):
         fold_sizes[:self.n % self.n_folds] += 1
         current = 0
 
-        ind = np.arange(self.y.size)
-
         for fold_size in fold_sizes:
             start, stop = current, current + fold_size
 
-            test_i = self._labels_to_indices(self.labels[start:stop])
+            test = self._labels_to_indices(self.labels[start:stop])
+            train_i = np.ones(self.y.size, dtype=np.bool)
+            train_i[test] = False
 
-            yield ind[test_i], ind[~test_i]
+            yield np.flatnonzero(train_i), test
             current = stop
 
     def _recreate_labels(self):
@@ -112,13 +126,20 @@ class SpatialKFold(object):
         if self.shuffle:
             self.rng.shuffle(self.labels)
 
-        self.indices = []
+        # Index samples within each labeled region once, instead of searching
+        # the labeled image for each fold
+        sample_labels = self.labeled[self.row, self.col]
+        order = np.argsort(sample_labels, kind='mergesort')
+        _labels, splits = np.unique(sample_labels[order], return_index=True)
+        self.indices = dict(zip(_labels, np.split(order, splits[1:])))
 
     def _labels_to_indices(self, labels):
-        lab_row, lab_col = np.where(np.in1d(
-            self.labeled, labels).reshape(self.labeled.shape))
-        return np.logical_and(np.in1d(self.row, lab_row),
-                              np.in1d(self.col, lab_col))
+        """ Internal method to return sorted indices of samples in regions
+        """
+        indices = [self.indices[l] for l in labels]
+        if not indices:
+            return np.zeros(0, dtype=np.intp)
+        return np.sort(np.concatenate(indices))
 
 
 class SpatialKFold_ROI(object):
@@ -48,6 +48,10 @@ def cache(ctx, config, job_number, total_jobs, update_pattern, interlace):
     if cfg['dataset']['use_bip_reader']:
         logger.debug('Reading in data from disk using BIP reader')
         image_reader = io.bip_reader
+    elif cfg['dataset'].get('use_vrt_reader'):
+        logger.debug('Reading in data from disk using VRT reader')
+        image_reader = io.vrt_reader
+        image_reader.vrt_dir = cfg['dataset'].get('cache_line_dir')
     else:
         logger.debug('Reading in data from disk using GDAL')
         image_reader = io.gdal_reader
@@ -98,14 +102,7 @@ def cache(ctx, config, job_number, total_jobs, update_pattern, interlace):
                               update, cache_filename,
                               job_line, image_reader)
         else:
-            if cfg['dataset']['use_bip_reader']:
-                # Use BIP reader
-                logger.debug('Reading in data from disk using BIP reader')
-                Y = io.bip_reader.read_row(df['filename'], job_line)
-            else:
-                # Read in data just using GDAL
-                logger.debug('Reading in data from disk using GDAL')
-                Y = io.gdal_reader.read_row(df['filename'], job_line)
+            Y = image_reader.read_row(df['filename'], job_line)
             write_cache_file(cache_filename, Y, df['image_IDs'])
 
         logger.debug('Took {s}s to cache the data'.format(
@@ -3,22 +3,29 @@
 from __future__ import division, print_function
 
 import logging
+import multiprocessing
 import os
 import time
 
 import click
 import numpy as np
-import numpy.lib.recfunctions as nprfn
 import six
 from sklearn.externals import joblib
 
 from . import options
+from ..classifiers import record_features
 from ..config_parser import parse_config_file
 from ..utils import distribute_jobs, get_output_name, csvfile_to_dataframe
 from ..io import get_image_attribute
+from ..io.results import (classification_dtype, classification_filename,
+                          load_record, merge_classification,
+                          save_classification)
 
 logger = logging.getLogger('yatsm')
 
+# Classifier loaded by each worker process when classifying in parallel
+_classifier = None
+
 
 @click.command(short_help='Classify entire images using trained algorithm')
 @options.arg_config_file
@@ -28,35 +35,63 @@ logger = logging.getLogger('yatsm')
 @options.arg_total_jobs
 @click.option('--resume', is_flag=True,
               help="Resume classification (don't overwrite)")
+@click.option('--in-place', is_flag=True,
+              help='Save classification into result files instead of '
+                   'separate classification files')
+@click.option('--batch', metavar='<lines>', default=10, type=int,
+              show_default=True, callback=options.valid_int_gt_zero,
+              help='Number of lines to classify together')
+@click.option('--processes', metavar='<processes>', default=1, type=int,
+              show_default=True, callback=options.valid_int_gt_zero,
+              help='Number of processes classifying batches of lines')
 @click.pass_context
-def classify(ctx, config, algo, job_number, total_jobs, resume):
+def classify(ctx, config, algo, job_number, total_jobs, resume, in_place,
+             batch, processes):
     cfg = parse_config_file(config)
 
     df = csvfile_to_dataframe(cfg['dataset']['input_file'],
                               cfg['dataset']['date_format'])
     nrow = get_image_attribute(df['filename'][0])[0]
 
-    classifier = joblib.load(algo)
-
     # Split into lines and classify
     job_lines = distribute_jobs(job_number, total_jobs, nrow)
     logger.debug('Responsible for lines: {l}'.format(l=job_lines))
 
-    start_time = time.time()
-    logger.info('Starting to run lines')
+    filenames = []
     for job_line in job_lines:
         filename = get_output_name(cfg['dataset'], job_line)
         if not os.path.exists(filename):
             logger.warning('No model result found for line {l} '
                            '(file {f})'.format(l=job_line, f=filename))
-            pass
+            continue
 
-        if resume and try_resume(filename):
+        if resume and try_resume(filename, in_place=in_place):
             logger.debug('Already processed line {l}'.format(l=job_line))
             continue
 
-        logger.debug('Classifying line {l}'.format(l=job_line))
-        classify_line(filename, classifier)
+        filenames.append(filename)
+
+    batches = [filenames[i:i + batch]
+               for i in six.moves.range(0, len(filenames), batch)]
+
+    start_time = time.time()
+    logger.info('Starting to run lines')
+    if processes > 1:
+        pool = multiprocessing.Pool(processes, initializer=_init_worker,
+                                    initargs=(algo, ))
+        try:
+            for _filenames in pool.imap_unordered(
+                    _classify_lines_worker,
+                    [(_batch, in_place) for _batch in batches]):
+                logger.debug('Classified {n} lines'.format(n=len(_filenames)))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        classifier = joblib.load(algo)
+        for _batch in batches:
+            logger.debug('Classifying {n} lines'.format(n=len(_batch)))
+            classify_lines(_batch, classifier, in_place=in_place)
 
     logger.debug('Completed {n} lines in {m} minutes'.format(
         n=len(job_lines),
@@ -64,17 +99,33 @@ def classify(ctx, config, algo, job_number, total_jobs, resume):
     )
 
 
-def try_resume(filename):
+def _init_worker(algo):
+    global _classifier
+    _classifier = joblib.load(algo)
+
+
+def _classify_lines_worker(args):
+    filenames, in_place = args
+    classify_lines(filenames, _classifier, in_place=in_place)
+    return filenames
+
+
+def try_resume(filename, in_place=False):
     """ Return True/False if dataset has already been classified
 
     Args:
         filename (str): filename of the result to be checked
+        in_place (bool): only check for classification saved within the
+            result file
 
     Returns:
-        bool: If the `npz` file exists and contains a file 'class', this test
-            will return True, else False.
+        bool: True if classification results exist for ``filename``, or if
+            the record in ``filename`` contains a field 'class', else False
 
     """
+    if not in_place and os.path.isfile(classification_filename(filename)):
+        return True
+
     try:
         z = np.load(filename)
     except:
@@ -86,56 +137,64 @@ def try_resume(filename):
     return True
 
 
-def classify_line(filename, classifier):
-    """ Use `classifier` to classify data stored in `filename`
+def classify_lines(filenames, classifier, in_place=False):
+    """ Use `classifier` to classify data stored in `filenames` together
 
     Args:
-        filename (str): filename of stored results
+        filenames (list): filenames of stored results
         classifier (sklearn classifier): pre-trained classifier
+        in_place (bool): save classification into the result files instead
+            of separate classification files (see
+            :func:`yatsm.io.results.save_classification`)
 
     """
-    z = np.load(filename)
-    rec = z['record']
+    n_records, X = [], []
+    for filename in filenames:
+        rec = load_record(filename, classification=False)
+        n_records.append(rec.shape[0])
+        if rec.shape[0] == 0:
+            logger.debug('No records in {f}'.format(f=filename))
+            continue
+        X.append(record_features(rec))
 
-    if rec.shape[0] == 0:
-        logger.debug('No records in {f}. Continuing'.format(f=filename))
-        return
+    # Create output and classify
+    classes = classifier.classes_
+    classified = np.zeros(sum(n_records),
+                          dtype=classification_dtype(classes.size))
+    if X:
+        proba = classifier.predict_proba(np.vstack(X))
+        classified['class'] = classes[proba.argmax(axis=1)]
+        classified['class_proba'] = proba
+
+    splits = np.cumsum(n_records)[:-1]
+    for filename, _classified in zip(filenames,
+                                     np.split(classified, splits)):
+        if not in_place:
+            save_classification(filename, _classified, classes)
+        elif _classified.size:
+            _save_in_place(filename, _classified, classes)
+
+
+def classify_line(filename, classifier, in_place=False):
+    """ Use `classifier` to classify data stored in `filename`
 
-    # Rescale intercept term
-    coef = rec['coef'].copy()  # copy so we don't transform npz coef
-    coef[:, 0, :] = (coef[:, 0, :] + coef[:, 1, :] *
-                     ((rec['start'] + rec['end']) / 2.0)[:, np.newaxis])
+    Args:
+        filename (str): filename of stored results
+        classifier (sklearn classifier): pre-trained classifier
+        in_place (bool): save classification into the result file instead
+            of a separate classification file
 
-    # Include RMSE for full X matrix
-    newdim = (coef.shape[0], coef.shape[1] * coef.shape[2])
-    X = np.hstack((coef.reshape(newdim), rec['rmse']))
+    """
+    classify_lines([filename], classifier, in_place=in_place)
 
-    # Create output and classify
-    classes = classifier.classes_
-    classified = np.zeros(rec.shape[0], dtype=[
-        ('class', 'u2'),
-        ('class_proba', 'float32', classes.size)
-    ])
-    classified['class'] = classifier.predict(X)
-    classified['class_proba'] = classifier.predict_proba(X)
-
-    # Replace with new classification if exists, or add by merging
-    if ('class' in rec.dtype.names and 'class_proba' in rec.dtype.names and
-            rec['class_proba'].shape[1] == classes.size):
-        rec['class'] = classified['class']
-        rec['class_proba'] = classified['class_proba']
-    else:
-        # Drop incompatible classified results if needed
-        # e.g., if the number of classes changed
-        if 'class' in rec.dtype.names and 'class_proba' in rec.dtype.names:
-            rec = nprfn.drop_fields(rec, ['class', 'class_proba'])
-        rec = nprfn.merge_arrays((rec, classified), flatten=True)
 
+def _save_in_place(filename, classified, classes):
+    """ Add or replace classification within records of a result file
+    """
     # Create dict for re-saving `npz` file (only way to append)
-    out = {}
-    for k, v in six.iteritems(z):
-        out[k] = v
+    with np.load(filename) as z:
+        out = dict((k, z[k]) for k in z.files)
     out['classes'] = classes
-    out['record'] = rec
+    out['record'] = merge_classification(out['record'], classified)
 
     np.savez(filename, **out)
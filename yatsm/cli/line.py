@@ -1,5 +1,7 @@
 """ Command line interface for running YATSM on image lines """
 import copy
+import cProfile
+import functools
 import logging
 import os
 import time
@@ -11,15 +13,17 @@ from . import options
 from ..cache import test_cache
 from ..config_parser import parse_config_file
 from ..errors import TSLengthException
-from ..io import get_image_attribute, mkdir_p, read_line
+from ..io import (ResultWriter, checkpoint_filename, get_image_attribute,
+                  mkdir_p, read_image, read_line, save_results)
+from ..io.results import (RECORD_SCHEMA_KEY, encode_record, is_default_schema,
+                          parse_record_schema, state_filename)
+from ..metrics import (metrics, pixel_stats_dtype, update_pixel_stats,
+                       write_metrics, write_pixel)
 from ..utils import (distribute_jobs, get_output_name, get_image_IDs,
                      csvfile_to_dataframe)
-from ..algorithms import postprocess
-try:
-    from ..phenology import longtermmean as pheno
-except ImportError as e:
-    pheno = None
-    pheno_exception = e.message
+from ..algorithms import CCDCesque, postprocess
+from ..algorithms.monitor import get_state
+from ..algorithms.workspace import Workspace
 from ..version import __version__
 
 logger = logging.getLogger('yatsm')
@@ -32,20 +36,50 @@ logger = logging.getLogger('yatsm')
 @click.option('--check_cache', is_flag=True,
               help='Check that cache file contains matching data')
 @click.option('--resume', is_flag=True,
-              help='Do not overwrite preexisting results')
+              help='Do not overwrite preexisting results, and continue lines '
+                   'from checkpoints')
 @click.option('--do-not-run', is_flag=True,
               help='Do not run YATSM (useful for just caching data)')
+@click.option('--profile', metavar='<file>',
+              type=click.Path(dir_okay=False, writable=True,
+                              resolve_path=True),
+              help='Save time spent in, and counts of, stages of each line to '
+                   '<file> (JSON, or CSV if <file> ends with .csv)')
+@click.option('--cprofile', metavar='<file>',
+              type=click.Path(dir_okay=False, writable=True,
+                              resolve_path=True),
+              help='Profile lines with cProfile and save statistics to <file>')
+@click.option('--pixel-stats', is_flag=True,
+              help='Save fit time and counts of model fits, retrains, and '
+                   'noise removals for each pixel as "pixel_stats"')
+@click.option('--slow-pixels', metavar='<seconds>', type=float,
+              help='Save timeseries of pixels taking longer than <seconds> '
+                   'to fit into "slow_pixels" within output directory')
+@click.option('--async-write/--no-async-write', default=False,
+              show_default=True,
+              help='Save results of each line in a background thread while '
+                   'the next line is processed')
+@click.option('--checkpoint-interval', metavar='<seconds>', type=float,
+              help='Save completed pixels of a line every <seconds> so an '
+                   'interrupted line can continue from them with --resume')
+@click.option('--save-state', is_flag=True,
+              help='Save the state of the last segment of each pixel so new '
+                   'images can be processed using "yatsm monitor"')
 @click.pass_context
 def line(ctx, config, job_number, total_jobs,
-         resume, check_cache, do_not_run):
+         resume, check_cache, do_not_run, profile, cprofile, pixel_stats,
+         slow_pixels, async_write, checkpoint_interval, save_state):
     # Parse config
     cfg = parse_config_file(config)
 
+    # Import phenology only when requested
     if ('phenology' in cfg and cfg['phenology'].get('enable')):
-        if not pheno:
+        try:
+            from ..phenology import longtermmean as pheno
+        except ImportError as e:
             raise click.ClickException('Could not import yatsm.phenology but '
                                        'phenology metrics are requested (%s)' %
-                                       pheno_exception)
+                                       e)
 
     logger.info('Job {i} of {n} - using config file {f}'.format(
         i=job_number, n=total_jobs, f=config))
@@ -79,6 +113,21 @@ def line(ctx, config, job_number, total_jobs,
             'in configuration file (%i)' %
             (df['filename'][0], nband, cfg['dataset']['n_bands']))
 
+    # Optional mask of pixels to process (e.g., a land mask)
+    process = None
+    if cfg['dataset'].get('process_mask'):
+        process_mask = read_image(cfg['dataset']['process_mask'],
+                                  bands=[1])[0]
+        if process_mask.shape != (nrow, ncol):
+            raise click.ClickException(
+                'Process mask %s (%i x %i) does not match size of images '
+                '(%i x %i)' % ((cfg['dataset']['process_mask'], ) +
+                               process_mask.shape + (nrow, ncol)))
+        process = np.in1d(process_mask,
+                          cfg['dataset'].get('process_mask_values', [0]),
+                          invert=True).reshape(process_mask.shape)
+        del process_mask
+
     # Calculate the lines this job ID works on
     try:
         job_lines = distribute_jobs(job_number, total_jobs, nrow)
@@ -86,11 +135,29 @@ def line(ctx, config, job_number, total_jobs,
         raise click.ClickException(str(err))
     logger.debug('Responsible for lines: {l}'.format(l=job_lines))
 
+    # Storage of result records
+    try:
+        schema = parse_record_schema(cfg['YATSM'].get('record_schema'))
+    except ValueError as err:
+        raise click.ClickException(str(err))
+    if max(nrow, ncol) > np.iinfo(schema['coords']).max:
+        logger.warning('Image is too large to store pixel coordinates using '
+                       '"%s" -- using "u4" instead' % schema['coords'])
+        schema['coords'] = 'u4'
+
     # Initialize timeseries model
     model = cfg['YATSM']['algorithm_cls']
     algo_cfg = cfg[cfg['YATSM']['algorithm']]
     yatsm = model(estimator=cfg['YATSM']['estimator'],
                   **algo_cfg.get('init', {}))
+    yatsm.coord_dtype = schema['coords']
+    if save_state:
+        if not isinstance(yatsm, CCDCesque):
+            raise click.ClickException('Can only save state of models for '
+                                       'monitoring using CCDCesque')
+        if cfg['YATSM']['reverse']:
+            raise click.ClickException('Cannot save state of models for '
+                                       'monitoring when running in reverse')
 
     # Setup algorithm and create design matrix (if needed)
     X = yatsm.setup(df, **cfg)
@@ -103,6 +170,9 @@ def line(ctx, config, job_number, total_jobs,
     if cfg['YATSM']['reverse']:
         X = np.flipud(X)
 
+    # Buffers for preprocessed pixels, with design matrix converted once
+    workspace = Workspace(X, dates, nband)
+
     # Create output metadata to save
     algo = cfg['YATSM']['algorithm']
     md = {
@@ -111,85 +181,251 @@ def line(ctx, config, job_number, total_jobs,
     }
     if cfg['phenology']['enable']:
         md.update({'phenology': cfg['phenology']})
+        ltm = pheno.LongTermMeanPhenology(
+            **cfg['phenology'].get('init', {}))
     # Remove all objects from metadata
     # Pickled objects potentially unstable across library versions)
     md['YATSM']['estimator'].pop('object', None)
     md['YATSM']['refit'].pop('prediction_object', None)
 
+    # Setup profiling
+    line_metrics = []
+    metrics.enable(bool(profile or pixel_stats))
+    if slow_pixels is not None:
+        slow_pixel_dir = os.path.join(output_dir, 'slow_pixels')
+        try:
+            mkdir_p(slow_pixel_dir)
+        except OSError as err:
+            raise click.ClickException('Cannot create directory for slow '
+                                       'pixels %s (%s)' %
+                                       (slow_pixel_dir, str(err)))
+    profiler = cProfile.Profile() if cprofile else None
+
     # Begin process
     start_time_all = time.time()
-    for line in job_lines:
-        out = get_output_name(cfg['dataset'], line)
-
-        if resume:
-            try:
-                np.load(out)
-            except:
-                pass
+    with ResultWriter(threaded=async_write) as writer:
+        for line in job_lines:
+            out = get_output_name(cfg['dataset'], line)
+
+            if resume:
+                try:
+                    np.load(out)
+                except:
+                    pass
+                else:
+                    logger.debug('Already processed line %s' % line)
+                    continue
+
+            logger.debug('Running line %s' % line)
+            start_time = time.time()
+            metrics.reset()
+            if profiler:
+                profiler.enable()
+
+            # Skip reading lines without any pixels to process
+            if process is not None and not process[line].any():
+                logger.debug('    No pixels to process in line %s' % line)
+                metrics.count('masked', ncol)
+                Y = None
             else:
-                logger.debug('Already processed line %s' % line)
+                with metrics.timer('read'):
+                    Y = read_line(line, df['filename'], df['image_ID'],
+                                  cfg['dataset'], ncol, nband, dtype,
+                                  read_cache=read_cache,
+                                  write_cache=write_cache,
+                                  validate_cache=False)
+            if do_not_run:
+                if profiler:
+                    profiler.disable()
                 continue
 
-        logger.debug('Running line %s' % line)
-        start_time = time.time()
+            output, states, pending = [], [], []
+            if pixel_stats:
+                stats = np.zeros(ncol,
+                                 dtype=pixel_stats_dtype(schema['coords']))
+                stats['px'] = np.arange(ncol)
+                stats['py'] = line
 
-        Y = read_line(line, df['filename'], df['image_ID'], cfg['dataset'],
-                      ncol, nband, dtype,
-                      read_cache=read_cache, write_cache=write_cache,
-                      validate_cache=False)
-        if do_not_run:
-            continue
-        if cfg['YATSM']['reverse']:
-            Y = np.fliplr(Y)
+            # Continue from pixels completed before line was interrupted
+            checkpoint = checkpoint_filename(out)
+            start_col = 0
+            if resume and os.path.exists(checkpoint):
+                ckpt = np.load(checkpoint)
+                start_col = int(ckpt['column'])
+                if ckpt['record'].size:
+                    output.append(ckpt['record'])
+                if pixel_stats and 'pixel_stats' in ckpt.files:
+                    stats = ckpt['pixel_stats']
+                if save_state and 'state' in ckpt.files and ckpt['state'].size:
+                    states.append(ckpt['state'])
+                    pending.append(ckpt['pending'])
+                logger.debug('    Continuing line %s from column %s' %
+                             (line, start_col))
 
-        output = []
-        for col in np.arange(Y.shape[-1]):
-            _Y = Y.take(col, axis=2)
-            # Preprocess
-            _X, _Y, _dates = yatsm.preprocess(X, _Y, dates, **cfg)
+            # Skip pixels that are masked or too short to fit, without
+            # preprocessing each pixel
+            columns = []
+            if Y is not None:
+                if cfg['YATSM']['reverse']:
+                    Y = np.fliplr(Y)
+                with metrics.timer('count_valid'):
+                    n_valid = yatsm.count_valid(Y, **cfg)
+                if pixel_stats:
+                    stats['n_obs'] = n_valid
+                fit_px = n_valid >= yatsm.min_fit_obs
+                metrics.count('too_short', ncol - np.count_nonzero(fit_px))
+                if process is not None:
+                    metrics.count('masked',
+                                  np.count_nonzero(fit_px & ~process[line]))
+                    fit_px &= process[line]
+                columns = np.flatnonzero(fit_px)
+                columns = columns[columns >= start_col]
 
-            # Run model
-            yatsm.px = col
-            yatsm.py = line
+            last_checkpoint = time.time()
+            for col in columns:
+                if (checkpoint_interval is not None and
+                        time.time() - last_checkpoint >= checkpoint_interval):
+                    with metrics.timer('checkpoint'):
+                        if len(output) > 1:
+                            output = [np.concatenate(output)]
+                        ckpt = {
+                            'column': col,
+                            'record': output[0] if output else np.array([])
+                        }
+                        if pixel_stats:
+                            ckpt['pixel_stats'] = stats
+                        if save_state and states:
+                            states = [np.concatenate(states)]
+                            pending = [np.concatenate(pending)]
+                            ckpt['state'] = states[0]
+                            ckpt['pending'] = pending[0]
+                        save_results(checkpoint, ckpt)
+                    last_checkpoint = time.time()
 
-            try:
-                yatsm.fit(_X, _Y, _dates, **algo_cfg.get('fit', {}))
-            except TSLengthException:
-                continue
+                _Y = Y[..., col]
+                # Preprocess
+                with metrics.timer('preprocess'):
+                    _X, _Y, _dates = yatsm.preprocess(X, _Y, dates,
+                                                      workspace=workspace,
+                                                      **cfg)
 
-            if yatsm.record is None or len(yatsm.record) == 0:
-                continue
+                # Run model
+                yatsm.px = col
+                yatsm.py = line
+
+                if pixel_stats:
+                    before = dict(metrics.counters)
+                fit_time = time.time()
+                try:
+                    with metrics.timer('fit'):
+                        yatsm.fit(_X, _Y, _dates, **algo_cfg.get('fit', {}))
+                except TSLengthException:
+                    metrics.count('too_short')
+                    continue
+                fit_time = time.time() - fit_time
+
+                if pixel_stats:
+                    stats[col]['time'] = fit_time
+                    stats[col]['n_record'] = len(yatsm.record)
+                    update_pixel_stats(stats[col], metrics.counters, before)
+                if slow_pixels is not None and fit_time > slow_pixels:
+                    logger.debug('    Saving slow pixel (%ss) in column %s' %
+                                 (fit_time, col))
+                    write_pixel(
+                        os.path.join(slow_pixel_dir,
+                                     'pixel_r%i_c%i.npz' % (line, col)),
+                        _X, _Y, _dates,
+                        design_str=cfg['YATSM']['design_matrix'],
+                        design_dict=cfg['YATSM']['design'])
+
+                if yatsm.record is None or len(yatsm.record) == 0:
+                    continue
 
-            # Postprocess
-            if cfg['YATSM'].get('commission_alpha'):
-                yatsm.record = postprocess.commission_test(
-                    yatsm, cfg['YATSM']['commission_alpha'])
+                # Copy state before postprocessing, or preprocessing of the
+                # next pixel, changes the model
+                if save_state:
+                    _state, _pending = get_state(yatsm)
+                    if _state is not None:
+                        states.append(_state)
+                        pending.append(_pending)
 
-            for prefix, estimator, stay_reg, fitopt in zip(
-                    cfg['YATSM']['refit']['prefix'],
-                    cfg['YATSM']['refit']['prediction_object'],
-                    cfg['YATSM']['refit']['stay_regularized'],
-                    cfg['YATSM']['refit']['fit']):
-                yatsm.record = postprocess.refit_record(
-                    yatsm, prefix, estimator,
-                    fitopt=fitopt, keep_regularized=stay_reg)
+                # Postprocess
+                if cfg['YATSM'].get('commission_alpha'):
+                    with metrics.timer('commission'):
+                        yatsm.record = postprocess.commission_test(
+                            yatsm, cfg['YATSM']['commission_alpha'])
 
-            if cfg['phenology']['enable']:
-                pcfg = cfg['phenology']
-                ltm = pheno.LongTermMeanPhenology(**pcfg.get('init', {}))
-                yatsm.record = ltm.fit(yatsm, **pcfg.get('fit', {}))
+                for prefix, estimator, stay_reg, fitopt in zip(
+                        cfg['YATSM']['refit']['prefix'],
+                        cfg['YATSM']['refit']['prediction_object'],
+                        cfg['YATSM']['refit']['stay_regularized'],
+                        cfg['YATSM']['refit']['fit']):
+                    with metrics.timer('refit'):
+                        yatsm.record = postprocess.refit_record(
+                            yatsm, prefix, estimator,
+                            fitopt=fitopt, keep_regularized=stay_reg)
 
-            output.extend(yatsm.record)
+                if cfg['phenology']['enable']:
+                    with metrics.timer('phenology'):
+                        yatsm.record = ltm.fit(
+                            yatsm, **cfg['phenology'].get('fit', {}))
 
-        logger.debug('    Saving YATSM output to %s' % out)
-        np.savez(out,
-                 record=np.array(output),
-                 version=__version__,
-                 metadata=md)
+                output.append(yatsm.record)
 
-        run_time = time.time() - start_time
-        logger.debug('Line %s took %ss to run' % (line, run_time))
+            logger.debug('    Saving YATSM output to %s' % out)
+            with metrics.timer('save'):
+                record = np.concatenate(output) if output else np.array([])
+                results = {
+                    'version': __version__,
+                    'metadata': md
+                }
+                if pixel_stats:
+                    results['pixel_stats'] = stats
+                if is_default_schema(schema):
+                    results['record'] = record
+                else:
+                    results['record'], results[RECORD_SCHEMA_KEY] = \
+                        encode_record(record, schema)
+                # Line is complete once results are saved, even if they are
+                # saved in the background, so remove checkpoint only then
+                writer.write(out, results,
+                             callback=functools.partial(_remove_file,
+                                                        checkpoint))
+                if save_state:
+                    state = {
+                        'state': (np.concatenate(states) if states
+                                  else np.array([])),
+                        'pending': (np.concatenate(pending) if pending
+                                    else np.array([])),
+                        'last_date': dates.max(),
+                        'version': __version__,
+                        'metadata': md
+                    }
+                    writer.write(state_filename(out), state)
+
+            if profiler:
+                profiler.disable()
+
+            run_time = time.time() - start_time
+            logger.debug('Line %s took %ss to run' % (line, run_time))
+            if profile:
+                line_metrics.append(dict(line=int(line), run_time=run_time,
+                                         **metrics.to_dict()))
 
     logger.info('Completed {n} lines in {m} minutes'.format(
                 n=len(job_lines),
                 m=round((time.time() - start_time_all) / 60.0, 2)))
+
+    metrics.enable(False)
+    if profile:
+        logger.info('Saving metrics for each line to %s' % profile)
+        write_metrics(profile, line_metrics)
+    if profiler:
+        logger.info('Saving cProfile statistics to %s' % cprofile)
+        profiler.dump_stats(cprofile)
+
+
+def _remove_file(filename):
+    """ Remove ``filename`` if it exists """
+    if os.path.exists(filename):
+        os.remove(filename)
@@ -3,10 +3,13 @@
 Modeled after very nice `click` interface for `rasterio`:
 https://github.com/mapbox/rasterio/blob/master/rasterio/rio/main.py
 
+Subcommands are imported only when they are invoked (or when listing help) so
+that starting ``yatsm`` does not import the dependencies of every program.
+
 """
+import importlib
 import logging
 import os
-from pkg_resources import iter_entry_points
 import sys
 
 import click
@@ -19,6 +22,23 @@ logger_algo = logging.getLogger('yatsm_algo')
 NP_THREAD_VARS = ['OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'OPM_NUM_THREADS']
 
 
+def _argv_option(name, argv=None):
+    """ Return value of option ``name`` in ``argv`` before parsing by click
+
+    Handles both ``--name <value>`` and ``--name=<value>``. Returns None if
+    the option or its value is missing so that click reports usage errors.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    for i, arg in enumerate(argv):
+        if arg == name:
+            if i + 1 < len(argv) and not argv[i + 1].startswith('-'):
+                return argv[i + 1]
+            return None
+        elif arg.startswith(name + '='):
+            return arg[len(name) + 1:] or None
+    return None
+
+
 def set_np_thread_vars(n):
     for envvar in NP_THREAD_VARS:
         if envvar in os.environ:
@@ -42,10 +62,89 @@ else:
     # Default to 1
     set_np_thread_vars(1)
 
+# If --numba_cache_dir set, parse it before click CLI interface so compiled
+# functions are cached there when modules defining them are imported
+_numba_cache_dir = _argv_option('--numba_cache_dir')
+if _numba_cache_dir:
+    os.environ['NUMBA_CACHE_DIR'] = os.path.abspath(_numba_cache_dir)
+
 # Resume YATSM imports after NumPy has been configured
 import yatsm  # flake8: noqa
 from . import options  # flake8: noqa
 
+#: dict: Commands included with YATSM, as "module:function" to import
+COMMANDS = {
+    'cache': 'yatsm.cli.cache:cache',
+    'changemap': 'yatsm.cli.changemap:changemap',
+    'classify': 'yatsm.cli.classify:classify',
+    'line': 'yatsm.cli.line:line',
+    'map': 'yatsm.cli.map:map',
+    'monitor': 'yatsm.cli.monitor:monitor',
+    'pixel': 'yatsm.cli.pixel:pixel',
+    'train': 'yatsm.cli.train:train'
+}
+#: str: Entry point group for commands provided by plugins
+PLUGIN_ENTRY_POINT = 'yatsm.yatsm_commands'
+
+
+def _import_command(path):
+    module, attr = path.split(':')
+    return getattr(importlib.import_module(module), attr)
+
+
+def _load_entry_point(ep):
+    return ep.load()
+
+
+class LazyGroup(click.Group):
+    """ A ``click.Group`` that imports subcommands when they are requested
+
+    Commands included with YATSM are found using :data:`COMMANDS`. Other
+    commands are found from the :data:`PLUGIN_ENTRY_POINT` entry points,
+    which are only searched if a command is not included with YATSM. Commands
+    that cannot be imported are replaced by a
+    ``click_plugins.core.BrokenCommand`` describing the error.
+
+    """
+    def _plugins(self):
+        # pkg_resources is slow to import and scans all installed packages
+        from pkg_resources import iter_entry_points
+        return dict((ep.name, ep) for ep in
+                    iter_entry_points(PLUGIN_ENTRY_POINT)
+                    if ep.name not in COMMANDS)
+
+    def list_commands(self, ctx):
+        return sorted(set(self.commands) | set(COMMANDS) |
+                      set(self._plugins()))
+
+    def get_command(self, ctx, name):
+        if name in self.commands:
+            return self.commands[name]
+
+        if name in COMMANDS:
+            load = _import_command
+            arg = COMMANDS[name]
+        else:
+            ep = self._plugins().get(name)
+            if ep is None:
+                return None
+            load, arg = _load_entry_point, ep
+
+        try:
+            cmd = load(arg)
+        except Exception:
+            cmd = click_plugins.core.BrokenCommand(name)
+        self.add_command(cmd, name)
+        return cmd
+
+
+def _log_compile_times():
+    # Only report if any Numba functions were used
+    accel = sys.modules.get('yatsm.accel')
+    if accel is not None:
+        accel.log_compile_times()
+
+
 # YATSM CLI group
 _context = dict(
     token_normalize_func=lambda x: x.lower(),
@@ -53,19 +152,22 @@ _context = dict(
 )
 
 
-@click_plugins.with_plugins(ep for ep in
-                            iter_entry_points('yatsm.yatsm_commands'))
-@click.group(help='YATSM command line interface', context_settings=_context)
+@click.group(cls=LazyGroup, help='YATSM command line interface',
+             context_settings=_context)
 @click.version_option(yatsm.__version__)
 @click.option('--num_threads', metavar='<threads>', default=1, type=int,
               show_default=True, callback=options.valid_int_gt_zero,
               help='Number of threads for OPENBLAS/MKL/OMP used in NumPy')
+@click.option('--numba_cache_dir', metavar='<dir>',
+              type=click.Path(file_okay=False, writable=True,
+                              resolve_path=True),
+              help='Cache compiled Numba functions in this directory')
 @click.option('--verbose', '-v', is_flag=True, help='Be verbose')
 @click.option('--verbose-yatsm', is_flag=True,
               help='Show verbose debugging messages in YATSM algorithm')
 @click.option('--quiet', '-q', is_flag=True, help='Be quiet')
 @click.pass_context
-def cli(ctx, num_threads, verbose, verbose_yatsm, quiet):
+def cli(ctx, num_threads, numba_cache_dir, verbose, verbose_yatsm, quiet):
     # Logging config
     if verbose:
         logger.setLevel(logging.DEBUG)
@@ -74,3 +176,6 @@ def cli(ctx, num_threads, verbose, verbose_yatsm, quiet):
     if quiet:
         logger.setLevel(logging.WARNING)
         logger_algo.setLevel(logging.WARNING)
+
+    # Report time spent compiling (or loading cached) Numba functions
+    ctx.call_on_close(_log_compile_times)
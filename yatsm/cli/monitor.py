@@ -0,0 +1,165 @@
+""" Command line interface for monitoring new images using saved model states
+"""
+import logging
+import os
+import time
+
+import click
+import numpy as np
+
+from . import options
+from ..algorithms import CCDCesque
+from ..algorithms.monitor import update_state
+from ..config_parser import parse_config_file
+from ..io import get_image_attribute, read_line, save_results
+from ..io.results import monitor_filename, state_filename
+from ..utils import (distribute_jobs, get_output_name, get_image_IDs,
+                     csvfile_to_dataframe)
+from ..version import __version__
+
+logger = logging.getLogger('yatsm')
+
+
+@click.command(short_help='Monitor new images for change using saved states')
+@options.arg_config_file
+@options.arg_job_number
+@options.arg_total_jobs
+@click.pass_context
+def monitor(ctx, config, job_number, total_jobs):
+    """ Monitor images acquired since "yatsm line --save-state" was run
+
+    Only images dated after the last image used to save the state of each
+    line are read. New observations are tested for change against the
+    coefficients and RMSE of the last segment of each pixel. Changes are
+    appended to files prefixed with "monitor_" and states are updated to
+    include the new images, so this command may be run again as more images
+    are added to the input file.
+
+    Models are not retrained using new observations and pixels with a
+    detected change are no longer monitored. Run "yatsm line --save-state"
+    to fit new segments.
+    """
+    cfg = parse_config_file(config)
+
+    model = cfg['YATSM']['algorithm_cls']
+    algo_cfg = cfg[cfg['YATSM']['algorithm']]
+    yatsm = model(estimator=cfg['YATSM']['estimator'],
+                  **algo_cfg.get('init', {}))
+    if not isinstance(yatsm, CCDCesque):
+        raise click.ClickException('Can only monitor models fit using '
+                                   'CCDCesque')
+    if cfg['YATSM']['reverse']:
+        raise click.ClickException('Cannot monitor models fit in reverse')
+    if algo_cfg.get('init', {}).get('dynamic_rmse'):
+        raise click.ClickException('Cannot monitor models using dynamic RMSE')
+
+    # Dataset information
+    df = csvfile_to_dataframe(cfg['dataset']['input_file'],
+                              cfg['dataset']['date_format'])
+    df['image_ID'] = get_image_IDs(df['filename'])
+    df['x'] = df['date']
+    dates = df['date'].values
+
+    nrow, ncol, nband, dtype = get_image_attribute(df['filename'][0])
+    if nband != cfg['dataset']['n_bands']:
+        raise click.ClickException(
+            'Number of bands in image %s (%i) do not match number '
+            'in configuration file (%i)' %
+            (df['filename'][0], nband, cfg['dataset']['n_bands']))
+
+    try:
+        job_lines = distribute_jobs(job_number, total_jobs, nrow)
+    except ValueError as err:
+        raise click.ClickException(str(err))
+    logger.debug('Responsible for lines: {l}'.format(l=job_lines))
+
+    # Design matrix of all images, subset to new images of each line
+    X = np.asarray(yatsm.setup(df, **cfg))
+
+    start_time_all = time.time()
+    n_change = 0
+    for line in job_lines:
+        out = get_output_name(cfg['dataset'], line)
+        state_file = state_filename(out)
+        if not os.path.isfile(state_file):
+            logger.debug('No saved state for line %s' % line)
+            continue
+
+        with np.load(state_file) as z:
+            state = z['state']
+            pending = z['pending']
+            last_date = int(z['last_date'])
+            metadata = (z['metadata'].item() if 'metadata' in z.files
+                        else {})
+
+        new = np.flatnonzero(dates > last_date)
+        new = new[np.argsort(dates[new], kind='mergesort')]
+        if new.size == 0:
+            logger.debug('No new images for line %s' % line)
+            continue
+        if state.size and state['coef'].shape[1] != X.shape[1]:
+            raise click.ClickException(
+                'Number of coefficients in saved state (%i) does not match '
+                'design matrix (%i)' % (state['coef'].shape[1], X.shape[1]))
+
+        logger.debug('Monitoring %i pixels of line %s using %i new images' %
+                     (state.size, line, new.size))
+        start_time = time.time()
+
+        states, pendings, changes = [], [], []
+        if state.size:
+            # Reading only the new images should never use cached lines
+            # containing every image
+            Y = read_line(line, df['filename'], df['image_ID'],
+                          cfg['dataset'], ncol, nband, dtype,
+                          read_cache=False, write_cache=False,
+                          image_index=new)
+            _X_new, dates_new = X[new, :], dates[new]
+
+            # Pending observations are sorted by pixel, as states are
+            pending_px = np.searchsorted(pending['px'], state['px'])
+            pending_px = np.append(pending_px, pending.size)
+            for i in range(state.size):
+                px = state['px'][i]
+                _X, _Y, _dates = yatsm.preprocess(_X_new, Y[..., px],
+                                                  dates_new, **cfg)
+                record, _state, _pending = update_state(
+                    yatsm, state[i:i + 1],
+                    pending[pending_px[i]:pending_px[i + 1]],
+                    _X, _Y, _dates)
+                if record.size:
+                    changes.append(record)
+                else:
+                    states.append(_state)
+                    pendings.append(_pending)
+        n_change += len(changes)
+
+        # Append changes to any detected in previous runs
+        monitor_file = monitor_filename(out)
+        if changes:
+            record = np.concatenate(changes)
+            if os.path.isfile(monitor_file):
+                with np.load(monitor_file) as z:
+                    record = np.concatenate((z['record'], record))
+            logger.debug('    Saving %i changes to %s' %
+                         (len(changes), monitor_file))
+            save_results(monitor_file, {
+                'record': record,
+                'version': __version__,
+                'metadata': metadata
+            })
+
+        save_results(state_file, {
+            'state': np.concatenate(states) if states else state[:0],
+            'pending': np.concatenate(pendings) if pendings else pending[:0],
+            'last_date': dates[new].max(),
+            'version': __version__,
+            'metadata': metadata
+        })
+
+        logger.debug('Line %s took %ss to monitor' %
+                     (line, time.time() - start_time))
+
+    logger.info('Detected {c} changes in {n} lines in {m} minutes'.format(
+                c=n_change, n=len(job_lines),
+                m=round((time.time() - start_time_all) / 60.0, 2)))
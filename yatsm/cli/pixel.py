@@ -9,7 +9,6 @@ import matplotlib as mpl
 import matplotlib.cm  # noqa
 import matplotlib.pyplot as plt
 import numpy as np
-import patsy
 import yaml
 
 from . import options, console
@@ -17,7 +16,7 @@ from ..algorithms import postprocess  # TODO: implement postprocessors
 from ..config_parser import convert_config, parse_config_file
 from ..io import read_pixel_timeseries
 from ..utils import csvfile_to_dataframe, get_image_IDs
-from ..regression.transforms import harm  # noqa
+from ..regression.design import design_for_dates
 
 avail_plots = ['TS', 'DOY', 'VAL']
 
@@ -246,21 +245,20 @@ def plot_results(band, cfg, model, design_info, plot_type='TS'):
     step = -1 if cfg['YATSM']['reverse'] else 1
 
     # Remove categorical info from predictions
-    design = re.sub(r'[\+\-][\ ]+C\(.*\)', '',
-                    cfg['YATSM']['design_matrix'])
-
-    i_coef = []
+    i_coef, columns = [], []
     for k, v in design_info.column_name_indexes.iteritems():
         if not re.match('C\(.*\)', k):
             i_coef.append(v)
+            columns.append(k)
     i_coef = np.asarray(i_coef)
+    formula = cfg['YATSM']['design_matrix']
 
     for i, r in enumerate(model.record):
         label = 'Model {i}'.format(i=i)
         if plot_type == 'TS':
             # Prediction
             mx = np.arange(r['start'], r['end'], step)
-            mX = patsy.dmatrix(design, {'x': mx}).T
+            mX = design_for_dates(columns, mx, formula=formula).T
 
             my = np.dot(r['coef'][i_coef, band], mX)
             mx_date = np.array([dt.datetime.fromordinal(int(_x)) for _x in mx])
@@ -276,7 +274,7 @@ def plot_results(band, cfg, model, design_info, plot_type='TS'):
 
             mx = np.arange(dt.date(yr_mid, 1, 1).toordinal(),
                            dt.date(yr_mid + 1, 1, 1).toordinal(), 1)
-            mX = patsy.dmatrix(design, {'x': mx}).T
+            mX = design_for_dates(columns, mx, formula=formula).T
 
             my = np.dot(r['coef'][i_coef, band], mX)
             mx_date = np.array([dt.datetime.fromordinal(d).timetuple().tm_yday
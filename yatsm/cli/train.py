@@ -1,11 +1,10 @@
 """ Command line interface for training classifiers on YATSM output """
 from datetime import datetime as dt
-from itertools import izip
 import logging
+import multiprocessing
 import os
 
 import click
-import matplotlib.pyplot as plt
 import numpy as np
 from osgeo import gdal
 
@@ -14,18 +13,15 @@ from sklearn.externals import joblib
 
 from . import options
 from ..config_parser import parse_config_file
-from ..classifiers import cfg_to_algorithm, diagnostics
+from ..classifiers import cfg_to_algorithm, diagnostics, record_features
 from ..errors import TrainingDataException
-from .. import io, plots, utils
+from .. import io, utils
 
 logger = logging.getLogger('yatsm')
 
 gdal.AllRegister()
 gdal.UseExceptions()
 
-if hasattr(plt, 'style') and 'ggplot' in plt.style.available:
-    plt.style.use('ggplot')
-
 
 @click.command(short_help='Train classifier on YATSM output')
 @options.arg_config_file
@@ -42,9 +38,13 @@ if hasattr(plt, 'style') and 'ggplot' in plt.style.available:
 @click.option('--plot', is_flag=True, help='Show diagnostic plots')
 @click.option('--diagnostics', is_flag=True, help='Run K-Fold diagnostics')
 @click.option('--overwrite', is_flag=True, help='Overwrite output model file')
+@click.option('--processes', metavar='<processes>', default=1, type=int,
+              show_default=True, callback=options.valid_int_gt_zero,
+              help='Number of processes extracting training data and fitting '
+                   'cross validation folds')
 @click.pass_context
 def train(ctx, config, classifier_config, model, n_fold, seed,
-          plot, diagnostics, overwrite):
+          plot, diagnostics, overwrite, processes):
     """
     Train a classifier from ``scikit-learn`` on YATSM output and save result to
     file <model>. Dataset configuration is specified by <yatsm_config> and
@@ -95,7 +95,8 @@ def train(ctx, config, classifier_config, model, n_fold, seed,
 
     if not has_cache or regenerate_cache:
         logger.debug('Reading in X/y')
-        X, y, row, col, labels = get_training_inputs(cfg)
+        X, y, row, col, labels = get_training_inputs(cfg,
+                                                     processes=processes)
         logger.debug('Done reading in X/y')
     else:
         logger.debug('Reading in X/y from cache file %s' % training_cache)
@@ -127,7 +128,8 @@ def train(ctx, config, classifier_config, model, n_fold, seed,
 
     # Diagnostics
     if diagnostics:
-        algo_diagnostics(cfg, X, y, row, col, algo, n_fold, plot)
+        algo_diagnostics(cfg, X, y, row, col, algo, n_fold, plot,
+                         n_jobs=processes)
 
 
 def is_cache_old(cache_file, training_file):
@@ -180,12 +182,17 @@ def find_result_attributes(cfg):
                          .format(attrs.keys()))
 
 
-def get_training_inputs(cfg, exit_on_missing=False):
+def get_training_inputs(cfg, exit_on_missing=False, processes=1):
     """ Returns X features and y labels specified in config file
 
+    Training data are extracted for all labeled pixels within each line of
+    results at once, optionally using multiple processes.
+
     Args:
         cfg (dict): YATSM configuration dictionary
         exit_on_missing (bool, optional): exit if input feature cannot be found
+        processes (int, optional): number of processes extracting training
+            data from lines of results
 
     Returns:
         X (np.ndarray): matrix of feature inputs for each training data sample
@@ -217,68 +224,115 @@ def get_training_inputs(cfg, exit_on_missing=False):
         logger.error('Failed to parse training data start or end dates')
         raise
 
-    # Loop through samples in ROI extracting features
+    # Group samples in ROI by row, since each row's results are in one file
     mask_values = cfg['classification']['roi_mask_values']
     mask = ~np.in1d(roi, mask_values).reshape(roi.shape)
     row, col = np.where(mask)
     y = roi[row, col]
 
-    X = []
-    out_y = []
-    out_row = []
-    out_col = []
-
-    _row_previous = None
-    for _row, _col, _y in izip(row, col, y):
-        # Load result
-        if _row != _row_previous:
-            output_name = utils.get_output_name(cfg['dataset'], _row)
-            try:
-                rec = np.load(output_name)['record']
-                _row_previous = _row
-            except:
-                logger.error('Could not open saved result file %s' %
-                             output_name)
-                if exit_on_missing:
-                    raise
-                else:
-                    continue
-
-        # Find intersecting time segment
-        i = np.where((rec['start'] < training_start) &
-                     (rec['end'] > training_end) &
-                     (rec['px'] == _col))[0]
-
-        if i.size == 0:
-            logger.debug('Could not find model for label %i at x/y %i/%i' %
-                         (_y, _col, _row))
-            continue
-        elif i.size > 1:
-            raise TrainingDataException(
-                'Found more than one valid model for label %i at x/y %i/%i' %
-                (_y, _col, _row))
-
-        # Extract coefficients with intercept term rescaled
-        coef = rec[i]['coef'][0, :]
-        coef[0, :] = (coef[0, :] +
-                      coef[1, :] * (rec[i]['start'] + rec[i]['end']) / 2.0)
-
-        X.append(np.concatenate((coef.reshape(coef.size), rec[i]['rmse'][0])))
-        out_y.append(_y)
-        out_row.append(_row)
-        out_col.append(_col)
-
-    out_row = np.array(out_row)
-    out_col = np.array(out_col)
+    rows, splits = np.unique(row, return_index=True)
+    lines = [(utils.get_output_name(cfg['dataset'], _row), _row, _col,
+              training_start, training_end, exit_on_missing)
+             for _row, _col in zip(rows, np.split(col, splits[1:]))]
+
+    if processes > 1 and len(lines) > 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            inputs = pool.map(_get_line_training_inputs, lines)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        inputs = [_get_line_training_inputs(line) for line in lines]
+
+    X = [_X for _X, _ in inputs if _X is not None]
+    found = np.concatenate([_found for _, _found in inputs] or
+                           [np.zeros(0, dtype=np.bool)])
+
+    out_row, out_col, out_y = row[found], col[found], y[found]
+    X = np.vstack(X) if X else np.zeros((0, 0))
 
     if labels is not None:
         labels = labels[out_row, out_col]
 
-    return np.array(X), np.array(out_y), out_row, out_col, labels
+    return X, out_y, out_row, out_col, labels
+
+
+def _get_line_training_inputs(args):
+    """ Return features of labeled pixels from one line of results
+
+    Args:
+        args (tuple): filename of results, row, columns of labeled pixels,
+            training start and end dates, and if missing results should raise
+
+    Returns:
+        tuple (np.ndarray, np.ndarray): features for each labeled pixel with
+            a model, and a mask of labeled pixels with a model. Features are
+            None if the results could not be opened
+
+    """
+    filename, row, col, training_start, training_end, exit_on_missing = args
+    try:
+        rec = io.load_record(filename, classification=False)
+    except:
+        logger.error('Could not open saved result file %s' % filename)
+        if exit_on_missing:
+            raise
+        return None, np.zeros(col.size, dtype=np.bool)
+
+    try:
+        X, found = get_training_features(rec, col,
+                                         training_start, training_end)
+    except TrainingDataException as e:
+        raise TrainingDataException('%s in row %i' % (e, row))
+
+    if not np.all(found):
+        logger.debug('Could not find models for %i labels in row %i' %
+                     ((~found).sum(), row))
+
+    return X, found
+
+
+def get_training_features(rec, col, training_start, training_end):
+    """ Return features of models intersecting training period for columns
+
+    Records are matched to columns with one sorted search of the record
+    pixel locations, ``px``, instead of searching all records for each
+    column.
+
+    Args:
+        rec (np.ndarray): YATSM record for one line of results
+        col (np.ndarray): column pixel locations of training data
+        training_start (int): ordinal date training data are relevant from
+        training_end (int): ordinal date training data are relevant until
+
+    Returns:
+        tuple (np.ndarray, np.ndarray): features of models (n_found x
+            n_feature) and mask of columns with a model spanning the training
+            period (``col.size``)
+
+    Raises:
+        TrainingDataException: raise if more than one model spans the
+            training period for a column
+
+    """
+    rec = rec[(rec['start'] < training_start) & (rec['end'] > training_end)]
+    order = np.argsort(rec['px'], kind='mergesort')
+    px = rec['px'][order]
+
+    left = np.searchsorted(px, col, side='left')
+    n_models = np.searchsorted(px, col, side='right') - left
+    if np.any(n_models > 1):
+        raise TrainingDataException(
+            'Found more than one valid model for x %i' %
+            col[np.argmax(n_models > 1)])
+
+    found = n_models == 1
+    return record_features(rec[order[left[found]]]), found
 
 
 def algo_diagnostics(cfg, X, y,
-                     row, col, algo, n_fold, make_plots=True):
+                     row, col, algo, n_fold, make_plots=True, n_jobs=1):
     """ Display algorithm diagnostics for a given X and y
 
     Args:
@@ -290,8 +344,17 @@ def algo_diagnostics(cfg, X, y,
         algo (sklearn classifier): classifier used from scikit-learn
         n_fold (int): number of folds for crossvalidation
         make_plots (bool, optional): show diagnostic plots (default: True)
+        n_jobs (int, optional): number of processes fitting crossvalidation
+            folds (default: 1)
 
     """
+    if make_plots:
+        # matplotlib is slow to import, so only import it to make plots
+        import matplotlib.pyplot as plt
+        from .. import plots
+        if hasattr(plt, 'style') and 'ggplot' in plt.style.available:
+            plt.style.use('ggplot')
+
     # Print algorithm diagnostics without crossvalidation
     logger.info('<----- DIAGNOSTICS ----->')
     if hasattr(algo, 'oob_score_'):
@@ -304,7 +367,8 @@ def algo_diagnostics(cfg, X, y,
         logger.info('<----------------------->')
         logger.info('%s crossvalidation scores:' % kf.__class__.__name__)
         try:
-            scores = diagnostics.kfold_scores(X, y, algo, kf)
+            scores = diagnostics.kfold_scores(X, y, algo, kf,
+                                              n_jobs=n_jobs)
         except Exception as e:
             logger.warning('Could not perform %s cross-validation: %s' %
                            (kf.__class__.__name__, e))
@@ -10,18 +10,26 @@ Contents:
       filesystem operations
     * :mod:`.readers`: Collection of functions designed to ease common image
       or timeseries reading tasks
-    * :mod:`.stack_line_readers`: Two readers of stacked timeseries images that
+    * :mod:`.results`: Encoding and decoding of YATSM result records using
+      compact storage schemas, and storage of classification results
+    * :mod:`.stack_line_readers`: Readers of stacked timeseries images that
       trade storing file handles for reducing repeated and relatively expensive
-      file open calls
+      file open calls, or that read all images through one VRT
+    * :mod:`.writers`: Atomic saving of result files, optionally in a
+      background thread
 """
 from .helpers import find_stack_images, mkdir_p
 from .readers import (get_image_attribute, read_image, read_pixel_timeseries,
                       read_line)
-from .stack_line_readers import bip_reader, gdal_reader
+from .results import decode_record, encode_record, load_record
+from .stack_line_readers import bip_reader, gdal_reader, vrt_reader
+from .writers import ResultWriter, checkpoint_filename, save_results
 
 
 __all__ = [
     'find_stack_images', 'mkdir_p',
-    'bip_reader', 'gdal_reader',
-    'get_image_attribute', 'read_image', 'read_pixel_timeseries', 'read_line'
+    'bip_reader', 'gdal_reader', 'vrt_reader',
+    'get_image_attribute', 'read_image', 'read_pixel_timeseries', 'read_line',
+    'decode_record', 'encode_record', 'load_record',
+    'ResultWriter', 'checkpoint_filename', 'save_results'
 ]
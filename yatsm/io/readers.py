@@ -6,8 +6,9 @@ import time
 import numpy as np
 from osgeo import gdal, gdal_array
 
-from .stack_line_readers import bip_reader, gdal_reader
+from .stack_line_readers import bip_reader, gdal_reader, vrt_reader
 from .. import cache
+from ..metrics import metrics
 
 logger = logging.getLogger('yatsm')
 
@@ -112,9 +113,13 @@ def read_pixel_timeseries(files, px, py):
 
 def read_line(line, images, image_IDs, dataset_config,
               ncol, nband, dtype,
-              read_cache=False, write_cache=False, validate_cache=False):
+              read_cache=False, write_cache=False, validate_cache=False,
+              bands=None, image_index=None):
     """ Reads in dataset from cache or images if required
 
+    Only the ``bands`` of the images within ``image_index`` are read, and
+    cache files record which bands they contain.
+
     Args:
         line (int): line to read in from images
         images (list): list of image filenames to read from
@@ -129,23 +134,40 @@ def read_line(line, images, image_IDs, dataset_config,
             (default: False)
         validate_cache (bool, optional): validate that cache data come from
             same images specified in `images` (default: False)
+        bands (iterable, optional): indices of bands to read (indexed on 0).
+            If None, read all ``nband`` bands (default: None)
+        image_index (iterable, optional): indices of images within `images`
+            to read. If None, read all images (default: None)
 
     Returns:
-        np.ndarray: 3D array of image data (nband, n_image, n_cols)
+        np.ndarray: 3D array of image data (nband, n_image, n_cols), with only
+            ``bands`` and images in ``image_index`` if specified
     """
     start_time = time.time()
 
+    n_images = len(images)
+    if image_index is not None:
+        # Readers keep all images open, so only subset the image IDs
+        image_index = np.asarray(image_index)
+        image_IDs = np.asarray(image_IDs)[image_index]
+        n_images = image_index.size
+    if bands is not None:
+        bands = np.asarray(bands)
+        nband = bands.size
+
     read_from_disk = True
     cache_filename = cache.get_line_cache_name(
-        dataset_config, len(images), line, nband)
+        dataset_config, n_images, line, nband)
 
-    Y_shape = (nband, len(images), ncol)
+    Y_shape = (nband, n_images, ncol)
 
     if read_cache:
         Y = cache.read_cache_file(cache_filename,
-                                  image_IDs if validate_cache else None)
+                                  image_IDs if validate_cache else None,
+                                  bands=bands)
         if Y is not None and Y.shape == Y_shape:
             logger.debug('Read in Y from cache file')
+            metrics.count('cache_hit')
             read_from_disk = False
         elif Y is not None and Y.shape != Y_shape:
             logger.warning(
@@ -153,15 +175,24 @@ def read_line(line, images, image_IDs, dataset_config,
                 '({y} versus {r})'.format(y=Y.shape, r=Y_shape))
 
     if read_from_disk:
+        metrics.count('read_images')
         # Read in Y
         if dataset_config['use_bip_reader']:
             # Use BIP reader
             logger.debug('Reading in data from disk using BIP reader')
-            Y = bip_reader.read_row(images, line)
+            Y = bip_reader.read_row(images, line, bands=bands,
+                                    index=image_index)
+        elif dataset_config.get('use_vrt_reader'):
+            # Read all images through one VRT using GDAL
+            logger.debug('Reading in data from disk using VRT reader')
+            vrt_reader.vrt_dir = dataset_config.get('cache_line_dir')
+            Y = vrt_reader.read_row(images, line, bands=bands,
+                                    index=image_index)
         else:
             # Read in data just using GDAL
             logger.debug('Reading in data from disk using GDAL')
-            Y = gdal_reader.read_row(images, line)
+            Y = gdal_reader.read_row(images, line, bands=bands,
+                                     index=image_index)
 
         logger.debug('Took {s}s to read in the data'.format(
             s=round(time.time() - start_time, 2)))
@@ -169,6 +200,8 @@ def read_line(line, images, image_IDs, dataset_config,
     if write_cache and read_from_disk:
         logger.debug('Writing Y data to cache file {f}'.format(
             f=cache_filename))
-        cache.write_cache_file(cache_filename, Y, image_IDs)
+        with metrics.timer('write_cache'):
+            cache.write_cache_file(cache_filename, Y, image_IDs,
+                                   bands=bands)
 
     return Y
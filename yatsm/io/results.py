@@ -0,0 +1,446 @@
+""" Functions for encoding and decoding YATSM result records
+
+YATSM algorithms create records as NumPy structured arrays with 32-bit floats
+for coefficients, RMSE, and change magnitude, absolute ordinal dates, and
+16-bit pixel coordinates. When running across large areas, a significant
+amount of the result file size is due to the coefficient arrays and storage
+may be reduced by encoding records using a more compact schema before saving.
+
+A record schema is described by a dict (e.g., from the ``record_schema`` key
+in the ``YATSM`` section of the configuration file) with the following keys:
+
+    * ``coef``: storage type for coefficients, RMSE, and magnitude fields.
+      One of ``float32`` (default), ``float16``, or ``int16``. The ``int16``
+      mode quantizes values using a scale and offset calculated for each
+      element of the field. Fields containing values larger than ``float16``
+      can hold, such as intercepts of designs using ordinal dates, are stored
+      as ``float32`` with either mode.
+    * ``dates``: either ``absolute`` (default) to store ordinal dates or
+      ``delta`` to store ``start`` relative to the earliest date in the
+      file, ``end`` relative to ``start``, and ``break`` relative to ``end``.
+    * ``coords``: data type of pixel coordinates (``u2`` or ``u4``)
+
+The information required to decode an encoded record (the schema, scales,
+offsets, and the date origin) is stored alongside the record in a sidecar
+dictionary under the ``record_schema`` key of the result file.
+
+Classification labels and prediction probabilities for each record are saved
+to a separate file (``class_`` prefixed to the result filename) so that result
+files are not rewritten when classifying. Classifications are merged into the
+record by :func:`load_record`.
+
+Similarly, the state of the last segment of each pixel saved for monitoring
+(``state_`` prefixed to the result filename) and the changes detected while
+monitoring new images (``monitor_`` prefix) are saved next to result files
+(see :func:`state_filename` and :func:`monitor_filename`).
+"""
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger('yatsm')
+
+#: str: Key for record encoding sidecar in saved result files
+RECORD_SCHEMA_KEY = 'record_schema'
+
+#: str: Prefix of classification result filenames
+CLASSIFICATION_PREFIX = 'class_'
+
+#: str: Prefix of model state filenames, saved for monitoring
+STATE_PREFIX = 'state_'
+
+#: str: Prefix of filenames of changes detected while monitoring
+MONITOR_PREFIX = 'monitor_'
+
+#: dict: Default record schema, matching records created by algorithms
+DEFAULT_RECORD_SCHEMA = {
+    'coef': 'float32',
+    'dates': 'absolute',
+    'coords': 'u2'
+}
+
+_COEF_MODES = ('float32', 'float16', 'int16')
+_DATE_MODES = ('absolute', 'delta')
+_COORD_DTYPES = ('u2', 'u4')
+_DATE_FIELDS = ('start', 'end', 'break')
+_COORD_FIELDS = ('px', 'py')
+_QUANTIZE_MAX = np.iinfo(np.int16).max
+_LOSSY_MAX = float(np.finfo(np.float16).max)
+
+
+def parse_record_schema(schema=None):
+    """ Return a validated record schema with defaults filled in
+
+    Args:
+        schema (dict): record schema, possibly incomplete or None
+
+    Returns:
+        dict: record schema containing ``coef``, ``dates``, and ``coords``
+
+    Raises:
+        ValueError: raise if a schema value is not understood
+
+    """
+    _schema = DEFAULT_RECORD_SCHEMA.copy()
+    _schema.update(schema or {})
+
+    if _schema['coef'] not in _COEF_MODES:
+        raise ValueError('Unknown record schema "coef" storage "%s". Choose '
+                         'from: %s' % (_schema['coef'],
+                                       ', '.join(_COEF_MODES)))
+    if _schema['dates'] not in _DATE_MODES:
+        raise ValueError('Unknown record schema "dates" storage "%s". Choose '
+                         'from: %s' % (_schema['dates'],
+                                       ', '.join(_DATE_MODES)))
+    if _schema['coords'] not in _COORD_DTYPES:
+        raise ValueError('Unknown record schema "coords" data type "%s". '
+                         'Choose from: %s' % (_schema['coords'],
+                                              ', '.join(_COORD_DTYPES)))
+
+    return _schema
+
+
+def is_default_schema(schema):
+    """ Return True if record schema does not require any encoding
+
+    Args:
+        schema (dict): record schema
+
+    Returns:
+        bool: True if records encoded with ``schema`` are unchanged
+
+    """
+    return parse_record_schema(schema) == DEFAULT_RECORD_SCHEMA
+
+
+def _is_coef_field(name):
+    """ Return True if record field is encoded according to "coef" schema
+    """
+    return (name in ('coef', 'rmse', 'magnitude') or
+            name.endswith('_coef') or name.endswith('_rmse'))
+
+
+def _is_lossy_field(record, name, schema):
+    """ Return True if record field can be stored using lossy "coef" schema
+
+    Values larger than ``float16`` can hold (e.g., intercepts of designs using
+    ordinal dates, which cancel large slope terms) cannot be stored in
+    ``float16`` and lose too much precision to predict from when quantized to
+    ``int16``, so fields containing them are stored as ``float32``.
+    """
+    if not _is_coef_field(name) or schema['coef'] == 'float32':
+        return False
+    values = record[name]
+    if values.size and not np.all(np.abs(values) <= _LOSSY_MAX):
+        logger.debug('Storing record field "%s" as float32 instead of %s '
+                     'because it contains values larger than %s' %
+                     (name, schema['coef'], _LOSSY_MAX))
+        return False
+    return True
+
+
+def _quantize(values):
+    """ Return int16 quantization, scale, and offset of ``values``
+    """
+    values = values.astype(np.float64)
+    vmin, vmax = values.min(axis=0), values.max(axis=0)
+    scale = (vmax - vmin) / (2.0 * (_QUANTIZE_MAX - 1))
+    constant = scale == 0
+    scale[constant] = 1.0
+    # Align offset to a multiple of scale so that zeros (e.g., magnitude of
+    # records without a break) are decoded exactly
+    offset = scale * np.round((vmax + vmin) / 2.0 / scale)
+    # Elements with one value (e.g., lines with one record) are decoded
+    # exactly from the offset, without rounding
+    offset[constant] = vmin[constant]
+
+    quantized = np.clip(np.round((values - offset) / scale),
+                        -_QUANTIZE_MAX, _QUANTIZE_MAX)
+
+    return quantized.astype(np.int16), scale, offset
+
+
+def encode_record(record, schema=None):
+    """ Encode a YATSM record using a compact record schema
+
+    Args:
+        record (np.ndarray): YATSM record
+        schema (dict): record schema (see :func:`parse_record_schema`)
+
+    Returns:
+        tuple (np.ndarray, dict): encoded record and the sidecar dictionary
+            required to decode it using :func:`decode_record`
+
+    Raises:
+        ValueError: raise if dates or coordinates cannot be represented
+            using the requested schema
+
+    Coefficient fields containing values too large to be stored using the
+    ``coef`` schema are stored as ``float32`` instead.
+
+    """
+    schema = parse_record_schema(schema)
+    sidecar = {'schema': schema, 'fields': {}}
+
+    if record.dtype.names is None:
+        # Empty results are saved without a dtype
+        return record, sidecar
+
+    lossy = set(name for name in record.dtype.names
+                if _is_lossy_field(record, name, schema))
+    dtype = []
+    for name in record.dtype.names:
+        field_dtype = record.dtype[name]
+        shape = field_dtype.shape
+        if name in lossy:
+            dtype.append((name, schema['coef'], shape))
+        elif name in _DATE_FIELDS and schema['dates'] == 'delta':
+            dtype.append((name, 'u2' if name == 'start' else 'i2'))
+        elif name in _COORD_FIELDS:
+            dtype.append((name, schema['coords']))
+        else:
+            dtype.append((name, field_dtype.base, shape))
+
+    encoded = np.zeros(record.shape, dtype=dtype)
+    if record.size == 0:
+        return encoded, sidecar
+
+    for name in record.dtype.names:
+        if name in lossy and schema['coef'] == 'int16':
+            encoded[name], scale, offset = _quantize(record[name])
+            sidecar['fields'][name] = {'scale': scale, 'offset': offset}
+        elif name in _COORD_FIELDS:
+            if record[name].max() > np.iinfo(schema['coords']).max:
+                raise ValueError('Cannot store pixel coordinate "%s" using '
+                                 '"%s"' % (name, schema['coords']))
+            encoded[name] = record[name]
+        elif name not in _DATE_FIELDS or schema['dates'] == 'absolute':
+            encoded[name] = record[name]
+
+    if schema['dates'] == 'delta':
+        origin = int(record['start'].min())
+        deltas = {
+            'start': record['start'] - origin,
+            'end': record['end'] - record['start'],
+            'break': np.where(record['break'] != 0,
+                              record['break'] - record['end'], 0)
+        }
+        for name, delta in deltas.items():
+            info = np.iinfo(encoded.dtype[name])
+            if delta.min() < info.min or delta.max() > info.max:
+                raise ValueError('Cannot store "%s" as date deltas using "%s"'
+                                 % (name, encoded.dtype[name]))
+            encoded[name] = delta
+        sidecar['origin'] = origin
+
+    return encoded, sidecar
+
+
+def decode_record(record, sidecar):
+    """ Decode a YATSM record encoded by :func:`encode_record`
+
+    Args:
+        record (np.ndarray): encoded YATSM record
+        sidecar (dict): sidecar dictionary created by :func:`encode_record`
+
+    Returns:
+        np.ndarray: YATSM record with 32-bit float coefficients and
+            absolute ordinal dates
+
+    """
+    schema = parse_record_schema(sidecar.get('schema'))
+    if record.dtype.names is None or schema == DEFAULT_RECORD_SCHEMA:
+        return record
+
+    dtype = []
+    for name in record.dtype.names:
+        field_dtype = record.dtype[name]
+        if _is_coef_field(name):
+            dtype.append((name, 'float32', field_dtype.shape))
+        elif name in _DATE_FIELDS:
+            dtype.append((name, 'i4'))
+        else:
+            dtype.append((name, field_dtype.base, field_dtype.shape))
+
+    decoded = np.zeros(record.shape, dtype=dtype)
+    for name in record.dtype.names:
+        if name in sidecar['fields']:
+            decoded[name] = (record[name] * sidecar['fields'][name]['scale'] +
+                             sidecar['fields'][name]['offset'])
+        elif name not in _DATE_FIELDS or schema['dates'] == 'absolute':
+            decoded[name] = record[name]
+
+    if schema['dates'] == 'delta' and record.size > 0:
+        decoded['start'] = record['start'].astype(np.int32) + sidecar['origin']
+        decoded['end'] = decoded['start'] + record['end']
+        decoded['break'] = np.where(record['break'] != 0,
+                                    decoded['end'] + record['break'], 0)
+
+    return decoded
+
+
+def classification_dtype(n_classes):
+    """ Return NumPy structured array dtype of classification results
+
+    Args:
+        n_classes (int): number of classes predicted
+
+    Returns:
+        np.dtype: data type of classification labels and probabilities
+
+    """
+    return np.dtype([
+        ('class', 'u2'),
+        ('class_proba', 'float32', n_classes)
+    ])
+
+
+def classification_filename(filename):
+    """ Return filename of classification results for a result file
+
+    Args:
+        filename (str): filename of YATSM result file
+
+    Returns:
+        str: filename of classification results, located next to results
+
+    """
+    return os.path.join(os.path.dirname(filename),
+                        CLASSIFICATION_PREFIX + os.path.basename(filename))
+
+
+def state_filename(filename):
+    """ Return filename of model state saved for monitoring a result file
+
+    Args:
+        filename (str): filename of YATSM result file
+
+    Returns:
+        str: filename of model state, located next to results
+
+    """
+    return os.path.join(os.path.dirname(filename),
+                        STATE_PREFIX + os.path.basename(filename))
+
+
+def monitor_filename(filename):
+    """ Return filename of changes detected while monitoring a result file
+
+    Args:
+        filename (str): filename of YATSM result file
+
+    Returns:
+        str: filename of changes detected by monitoring, located next to
+            results
+
+    """
+    return os.path.join(os.path.dirname(filename),
+                        MONITOR_PREFIX + os.path.basename(filename))
+
+
+def save_classification(filename, classified, classes):
+    """ Save classification results for records in a result file
+
+    Args:
+        filename (str): filename of YATSM result file that was classified
+        classified (np.ndarray): classification results, one for each record
+            in result file (see :func:`classification_dtype`)
+        classes (np.ndarray): classes predicted by classifier
+
+    Returns:
+        str: filename of saved classification results
+
+    """
+    out = classification_filename(filename)
+    np.savez(out, **{
+        'class': classified['class'],
+        'class_proba': classified['class_proba'],
+        'classes': classes
+    })
+    return out
+
+
+def load_classification(filename):
+    """ Return classification results for a result file, if classified
+
+    Args:
+        filename (str): filename of YATSM result file
+
+    Returns:
+        tuple (np.ndarray, np.ndarray): classification results for each
+            record and the classes predicted, or None if the result file has
+            not been classified
+
+    """
+    _filename = classification_filename(filename)
+    if not os.path.isfile(_filename):
+        return None
+    with np.load(_filename) as z:
+        classes = z['classes']
+        classified = np.empty(z['class'].shape,
+                              dtype=classification_dtype(classes.size))
+        classified['class'] = z['class']
+        classified['class_proba'] = z['class_proba']
+    return classified, classes
+
+
+def merge_classification(record, classified):
+    """ Return record with classification results, replacing any existing
+
+    Args:
+        record (np.ndarray): YATSM record
+        classified (np.ndarray): classification results for each record
+
+    Returns:
+        np.ndarray: YATSM record with classification fields
+
+    Raises:
+        ValueError: raise if number of classification results does not match
+            the number of records
+
+    """
+    if classified.shape != record.shape:
+        raise ValueError('Number of classification results (%i) does not '
+                         'match number of records (%i)' %
+                         (classified.size, record.size))
+
+    names = [n for n in record.dtype.names if n not in classified.dtype.names]
+    dtype = ([(n, record.dtype[n]) for n in names] +
+             [(n, classified.dtype[n]) for n in classified.dtype.names])
+
+    merged = np.empty(record.shape, dtype=dtype)
+    for name in names:
+        merged[name] = record[name]
+    for name in classified.dtype.names:
+        merged[name] = classified[name]
+    return merged
+
+
+def load_record(filename, classification=True):
+    """ Return the decoded YATSM record from a saved result file
+
+    Args:
+        filename (str): filename of YATSM result file
+        classification (bool): include classification results saved
+            separately from the result file, if available
+
+    Returns:
+        np.ndarray: YATSM record, decoded if saved with a record schema
+
+    """
+    with np.load(filename) as z:
+        record = z['record']
+        if RECORD_SCHEMA_KEY in z.files:
+            record = decode_record(record, z[RECORD_SCHEMA_KEY].item())
+
+    if classification and record.dtype.names:
+        result = load_classification(filename)
+        if result is not None:
+            try:
+                record = merge_classification(record, result[0])
+            except ValueError as e:
+                logger.warning('Not using classification results for %s: %s'
+                               % (filename, e))
+
+    return record
@@ -13,7 +13,15 @@ Attributes:
         reads from Band-Interleave-by-Pixel (BIP) images
     gdal_reader (_GDALStackReader): instance of :class:`_GDALStackReader` that
         reads from file formats supported by GDAL
+    vrt_reader (_VRTStackReader): instance of :class:`_VRTStackReader` that
+        reads from file formats supported by GDAL through one VRT of all
+        images
 """
+import hashlib
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
 import numpy as np
 from osgeo import gdal, gdal_array
 
@@ -21,6 +29,13 @@ gdal.AllRegister()
 gdal.UseExceptions()
 
 
+def _umask():
+    """ Return the file mode creation mask of the process """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
 class _BIPStackReader(object):
     """ Simple class to read BIP formatted stacks
 
@@ -54,11 +69,19 @@ class _BIPStackReader(object):
         self.datatype = gdal_array.GDALTypeCodeToNumericTypeCode(
             ds.GetRasterBand(1).DataType)
 
-    def _read_row(self, row):
-        data = np.empty((self.size[1], self.n_image, self.size[0]),
+    def _read_row(self, row, bands=None, index=None):
+        n_band = self.size[1] if bands is None else len(bands)
+        if bands is None:
+            bands = slice(None)
+        if index is None:
+            index = np.arange(self.n_image)
+        data = np.empty((n_band, len(index), self.size[0]),
                         self.datatype)
 
-        for i, fid in enumerate(self.files):
+        # Bands of a pixel are contiguous in BIP, so read all bands of the
+        # row and select the bands requested
+        for i, i_image in enumerate(index):
+            fid = self.files[i_image]
             # Find where we need to seek to
             offset = np.dtype(self.datatype).itemsize * \
                 (row * self.size[0]) * self.size[1]
@@ -68,16 +91,20 @@ class _BIPStackReader(object):
             data[:, i, :] = np.fromfile(fid,
                                         dtype=self.datatype,
                                         count=self.size[0] * self.size[1],
-                                        ).reshape(self.size).T
+                                        ).reshape(self.size).T[bands]
 
         return data
 
-    def read_row(self, filenames, row):
+    def read_row(self, filenames, row, bands=None, index=None):
         """ Return a 3D NumPy array (nband x nimage x ncol) of one row's data
 
         Args:
             filenames (iterable): list of filenames to read from
             row (int): row in image to return
+            bands (iterable, optional): indices of bands to read (indexed on
+                0). If None, read all bands (default: None)
+            index (iterable, optional): indices of images within `filenames`
+                to read. If None, read all images (default: None)
 
         Returns:
             np.ndarray: 3D NumPy array (nband x nimage x ncol) of image
@@ -86,7 +113,7 @@ class _BIPStackReader(object):
         """
         if not np.array_equal(filenames, self.filenames):
             self._init_attrs(filenames)
-        return self._read_row(row)
+        return self._read_row(row, bands=bands, index=index)
 
 
 class _GDALStackReader(object):
@@ -130,20 +157,192 @@ class _GDALStackReader(object):
             for ds in self.datasets
         ]
 
-    def _read_row(self, row):
-        data = np.empty((self.n_band, self.n_image, self.n_col),
+    def _read_row(self, row, bands=None, index=None):
+        if bands is None:
+            bands = np.arange(self.n_band)
+        if index is None:
+            index = np.arange(self.n_image)
+        data = np.empty((len(bands), len(index), self.n_col),
                         self.datatype)
-        for i, ds_bands in enumerate(self.dataset_bands):
-            for n_b, band in enumerate(ds_bands):
-                data[n_b, i, :] = band.ReadAsArray(0, row, self.n_col, 1)
+        for i, i_image in enumerate(index):
+            ds_bands = self.dataset_bands[i_image]
+            for n_b, b in enumerate(bands):
+                data[n_b, i, :] = ds_bands[b].ReadAsArray(0, row,
+                                                          self.n_col, 1)
         return data
 
-    def read_row(self, filenames, row):
+    def read_row(self, filenames, row, bands=None, index=None):
+        """ Return a 3D NumPy array (nband x nimage x ncol) of one row's data
+
+        Only the bands and images requested are read from disk.
+
+        Args:
+            filenames (iterable): list of filenames to read from
+            row (int): row in image to return
+            bands (iterable, optional): indices of bands to read (indexed on
+                0). If None, read all bands (default: None)
+            index (iterable, optional): indices of images within `filenames`
+                to read. If None, read all images (default: None)
+
+        Returns:
+            np.ndarray: 3D NumPy array (nband x nimage x ncol) of image
+                data for desired row
+
+        """
+        if not np.array_equal(filenames, self.filenames):
+            self._init_attrs(filenames)
+        return self._read_row(row, bands=bands, index=index)
+
+
+class _VRTStackReader(object):
+    """ Class to read stacks using GDAL through a VRT of all images
+
+    Instead of opening every image, this reader writes (or reuses) a VRT
+    containing every band of every image as its bands and reads a row of all
+    images with one request to GDAL. GDAL opens the images only when their
+    data are needed, keeping a limited pool of them open
+    (``GDAL_MAX_DATASET_POOL_SIZE``), and reads through its block cache
+    (``GDAL_CACHEMAX``).
+
+    Bands of the VRT are ordered by image band and then by image, so that
+    band ``b`` of image ``i`` is VRT band ``b * n_image + i + 1`` and a row
+    reads directly into the shape returned (nband x nimage x ncol).
+
+    Note that this class assumes the images are "stacked" -- that is that all
+    images contain the same number of rows, columns, and bands, and the images
+    are of the same geographic extent. Only the first image is opened to
+    determine these attributes.
+
+    Attributes:
+        vrt_dir (str): directory to save VRT files within. If None, VRT files
+            are saved in the system temporary directory
+        filenames (list): list of filenames to read from
+        vrt_filename (str): filename of VRT of ``filenames``
+        n_image (int): number of images
+        n_band (int): number of bands in an image
+        n_col (int): number of columns per row
+        datatype (np.dtype): NumPy datatype of images
+        dataset (gdal.Dataset): GDAL dataset of VRT
+
+    """
+    filenames = []
+    vrt_dir = None
+
+    def _init_attrs(self, filenames):
+        self.filenames = filenames
+        self.n_image = len(filenames)
+
+        ds = gdal.Open(self.filenames[0], gdal.GA_ReadOnly)
+        self.n_band = ds.RasterCount
+        self.n_col = ds.RasterXSize
+        self.datatype = gdal_array.GDALTypeCodeToNumericTypeCode(
+            ds.GetRasterBand(1).DataType)
+
+        self.vrt_filename = self._vrt_filename(filenames)
+        if not os.path.exists(self.vrt_filename):
+            # Write and rename so other jobs never read a partial VRT
+            fd, tmp = tempfile.mkstemp(
+                suffix='.vrt', dir=os.path.dirname(self.vrt_filename))
+            try:
+                with os.fdopen(fd, 'w') as fid:
+                    fid.write(self._vrt_xml(ds))
+                # ``mkstemp`` only allows the owner to read, but VRTs may be
+                # shared with other users' jobs
+                os.chmod(tmp, 0o666 & ~_umask())
+                os.rename(tmp, self.vrt_filename)
+            except:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+        ds = None
+        self.dataset = gdal.Open(self.vrt_filename, gdal.GA_ReadOnly)
+
+    def _vrt_filename(self, filenames):
+        """ Return filename of VRT for ``filenames``, which is reused as long
+        as the images do not change
+        """
+        md5 = hashlib.md5()
+        for f in filenames:
+            md5.update(os.path.abspath(f).encode('utf-8'))
+            md5.update(str(os.path.getmtime(f)).encode('utf-8'))
+        return os.path.join(self.vrt_dir or tempfile.gettempdir(),
+                            'yatsm_stack_%s.vrt' % md5.hexdigest())
+
+    def _vrt_xml(self, ds):
+        """ Return XML of VRT of all bands of all images, using the attributes
+        of one image ``ds``
+        """
+        band = ds.GetRasterBand(1)
+        attrs = {
+            'ncol': ds.RasterXSize,
+            'nrow': ds.RasterYSize,
+            'dtype': gdal.GetDataTypeName(band.DataType),
+            'blockx': band.GetBlockSize()[0],
+            'blocky': band.GetBlockSize()[1]
+        }
+        source = (
+            '    <SimpleSource>\n'
+            '      <SourceFilename relativeToVRT="0">{filename}'
+            '</SourceFilename>\n'
+            '      <SourceBand>{band}</SourceBand>\n'
+            '      <SourceProperties RasterXSize="{ncol}" '
+            'RasterYSize="{nrow}" DataType="{dtype}" BlockXSize="{blockx}" '
+            'BlockYSize="{blocky}"/>\n'
+            '      <SrcRect xOff="0" yOff="0" xSize="{ncol}" '
+            'ySize="{nrow}"/>\n'
+            '      <DstRect xOff="0" yOff="0" xSize="{ncol}" '
+            'ySize="{nrow}"/>\n'
+            '    </SimpleSource>\n')
+
+        xml = ['<VRTDataset rasterXSize="{ncol}" rasterYSize="{nrow}">\n'
+               .format(**attrs)]
+        vrt_band = 1
+        for b in range(self.n_band):
+            for f in self.filenames:
+                xml.append('  <VRTRasterBand dataType="{dtype}" '
+                           'band="{vrt_band}">\n'.format(
+                               vrt_band=vrt_band, **attrs))
+                xml.append(source.format(
+                    filename=escape(os.path.abspath(f)), band=b + 1, **attrs))
+                xml.append('  </VRTRasterBand>\n')
+                vrt_band += 1
+        xml.append('</VRTDataset>\n')
+
+        return ''.join(xml)
+
+    def _read_row(self, row, bands=None, index=None):
+        if bands is None and index is None:
+            data = np.empty((self.n_band, self.n_image, self.n_col),
+                            self.datatype)
+            # GDAL reads into (nband, nrow, ncol), or (nrow, ncol) if one band
+            shape = ((data.size // self.n_col, 1, self.n_col)
+                     if data.size > self.n_col else (1, self.n_col))
+            self.dataset.ReadAsArray(0, row, self.n_col, 1,
+                                     buf_obj=data.reshape(shape))
+            return data
+
+        if bands is None:
+            bands = np.arange(self.n_band)
+        if index is None:
+            index = np.arange(self.n_image)
+        band_list = [int(b * self.n_image + i + 1)
+                     for b in bands for i in index]
+        data = np.frombuffer(
+            self.dataset.ReadRaster(0, row, self.n_col, 1,
+                                    band_list=band_list),
+            dtype=self.datatype)
+        return data.reshape(len(bands), len(index), self.n_col).copy()
+
+    def read_row(self, filenames, row, bands=None, index=None):
         """ Return a 3D NumPy array (nband x nimage x ncol) of one row's data
 
         Args:
             filenames (iterable): list of filenames to read from
             row (int): row in image to return
+            bands (iterable, optional): indices of bands to read (indexed on
+                0). If None, read all bands (default: None)
+            index (iterable, optional): indices of images within `filenames`
+                to read. If None, read all images (default: None)
 
         Returns:
             np.ndarray: 3D NumPy array (nband x nimage x ncol) of image
@@ -152,8 +351,9 @@ class _GDALStackReader(object):
         """
         if not np.array_equal(filenames, self.filenames):
             self._init_attrs(filenames)
-        return self._read_row(row)
+        return self._read_row(row, bands=bands, index=index)
 
 
 bip_reader = _BIPStackReader()
 gdal_reader = _GDALStackReader()
+vrt_reader = _VRTStackReader()
@@ -0,0 +1,166 @@
+""" Functions and classes for saving YATSM result files
+
+Result files are written to a temporary file next to the destination and
+renamed once complete, so a result file is never left partially written
+(e.g., if a job is killed) and ``--resume`` can trust any result file that
+exists.
+
+Saving results can be overlapped with computation using
+:class:`ResultWriter`, which saves results in a background thread.
+
+Results completed so far within a unit of work (e.g., the pixels of a line)
+may be saved as a checkpoint next to the result file (see
+:func:`checkpoint_filename`) so that interrupted work can continue from them.
+"""
+import logging
+import os
+import sys
+import threading
+
+import numpy as np
+import six
+from six.moves import queue
+
+logger = logging.getLogger('yatsm')
+
+
+def save_results(filename, results):
+    """ Atomically save results to an uncompressed NumPy ``.npz`` file
+
+    Args:
+        filename (str): filename of result file
+        results (dict): arrays or objects to save, by name
+
+    """
+    # Temporary file in same directory (and filesystem) for atomic rename
+    tmp = os.path.join(os.path.dirname(filename), '.%s.%i.tmp' %
+                       (os.path.basename(filename), os.getpid()))
+    try:
+        with open(tmp, 'wb') as fid:
+            np.savez(fid, **results)
+        os.rename(tmp, filename)
+    except:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def checkpoint_filename(filename):
+    """ Return filename of checkpoint of partially completed results
+
+    Checkpoints are hidden files so that they do not match patterns of result
+    files (e.g., ``yatsm_r*``).
+
+    Args:
+        filename (str): filename of result file
+
+    Returns:
+        str: filename of checkpoint, located next to results
+
+    """
+    return os.path.join(os.path.dirname(filename),
+                        '.%s.checkpoint' % os.path.basename(filename))
+
+
+class ResultWriter(object):
+    """ Save results in a background thread, or as they are written
+
+    Results are queued and saved in order using :func:`save_results`. If the
+    queue is full, :func:`~write` blocks until a result is saved, limiting
+    the number of unsaved results held in memory. An error raised while
+    saving is raised again in the calling thread by the next call to
+    :func:`~write` or :func:`~close`, and by every call after it, since no
+    more results are saved.
+
+    Use as a context manager to ensure all results are saved, even if an
+    error is raised while they are being produced:
+
+    .. code-block:: python
+
+        with ResultWriter() as writer:
+            for line in lines:
+                writer.write(filename, results)
+
+    Args:
+        maxsize (int): maximum number of results waiting to be saved
+        threaded (bool): save results in a background thread. If False,
+            results are saved by :func:`~write` before it returns
+
+    """
+    def __init__(self, maxsize=2, threaded=True):
+        self._error = None
+        self._queue, self._thread = None, None
+        if threaded:
+            self._queue = queue.Queue(maxsize)
+            self._thread = threading.Thread(target=self._run,
+                                            name='ResultWriter')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _save(self, filename, results, callback):
+        save_results(filename, results)
+        logger.debug('    Saved results to %s' % filename)
+        if callback is not None:
+            callback()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self._save(*item)
+            except:
+                self._error = sys.exc_info()
+
+    def _raise_error(self):
+        if self._error is not None:
+            six.reraise(*self._error)
+
+    def write(self, filename, results, callback=None):
+        """ Queue results to be saved to ``filename``
+
+        Args:
+            filename (str): filename of result file
+            results (dict): arrays or objects to save, by name. Arrays must not
+                be modified after they are queued
+            callback (callable): function called without arguments once the
+                results are saved (e.g., to remove a checkpoint that is no
+                longer needed). It is not called if saving fails
+
+        Raises:
+            Exception: any error raised while saving previous results
+
+        """
+        self._raise_error()
+        if self._thread is None:
+            self._save(filename, results, callback)
+        else:
+            self._queue.put((filename, results, callback))
+
+    def close(self):
+        """ Wait for all queued results to be saved and stop thread
+
+        Raises:
+            Exception: any error raised while saving results
+
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # Do not hide the error that is already being raised
+            try:
+                self.close()
+            except Exception as err:
+                logger.error('Could not save results: %s' % err)
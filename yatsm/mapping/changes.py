@@ -1,11 +1,11 @@
 """ Functions relevant for mapping abrupt changes
 """
-from datetime import datetime as dt
 import logging
 
 import numpy as np
 
-from ..utils import find_results, iter_records
+from ..io.results import RECORD_SCHEMA_KEY, decode_record
+from ..utils import find_results, iter_records, ordinal2datefmt
 
 logger = logging.getLogger('yatsm')
 
@@ -40,6 +40,8 @@ def get_magnitude_indices(results):
 
         # Fall back to using non-zero elements of 'record' record array
         rec_array = rec['record']
+        if RECORD_SCHEMA_KEY in rec.files:
+            rec_array = decode_record(rec_array, rec[RECORD_SCHEMA_KEY].item())
         if rec_array.dtype.names is None:
             # Empty record -- skip
             continue
@@ -113,8 +115,8 @@ def get_change_date(start, end, result_location, image_ds,
 
         if index.shape[0] != 0:
             if out_format != 'ordinal':
-                dates = np.array([int(dt.fromordinal(_d).strftime(out_format))
-                                  for _d in rec['break'][index]])
+                dates = ordinal2datefmt(rec['break'][index], out_format,
+                                        first=start, last=end)
                 datemap[rec['py'][index], rec['px'][index]] = dates
             else:
                 datemap[rec['py'][index], rec['px'][index]] = \
@@ -157,16 +159,19 @@ def get_change_num(start, end, result_location, image_ds,
 
     logger.debug('Processing results')
     for rec in iter_records(records, warn_on_empty=warn_on_empty):
-        # X location of each changed model
-        px_changed = rec['px'][(rec['break'] >= start) & (rec['break'] <= end)]
+        changed = (rec['break'] >= start) & (rec['break'] <= end)
+        if not np.any(changed):
+            continue
+        # Linear index of each changed model, relative to first changed pixel
+        index = np.ravel_multi_index(
+            (rec['py'][changed].astype(np.intp),
+             rec['px'][changed].astype(np.intp)),
+            raster.shape)
+        index_min = index.min()
         # Count occurrences of changed pixel locations
-        bincount = np.bincount(px_changed)
-        # How many changes for unique values of px_changed?
-        n_change = bincount[np.nonzero(bincount)[0]]
-
-        # Add in the values
-        px = np.unique(px_changed)
-        py = rec['py'][np.in1d(px, rec['px'])]
-        raster[py, px] = n_change
+        bincount = np.bincount(index - index_min)
+        changed_index = np.nonzero(bincount)[0]
+
+        raster.flat[changed_index + index_min] = bincount[changed_index]
 
     return raster
@@ -4,11 +4,10 @@ import logging
 import re
 
 import numpy as np
-import patsy
 
 from .utils import find_result_attributes, find_indices
 from ..utils import find_results, iter_records
-from ..regression.transforms import harm
+from ..regression.design import design_for_dates
 
 logger = logging.getLogger('yatsm')
 
@@ -173,14 +172,14 @@ def get_prediction(date, result_location, image_ds,
     if re.match(r'.*C\(.*\).*', design):
         logger.warning('Categorical variable found in design matrix not used'
                        ' in predicted image estimate')
-    design = re.sub(r'[\+\-][\ ]+C\(.*\)', '', design)
-    X = patsy.dmatrix(design, {'x': date}).squeeze()
 
-    i_coef = []
+    i_coef, columns = [], []
     for k, v in design_info.iteritems():
         if not re.match('C\(.*\)', k):
             i_coef.append(v)
+            columns.append(k)
     i_coef = np.asarray(i_coef)
+    X = design_for_dates(columns, date, formula=design).squeeze()
 
     logger.debug('Allocating memory')
     raster = np.ones((image_ds.RasterYSize, image_ds.RasterXSize, n_bands),
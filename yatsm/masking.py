@@ -1,7 +1,6 @@
 from __future__ import division
 
 import numpy as np
-import statsmodels.api as sm
 
 from .accel import try_jit
 from .regression import robust_fit as rlm
@@ -86,6 +85,9 @@ def smooth_mask(x, Y, span, crit=400, green=1, swir1=4,
             need to impute missing data somehow...
 
     """
+    # statsmodels is slow to import and only needed here
+    import statsmodels.api as sm
+
     # Reverse span to get frac
     frac = span / x.shape[0]
     # Estimate delta as "good choice": delta = 0.01 * range(exog)
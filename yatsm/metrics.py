@@ -0,0 +1,236 @@
+""" Counters and timers for profiling stages of YATSM processing
+
+Metrics are recorded to a module level :class:`Metrics` instance,
+:data:`metrics`, which is disabled by default so that instrumented code has
+little overhead when not profiling.
+
+Example:
+    Time a stage and count an event:
+
+    .. code-block:: python
+
+        from yatsm.metrics import metrics
+
+        metrics.enable()
+        with metrics.timer('read'):
+            Y = read_line(...)
+        metrics.count('cache_hit')
+
+Attributes:
+    metrics (Metrics): metrics recorded by instrumented YATSM code
+    PIXEL_STATS_COUNTERS (dict): fields of pixel statistics (see
+        :func:`pixel_stats_dtype`) and the counters they are calculated from
+
+"""
+import csv
+import json
+import timeit
+from collections import defaultdict
+
+import numpy as np
+
+_clock = timeit.default_timer
+
+PIXEL_STATS_COUNTERS = {
+    'n_train': 'train',
+    'n_fit': 'fit_models',
+    'n_update': 'update_model',
+    'n_monitor': 'monitor',
+    'n_noise': 'remove_noise'
+}
+
+
+class _Timer(object):
+    """ Context manager adding time spent within it to a named timer
+    """
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, *args):
+        self.metrics.timers[self.name] += _clock() - self.start
+        self.metrics.counters[self.name] += 1
+
+
+class _NullTimer(object):
+    """ Context manager that does nothing, used when metrics are disabled
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_null_timer = _NullTimer()
+
+
+class Metrics(object):
+    """ Named counters and timers
+
+    Each timer also counts the number of times it was used.
+
+    Attributes:
+        enabled (bool): record metrics if True
+        counters (dict): counts of events or calls, by name
+        timers (dict): total time (seconds) spent in each stage, by name
+
+    """
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def enable(self, enabled=True):
+        """ Enable (or disable) recording of metrics
+
+        Args:
+            enabled (bool): record metrics if True
+
+        """
+        self.enabled = enabled
+
+    def reset(self):
+        """ Reset all counters and timers
+        """
+        self.counters = defaultdict(int)
+        self.timers = defaultdict(float)
+
+    def count(self, name, n=1):
+        """ Add ``n`` to the counter ``name``
+
+        Args:
+            name (str): name of counter
+            n (int): amount to add
+
+        """
+        if self.enabled:
+            self.counters[name] += n
+
+    def timer(self, name):
+        """ Return a context manager adding time spent within it to ``name``
+
+        Args:
+            name (str): name of timer
+
+        Returns:
+            object: context manager
+
+        """
+        if self.enabled:
+            return _Timer(self, name)
+        return _null_timer
+
+    def to_dict(self):
+        """ Return counters and timers as a dict
+
+        Returns:
+            dict: counters and timers, as ``dict``, under keys "counters" and
+                "timers"
+
+        """
+        return {
+            'counters': dict(self.counters),
+            'timers': dict(self.timers)
+        }
+
+
+metrics = Metrics()
+
+
+def write_metrics(filename, records):
+    """ Save metrics of multiple units of work (e.g., lines) to a file
+
+    Metrics are saved as JSON unless ``filename`` ends with ``.csv``, in which
+    case they are saved as CSV with one row per record and one column per
+    counter and timer (prefixed with ``time_``).
+
+    Args:
+        filename (str): filename to save metrics to
+        records (list[dict]): metrics to save. Each record contains "counters"
+            and "timers" from :meth:`Metrics.to_dict` and any other
+            identifying information (e.g., "line")
+
+    """
+    if not filename.lower().endswith('.csv'):
+        with open(filename, 'w') as fid:
+            json.dump(records, fid, indent=2, sort_keys=True)
+        return
+
+    ids, counters, timers = [], set(), set()
+    for rec in records:
+        ids.extend(k for k in rec
+                   if k not in ('counters', 'timers') and k not in ids)
+        counters.update(rec.get('counters', {}))
+        timers.update(rec.get('timers', {}))
+    counters, timers = sorted(counters), sorted(timers)
+
+    with open(filename, 'w') as fid:
+        writer = csv.writer(fid)
+        writer.writerow(ids + counters + ['time_' + t for t in timers])
+        for rec in records:
+            writer.writerow(
+                [rec.get(k, '') for k in ids] +
+                [rec.get('counters', {}).get(c, 0) for c in counters] +
+                [rec.get('timers', {}).get(t, 0.0) for t in timers])
+
+
+def pixel_stats_dtype(coord_dtype='u2'):
+    """ Return NumPy structured array datatype of per-pixel statistics
+
+    Statistics include the pixel coordinates, the number of observations,
+    the number of records, the time spent fitting, and the counters in
+    :data:`PIXEL_STATS_COUNTERS`.
+
+    Args:
+        coord_dtype (str): data type of pixel coordinates
+
+    Returns:
+        np.dtype: datatype of pixel statistics
+
+    """
+    return np.dtype([
+        ('px', coord_dtype),
+        ('py', coord_dtype),
+        ('n_obs', 'u4'),
+        ('n_record', 'u4'),
+        ('time', 'f4')
+    ] + [(field, 'u4') for field in sorted(PIXEL_STATS_COUNTERS)])
+
+
+def update_pixel_stats(stats, counters, before):
+    """ Add counts of events since ``before`` to statistics of a pixel
+
+    Args:
+        stats (np.void): statistics of a pixel (see :func:`pixel_stats_dtype`)
+        counters (dict): current counters (e.g., ``metrics.counters``)
+        before (dict): counters before fitting the pixel
+
+    """
+    for field, name in PIXEL_STATS_COUNTERS.items():
+        stats[field] = counters.get(name, 0) - before.get(name, 0)
+
+
+def write_pixel(filename, X, Y, dates, design_str=None, design_dict=None):
+    """ Save the timeseries of a pixel for benchmarking or debugging
+
+    The pixel is saved in the same format as the example timeseries used in
+    tests and benchmarks (``tests/algorithms/data``).
+
+    Args:
+        filename (str): filename to save pixel to
+        X (np.ndarray): design matrix (n_obs x n_features)
+        Y (np.ndarray): independent variable (n_series x n_obs)
+        dates (np.ndarray): ordinal dates for each observation in ``X``/``Y``
+        design_str (str): Patsy design specification
+        design_dict (dict): Patsy column name indices for design matrix ``X``
+
+    """
+    np.savez_compressed(filename, X=X, Y=Y, dates=dates,
+                        design_str=design_str or '',
+                        design_dict=design_dict or {})
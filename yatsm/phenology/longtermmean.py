@@ -15,18 +15,13 @@ import math
 import numpy as np
 import numpy.lib.recfunctions
 
-# Grab `stats` package from R for smoothing spline
-from rpy2 import robjects as ro
-from rpy2.robjects.packages import importr
-import rpy2.robjects.numpy2ri
-
-rpy2.robjects.numpy2ri.activate()
-Rstats = importr('stats')
-
+from ..regression.smoothing_spline import SmoothingSpline
 from ..vegetation_indices import EVI
 
 logger = logging.getLogger('yatsm')
 
+_EPOCH_ORDINAL = dt(1970, 1, 1).toordinal()
+
 
 def group_years(years, interval=3):
     """ Return integers representing sequential groupings of years
@@ -42,16 +37,19 @@ def group_years(years, interval=3):
         np.ndarray: integers representing sequential year groupings
 
     """
-    n_groups = math.ceil((years.max() - years.min()) / interval)
+    n_groups = int(math.ceil((years.max() - years.min()) / interval))
     if n_groups <= 1:
         return np.zeros_like(years, dtype=np.uint16)
-    splits = np.array_split(np.arange(years.min(), years.max() + 1), n_groups)
 
-    groups = np.zeros_like(years, dtype=np.uint16)
-    for i, s in enumerate(splits):
-        groups[np.in1d(years, s)] = i
+    # Groups of years are split as in `np.array_split`, where the first
+    # `n_years % n_groups` groups contain one extra year
+    n_years = int(years.max() - years.min()) + 1
+    size, extra = divmod(n_years, n_groups)
+    sizes = np.repeat([size + 1, size], [extra, n_groups - extra])
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
 
-    return groups
+    groups = np.searchsorted(starts, years - years.min(), side='right') - 1
+    return groups.astype(np.uint16)
 
 
 def scale_EVI(evi, periods, qmin=10, qmax=90):
@@ -61,6 +59,9 @@ def scale_EVI(evi, periods, qmin=10, qmax=90):
     As part of finding the quantiles, EVI values not within the (0, 1) range
     will be removed.
 
+    Quantiles for all periods are calculated from one sort of the EVI,
+    interpolating linearly between observations as in `np.percentile`.
+
     Args:
         evi (np.ndarray): EVI values
         periods (np.ndarray): intervals of years to group and scale together
@@ -71,20 +72,38 @@ def scale_EVI(evi, periods, qmin=10, qmax=90):
         np.ndarray: scaled EVI array
 
     """
-    _evi = evi.copy()
-    for u in np.unique(periods):
-        index = np.where(periods == u)
-        evi_min = np.percentile(evi[index], qmin)
-        evi_max = np.percentile(evi[index], qmax)
-        _evi[index] = (evi[index] - evi_min) / (evi_max - evi_min)
+    _, period = np.unique(periods, return_inverse=True)
+    n = np.bincount(period)
+    start = np.concatenate(([0], np.cumsum(n)[:-1]))
+
+    # Sort EVI within each period (NaN sorted last)
+    sorted_evi = evi[np.lexsort((evi, period))]
+
+    def _percentile(q):
+        pos = q / 100. * (n - 1)
+        below = np.floor(pos).astype(np.intp)
+        above = np.minimum(below + 1, n - 1)
+        frac = pos - below
+        return (sorted_evi[start + below] * (1 - frac) +
+                sorted_evi[start + above] * frac)
 
-    return _evi
+    evi_min, evi_max = _percentile(qmin), _percentile(qmax)
+
+    # Percentiles of periods containing NaN are NaN
+    has_nan = np.bincount(period, weights=np.isnan(evi)) > 0
+    evi_min[has_nan], evi_max[has_nan] = np.nan, np.nan
+
+    evi_min, evi_max = evi_min[period], evi_max[period]
+    return (evi - evi_min) / (evi_max - evi_min)
 
 
 def CRAN_spline(x, y, spar=0.55):
     """ Return a prediction function for a smoothing spline from R
 
-    Use `rpy2` package to fit a smoothing spline using "smooth.spline".
+    Use `rpy2` package to fit a smoothing spline using "smooth.spline". Fits
+    are equivalent to
+    :class:`yatsm.regression.smoothing_spline.SmoothingSpline`,
+    which does not require R and is used to calculate phenology metrics.
 
     Args:
         x (np.ndarray): independent variable
@@ -105,6 +124,11 @@ def CRAN_spline(x, y, spar=0.55):
             y_smooth = pred_spl(np.arange(1, 366))
 
     """
+    from rpy2.robjects.packages import importr
+    import rpy2.robjects.numpy2ri
+    rpy2.robjects.numpy2ri.activate()
+    Rstats = importr('stats')
+
     spl = Rstats.smooth_spline(x, y, spar=spar)
 
     return lambda _x: np.array(Rstats.predict_smooth_spline(spl, _x)[1])
@@ -138,10 +162,15 @@ def ordinal2yeardoy(ordinal):
             ordinal date
 
     """
-    _date = [dt.fromordinal(_d) for _d in ordinal]
-    yeardoy = np.empty((ordinal.size, 2), dtype=np.uint16)
-    yeardoy[:, 0] = np.array([int(_d.strftime('%Y')) for _d in _date])
-    yeardoy[:, 1] = np.array([int(_d.strftime('%j')) for _d in _date])
+    # Convert to days since the NumPy datetime epoch, 1970-01-01
+    days = (np.asarray(ordinal, dtype=np.int64) -
+            _EPOCH_ORDINAL).astype('datetime64[D]')
+    year_start = days.astype('datetime64[Y]')
+
+    yeardoy = np.empty((days.size, 2), dtype=np.uint16)
+    yeardoy[:, 0] = year_start.astype(np.int64) + 1970
+    yeardoy[:, 1] = (days - year_start.astype('datetime64[D]')).astype(
+        np.int64) + 1
 
     return yeardoy
 
@@ -233,7 +262,7 @@ class LongTermMeanPhenology(object):
             ('pheno_nobs', 'u2')
         ])
 
-    def _fit_record(self, evi, yeardoy, year_interval, q_min, q_max):
+    def _prep_record(self, evi, yeardoy, year_interval, q_min, q_max):
         # Calculate year-to-year groupings for EVI normalization
         periods = group_years(yeardoy[:, 0], year_interval)
         evi_norm = scale_EVI(evi, periods, qmin=q_min, qmax=q_max)
@@ -258,10 +287,9 @@ class LongTermMeanPhenology(object):
             np.zeros_like(pad_end, dtype=evi.dtype)
         ))
 
-        # Fit spline and predict EVI
-        spl_pred = CRAN_spline(pad_doy, pad_evi_norm, spar=0.55)
-        evi_smooth = spl_pred(np.arange(1, 367))  # 366 to include leap years
+        return yeardoy, evi_norm, pad_doy, pad_evi_norm
 
+    def _record_metrics(self, evi_smooth, yeardoy, evi_norm):
         # Check correlation
         pheno_cor = np.corrcoef(evi_smooth[yeardoy[:, 1] - 1], evi_norm)[0, 1]
 
@@ -287,9 +315,25 @@ class LongTermMeanPhenology(object):
         return (ltm_spring, ltm_autumn, pheno_cor,
                 peak_evi, peak_doy, evi_smooth)
 
+    def _fit_record(self, evi, yeardoy, year_interval, q_min, q_max):
+        prep = self._prep_record(evi, yeardoy, year_interval, q_min, q_max)
+        if prep is None:
+            return
+        yeardoy, evi_norm, pad_doy, pad_evi_norm = prep
+
+        # Fit spline and predict EVI
+        spl = SmoothingSpline(spar=0.55).fit(pad_doy, pad_evi_norm)
+        # 366 to include leap years
+        evi_smooth = spl.predict(np.arange(1, 367))
+
+        return self._record_metrics(evi_smooth, yeardoy, evi_norm)
+
     def fit(self, model):
         """ Fit phenology metrics for each time segment within a YATSM model
 
+        Smoothing splines for records observed on the same days of year are
+        fit together.
+
         Args:
             model (yatsm.YATSM): instance of `yatsm.YATSM` that has been run
                 for change detection
@@ -303,6 +347,8 @@ class LongTermMeanPhenology(object):
         # Preprocess EVI and create our `self.pheno` record
         self._fit_prep(model)
 
+        # Combine observations on each DOY and group records by DOY observed
+        groups = {}
         for i, _record in enumerate(self.model.record):
             # Subset variables to range of current record
             rec_range = np.where((self.ordinal >= _record['start']) &
@@ -310,23 +356,40 @@ class LongTermMeanPhenology(object):
             if rec_range.size == 0:
                 continue
 
-            _evi = self.evi[rec_range]
-            _yeardoy = self.yeardoy[rec_range, :]
-
-            # Fit and save results
-            _result = self._fit_record(_evi, _yeardoy,
-                                       self.year_interval,
-                                       self.q_min, self.q_max)
-            if _result is None:
+            prep = self._prep_record(self.evi[rec_range],
+                                     self.yeardoy[rec_range, :],
+                                     self.year_interval,
+                                     self.q_min, self.q_max)
+            if prep is None:
                 continue
-
-            self.pheno[i]['spring_doy'] = _result[0]
-            self.pheno[i]['autumn_doy'] = _result[1]
-            self.pheno[i]['pheno_cor'] = _result[2]
-            self.pheno[i]['peak_evi'] = _result[3]
-            self.pheno[i]['peak_doy'] = _result[4]
-            self.pheno[i]['spline_evi'][:] = _result[5]
-            self.pheno[i]['pheno_nobs'] = rec_range.size
+            yeardoy, evi_norm, pad_doy, pad_evi_norm = prep
+
+            n_doy = np.bincount(pad_doy, minlength=367)
+            doy = np.flatnonzero(n_doy)
+            mean_evi = (np.bincount(pad_doy, weights=pad_evi_norm,
+                                    minlength=367)[doy] / n_doy[doy])
+            group = groups.setdefault(doy.tobytes(), (doy, []))
+            group[1].append((i, rec_range.size, yeardoy, evi_norm,
+                             n_doy[doy], mean_evi))
+
+        # Fit splines and predict EVI for all records in each group
+        for doy, group in groups.values():
+            index, nobs, yeardoy, evi_norm, n_doy, mean_evi = zip(*group)
+            spl = SmoothingSpline(spar=0.55).fit(doy, np.array(mean_evi),
+                                                 w=np.array(n_doy))
+            # 366 to include leap years
+            evi_smooth = spl.predict(np.arange(1, 367))
+
+            for j, i in enumerate(index):
+                _result = self._record_metrics(evi_smooth[j],
+                                               yeardoy[j], evi_norm[j])
+                self.pheno[i]['spring_doy'] = _result[0]
+                self.pheno[i]['autumn_doy'] = _result[1]
+                self.pheno[i]['pheno_cor'] = _result[2]
+                self.pheno[i]['peak_evi'] = _result[3]
+                self.pheno[i]['peak_doy'] = _result[4]
+                self.pheno[i]['spline_evi'][:] = _result[5]
+                self.pheno[i]['pheno_nobs'] = nobs[j]
 
         return np.lib.recfunctions.merge_arrays(
             (self.model.record, self.pheno), flatten=True)
@@ -1,15 +1,20 @@
-from .design import design_coefs, design_to_indices
+from .design import (design_coefs, design_to_indices, design_for_dates,
+                     get_design_matrix)
 from .packaged import find_packaged_regressor
 from .recresid import recresid
 from .robust_fit import RLM, bisquare
+from .smoothing_spline import SmoothingSpline
 from .transforms import harm
 
 __all__ = [
     'design_coefs',
     'design_to_indices',
+    'design_for_dates',
+    'get_design_matrix',
     'find_packaged_regressor',
     'recresid',
     'RLM',
     'bisquare',
+    'SmoothingSpline',
     'harm'
 ]
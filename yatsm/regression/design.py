@@ -3,7 +3,23 @@
 Function ``design_to_indices`` is used to convert between coefficient types
 listed in ``design_coefs`` and the indices of a design matrix containing
 the desired coefficient type or types.
+
+Function ``design_for_dates`` evaluates the intercept, slope, and seasonal
+harmonic columns of a design matrix for a set of dates without ``patsy``, and
+``get_design_matrix`` caches design matrices created by ``patsy`` in memory and
+on disk so they are created only once per design formula and dataset.
 """
+import hashlib
+import logging
+import os
+import re
+
+import numpy as np
+import patsy
+
+from .transforms import harm  # noqa
+
+logger = logging.getLogger('yatsm')
 
 # Possible coefficients
 design_coefs = ['all',
@@ -71,3 +87,220 @@ def design_to_indices(design_matrix, features):
     coef_names = [n for n in coef_names if n is not None]
 
     return i_coefs, coef_names
+
+
+# Design matrix evaluation without patsy
+_RE_HARM = re.compile(r'^harm\(x, *([0-9.]+)\)\[([01])\]$')
+_RE_HARM_TERM = re.compile(r'^harm\(x, *([0-9.]+)\)$')
+_W = 2 * np.pi / 365.25  # same frequency as yatsm.regression.transforms.harm
+
+
+def _parse_freq(freq):
+    """ Return harmonic frequency as int if possible, like a patsy formula """
+    try:
+        return int(freq)
+    except ValueError:
+        return float(freq)
+
+
+def is_date_design(columns):
+    """ Return True if all design matrix columns are supported by
+    :func:`design_for_dates`
+
+    Args:
+        columns (iterable): names of design matrix columns
+
+    Returns:
+        bool: True if ``columns`` contain only intercept, slope (``x``), or
+            harmonic (``harm(x, freq)``) terms
+
+    """
+    return all(c == 'Intercept' or c == 'x' or _RE_HARM.match(c)
+               for c in columns)
+
+
+def design_for_dates(columns, dates, formula=None):
+    """ Return design matrix for dates without evaluating a ``patsy`` formula
+
+    Only the intercept (``Intercept``), slope (``x``), and harmonic
+    (``harm(x, freq)``) terms are supported. Values are calculated identically
+    to the equivalent ``patsy`` formula (see
+    :class:`yatsm.regression.transforms.Harmonic`). Other columns are
+    evaluated using ``formula``, if given, with ``patsy``.
+
+    Args:
+        columns (iterable): names of design matrix columns, in order (e.g.,
+            the keys of a ``patsy.DesignInfo.column_name_indexes``)
+        dates (int or np.ndarray): ordinal dates to evaluate
+        formula (str): ``patsy`` design formula containing ``columns`` to
+            evaluate if a column is not supported. Categorical terms are
+            removed from the formula since they cannot be evaluated for
+            dates alone (default: None)
+
+    Returns:
+        np.ndarray: design matrix (number of dates x number of columns)
+
+    Raises:
+        ValueError: raise if a column is not supported (e.g., categorical
+            variables) and cannot be evaluated using ``formula``
+
+    """
+    x = np.atleast_1d(np.asarray(dates))
+    columns = list(columns)
+
+    if formula is not None and not is_date_design(columns):
+        return _design_for_dates_patsy(columns, x, formula)
+
+    X = np.empty((x.size, len(columns)), dtype=np.float64)
+    harmonics = {}
+    for i, c in enumerate(columns):
+        if c == 'Intercept':
+            X[:, i] = 1.0
+        elif c == 'x':
+            X[:, i] = x
+        else:
+            match = _RE_HARM.match(c)
+            if not match:
+                raise ValueError('Cannot evaluate design matrix column "%s" '
+                                 'without patsy' % c)
+            freq = _parse_freq(match.group(1))
+            if freq not in harmonics:
+                harmonics[freq] = freq * _W * x
+            if match.group(2) == '0':
+                X[:, i] = np.cos(harmonics[freq])
+            else:
+                X[:, i] = np.sin(harmonics[freq])
+
+    return X
+
+
+def _design_for_dates_patsy(columns, x, formula):
+    """ Return ``columns`` of design matrix for dates using ``patsy``
+    """
+    # Remove categorical terms, which require more data than dates
+    desc = patsy.ModelDesc.from_formula(formula)
+    desc.rhs_termlist = [
+        term for term in desc.rhs_termlist
+        if not any(f.name().startswith('C(') for f in term.factors)
+    ]
+    try:
+        X = patsy.dmatrix(desc, {'x': x})
+    except patsy.PatsyError as e:
+        raise ValueError('Cannot evaluate design matrix "%s" for dates: %s' %
+                         (formula, e))
+    indexes = X.design_info.column_name_indexes
+    missing = [c for c in columns if c not in indexes]
+    if missing:
+        raise ValueError('Design matrix "%s" does not contain columns: %s' %
+                         (formula, ', '.join(missing)))
+    return np.asarray(X)[:, [indexes[c] for c in columns]]
+
+
+# Design matrix caching
+_DESIGN_CACHE = {}
+_DESIGN_CACHE_MAX = 8
+
+
+def _design_key(formula, data):
+    """ Return hash of formula and the data it depends on
+    """
+    key = hashlib.sha1(formula.encode('utf-8'))
+    for name in sorted(data.keys()):
+        if re.search(r'\b%s\b' % re.escape(name), formula):
+            values = np.asarray(data[name])
+            key.update(name.encode('utf-8'))
+            if values.dtype.kind == 'O':
+                key.update(repr(values.tolist()).encode('utf-8'))
+            else:
+                key.update(np.ascontiguousarray(values).view(np.uint8))
+    return key.hexdigest()
+
+
+def _design_cache_filename(cache_dir, key):
+    return os.path.join(cache_dir, 'design_%s.npz' % key)
+
+
+def _read_design_cache(filename):
+    try:
+        with np.load(filename) as z:
+            X = z['X']
+            columns = [str(c) for c in z['columns']]
+    except (IOError, KeyError, ValueError) as e:
+        logger.debug('Could not read design matrix cache %s: %s' %
+                     (filename, e))
+        return None
+    return patsy.DesignMatrix(X, design_info=patsy.DesignInfo(columns))
+
+
+def _write_design_cache(filename, X):
+    """ Write design matrix cache, renaming into place so concurrent jobs
+    never see a partially written file
+    """
+    tmp = '%s.%i.tmp' % (filename, os.getpid())
+    try:
+        with open(tmp, 'wb') as f:
+            np.savez(f, X=np.asarray(X),
+                     columns=np.array(X.design_info.column_names))
+        os.rename(tmp, filename)
+    except (IOError, OSError) as e:
+        logger.debug('Could not write design matrix cache %s: %s' %
+                     (filename, e))
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def get_design_matrix(formula, data, cache_dir=None):
+    """ Return design matrix for formula and data, using cached copies
+
+    Design matrices are cached using a hash of the design formula and the
+    data it references (e.g., the dates in ``x``). Cached design matrices are
+    kept in memory and, if ``cache_dir`` is given, saved to disk so other
+    commands and jobs using the same dataset can reuse them. Design matrices
+    containing only intercept, slope, and harmonic terms are evaluated using
+    :func:`design_for_dates` instead of evaluating the formula for all
+    observations.
+
+    Args:
+        formula (str): ``patsy`` design formula (e.g.,
+            ``1 + x + harm(x, 1)``)
+        data (dict or pandas.DataFrame): data referenced by ``formula``
+        cache_dir (str): directory to read and write cached design matrices
+            (default: None)
+
+    Returns:
+        patsy.DesignMatrix: design matrix
+
+    """
+    key = _design_key(formula, data)
+    if key in _DESIGN_CACHE:
+        return _DESIGN_CACHE[key]
+
+    X = None
+    filename = None
+    if cache_dir and os.path.isdir(cache_dir):
+        filename = _design_cache_filename(cache_dir, key)
+        if os.path.isfile(filename):
+            X = _read_design_cache(filename)
+            if X is not None:
+                logger.debug('Read design matrix from cache %s' % filename)
+
+    if X is None:
+        # Evaluate formula for one observation to find terms and columns
+        head = dict((k, np.asarray(v)[:1]) for k, v in data.items())
+        design_info = patsy.dmatrix(formula, data=head).design_info
+        columns = design_info.column_names
+        if ('x' in data and
+                all(_RE_HARM_TERM.match(t) or t in ('Intercept', 'x')
+                    for t in design_info.term_names)):
+            X = patsy.DesignMatrix(design_for_dates(columns, data['x']),
+                                   design_info=patsy.DesignInfo(columns))
+        else:
+            X = patsy.dmatrix(formula, data=data)
+        if filename and os.access(cache_dir, os.W_OK):
+            _write_design_cache(filename, X)
+
+    if len(_DESIGN_CACHE) >= _DESIGN_CACHE_MAX:
+        _DESIGN_CACHE.clear()
+    _DESIGN_CACHE[key] = X
+
+    return X
@@ -8,7 +8,7 @@ import numpy as np
 from ..accel import try_jit
 
 
-@try_jit(nopython=True)
+@try_jit(nopython=True, aot='f8(f8[:], f8[:])')
 def rmse(y, yhat):
     """ Calculate and return Root Mean Squared Error (RMSE)
 
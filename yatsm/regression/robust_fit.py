@@ -24,7 +24,7 @@ from yatsm.accel import try_jit
 
 
 # Weight scaling methods
-@try_jit(nopython=True)
+@try_jit(nopython=True, aot='f8[:](f8[:], f8)')
 def bisquare(resid, c=4.685):
     """
     Returns weighting for each residual using bisquare weight function
@@ -43,7 +43,7 @@ def bisquare(resid, c=4.685):
     return (numpy.abs(resid) < c) * (1 - (resid / c) ** 2) ** 2
 
 
-@try_jit(nopython=True)
+@try_jit(nopython=True, aot='f8(f8[:], f8)')
 def mad(resid, c=0.6745):
     """
     Returns Median-Absolute-Deviation (MAD) for residuals
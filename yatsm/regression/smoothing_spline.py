@@ -0,0 +1,314 @@
+""" Penalized cubic smoothing splines
+
+A NumPy implementation of the smoothing spline fit by R's ``smooth.spline``
+(without cross-validation), including its choice of knots and the definition
+of the smoothing parameter ``spar``. Given the same data and ``spar``, fitted
+values should match R's to within numerical precision.
+
+For :math:`n` unique (and scaled to [0, 1]) values of :math:`x`, the spline is
+represented by :math:`nk` cubic B-spline basis functions, :math:`B`, on knots
+placed at quantiles of :math:`x`. The coefficients minimize:
+
+.. math::
+
+    \\sum_i w_i (y_i - B(x_i) c)^2 + \\lambda \\int B''(t)^2 dt
+
+where :math:`\\lambda = r \\cdot 256^{3 \\cdot spar - 1}` and :math:`r` is the
+ratio of the traces of :math:`B^T W B` and the penalty matrix
+:math:`\\Omega = \\int B''(t)^T B''(t) dt`.
+
+Multiple series sharing the same values of :math:`x`, but with different
+:math:`y` or weights, can be fit together.
+
+Reference:
+    https://stat.ethz.ch/R-manual/R-devel/library/stats/html/smooth.spline.html
+
+"""
+from __future__ import division
+
+import numpy as np
+
+#: int: order of B-spline (cubic)
+ORDER = 4
+
+_CACHE_SIZE = 8
+# Approximation of 1/3 used by R's ``sgram`` to integrate the penalty
+_SGRAM_THIRD = 0.333
+_BASIS_CACHE = {}
+
+
+def nknots_smspl(n):
+    """ Return number of knots used for ``n`` unique ``x`` values
+
+    Follows ``.nknots.smspl`` from R, which uses all values if ``n < 50`` and
+    increases the number of knots logarithmically for larger ``n``.
+
+    Args:
+        n (int): number of unique ``x`` values
+
+    Returns:
+        int: number of knots
+
+    """
+    if n < 50:
+        return n
+    a1, a2, a3, a4 = np.log2([50, 100, 140, 200])
+    if n < 200:
+        nknots = 2 ** (a1 + (a2 - a1) * (n - 50) / 150)
+    elif n < 800:
+        nknots = 2 ** (a2 + (a3 - a2) * (n - 200) / 600)
+    elif n < 3200:
+        nknots = 2 ** (a3 + (a4 - a3) * (n - 800) / 2400)
+    else:
+        nknots = 200 + (n - 3200) ** 0.2
+    return int(np.trunc(nknots))
+
+
+def bspline_basis(x, knots, deriv=0, interval=None):
+    """ Return cubic B-spline basis functions, or their derivatives, at ``x``
+
+    Args:
+        x (np.ndarray): 1D array of values within the range of ``knots``
+        knots (np.ndarray): knot sequence, including 4 repeated knots at
+            each boundary
+        deriv (int): order of derivative (default: 0)
+        interval (np.ndarray): index of knot interval ``[t_j, t_j+1]`` to
+            evaluate each ``x`` in. By default, each ``x`` is evaluated in
+            the interval containing it, and the right boundary is evaluated
+            in the last interval
+
+    Returns:
+        np.ndarray: 2D array (``x.size`` x ``knots.size - 4``) of basis
+            functions
+
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n_basis = knots.size - ORDER
+    if interval is None:
+        interval = np.clip(np.searchsorted(knots, x, side='right') - 1,
+                           ORDER - 1, n_basis - 1)
+
+    def _div(num, den):
+        # 0 / 0 is 0 in B-spline recurrences
+        return np.where(den > 0, num / np.where(den > 0, den, 1), 0)
+
+    # Order 1 (piecewise constant) basis is 1 only in the knot interval
+    B = np.zeros((x.size, knots.size - 1))
+    B[np.arange(x.size), interval] = 1.0
+
+    # Cox-de Boor recurrence for basis values up to order ``ORDER - deriv``
+    for m in range(2, ORDER - deriv + 1):
+        t_i, t_im1 = knots[:-m], knots[m - 1:-1]
+        t_i1, t_im = knots[1:-m + 1], knots[m:]
+        B = (_div(x[:, None] - t_i, t_im1 - t_i) * B[:, :-1] +
+             _div(t_im - x[:, None], t_im - t_i1) * B[:, 1:])
+
+    # Each derivative raises the order of the basis by one
+    for m in range(ORDER - deriv + 1, ORDER + 1):
+        t_i, t_im1 = knots[:-m], knots[m - 1:-1]
+        t_i1, t_im = knots[1:-m + 1], knots[m:]
+        B = (m - 1) * (_div(B[:, :-1], t_im1 - t_i) -
+                       _div(B[:, 1:], t_im - t_i1))
+
+    return B
+
+
+def penalty_matrix(knots):
+    """ Return integrated squared second derivative of B-spline basis
+
+    Second derivatives of cubic B-splines are linear within each knot
+    interval, so the integral is calculated from their values at the ends of
+    each interval. As in R's ``sgram``, the integral of the squared slope
+    term uses 0.333 rather than 1/3 so that ``lambda`` and the fit match R.
+
+    Args:
+        knots (np.ndarray): knot sequence, including 4 repeated knots at
+            each boundary
+
+    Returns:
+        np.ndarray: 2D array (``nk`` x ``nk``) penalty matrix
+            :math:`\\Omega_{ij} = \\int B_i''(t) B_j''(t) dt`
+
+    """
+    n_basis = knots.size - ORDER
+    interval = np.arange(ORDER - 1, n_basis)
+    h = knots[interval + 1] - knots[interval]
+    interval, h = interval[h > 0], h[h > 0]
+
+    a = bspline_basis(knots[interval], knots, deriv=2, interval=interval)
+    b = bspline_basis(knots[interval + 1], knots, deriv=2, interval=interval)
+    # Change in second derivative across each interval
+    s = b - a
+
+    return (np.einsum('k,ki,kj->ij', h, a, a) +
+            np.einsum('k,ki,kj->ij', h / 2, a, s) +
+            np.einsum('k,ki,kj->ij', h / 2, s, a) +
+            np.einsum('k,ki,kj->ij', h * _SGRAM_THIRD, s, s))
+
+
+def _unique_x(x):
+    """ Return unique ``x``, within tolerance, and index of each ``x`` into it
+    """
+    q75, q25 = np.percentile(x, [75, 25])
+    tol = 1e-6 * (q75 - q25)
+    if not tol > 0:
+        raise ValueError('Cannot fit smoothing spline: "x" has an '
+                         'interquartile range of 0')
+    xx = np.round((x - x.mean()) / tol)
+    _, first, inverse = np.unique(xx, return_index=True, return_inverse=True)
+    return x[first], inverse
+
+
+def _cached(key, func, *args):
+    """ Return ``func(*args)``, cached by ``key``
+    """
+    if key not in _BASIS_CACHE:
+        if len(_BASIS_CACHE) >= _CACHE_SIZE:
+            _BASIS_CACHE.pop(next(iter(_BASIS_CACHE)))
+        _BASIS_CACHE[key] = func(*args)
+    return _BASIS_CACHE[key]
+
+
+def _setup_basis(ux):
+    """ Return knots, basis, and penalty for unique and sorted ``x``
+    """
+    xbar = (ux - ux[0]) / (ux[-1] - ux[0])
+    nx = xbar.size
+    nknots = nknots_smspl(nx)
+    # R indexes using ``seq.int(1, nx, length.out=nknots)``, truncating
+    index = np.trunc(np.linspace(0, nx - 1, nknots)).astype(int)
+    knots = np.concatenate((np.repeat(xbar[0], ORDER - 1),
+                            xbar[index],
+                            np.repeat(xbar[-1], ORDER - 1)))
+
+    return xbar, knots, bspline_basis(xbar, knots), penalty_matrix(knots)
+
+
+class SmoothingSpline(object):
+    """ Penalized cubic smoothing spline, equivalent to R's ``smooth.spline``
+
+    Args:
+        spar (float): smoothing parameter, typically (but not necessarily) in
+            (0, 1]. Larger values create smoother fits (default: 0.55)
+
+    Attributes:
+        knots_ (np.ndarray): knot sequence on the scale of ``x`` scaled to
+            [0, 1]
+        coef_ (np.ndarray): B-spline coefficients (``nk``), or coefficients
+            for each series (``n_series`` x ``nk``) if fit to multiple series
+        lambda_ (float or np.ndarray): penalty for each series, calculated
+            from ``spar``
+        x_min_ (float): minimum of ``x``
+        x_range_ (float): range of ``x``
+
+    Example:
+        Fit a smoothing spline for y ~ x and predict for days in year:
+
+        .. code-block:: python
+
+            spl = SmoothingSpline(spar=0.55).fit(x, y)
+            y_smooth = spl.predict(np.arange(1, 367))
+
+    """
+    def __init__(self, spar=0.55):
+        self.spar = spar
+
+    def fit(self, x, y, w=None):
+        """ Fit smoothing spline(s) to ``y`` given ``x``
+
+        Observations with duplicate ``x`` are combined into their weighted
+        mean, as in R.
+
+        Args:
+            x (np.ndarray): 1D array of independent variable (n)
+            y (np.ndarray): 1D array of dependent variable (n), or 2D array
+                of multiple series to fit (``n_series`` x n)
+            w (np.ndarray): optional weights for each observation, either
+                for all series (n) or for each series (``n_series`` x n)
+
+        Returns:
+            object: return ``self`` with model results stored for method
+                chaining
+
+        Raises:
+            ValueError: raise if fewer than four unique ``x`` are given or if
+                weights are negative or all zero
+
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self._1d = y.ndim == 1
+        y = np.atleast_2d(y)
+        w = np.ones_like(y) * (1 if w is None else
+                               np.asarray(w, dtype=np.float64))
+        if np.any(w < 0) or np.any(np.all(w == 0, axis=1)):
+            raise ValueError('Weights must be non-negative and not all zero')
+
+        ux, inverse = _unique_x(x)
+        if ux.size < 4:
+            raise ValueError('Cannot fit smoothing spline with fewer than '
+                             'four unique "x" values')
+        # Basis only depends on ``x``, so cache it for series with same ``x``
+        xbar, self.knots_, B, omega = _cached(ux.tobytes(), _setup_basis, ux)
+        self.x_min_, self.x_range_ = ux[0], ux[-1] - ux[0]
+
+        # Combine duplicate ``x`` into weights and weighted mean of ``y``
+        wbar = np.zeros((y.shape[0], ux.size))
+        wybar = np.zeros((y.shape[0], ux.size))
+        for i in range(y.shape[0]):
+            wbar[i] = np.bincount(inverse, weights=w[i], minlength=ux.size)
+            wybar[i] = np.bincount(inverse, weights=w[i] * y[i],
+                                   minlength=ux.size)
+
+        # Solve (B' W B + lambda * Omega) c = B' W y for each series
+        BWB = np.matmul(B.T * wbar[:, None, :], B)
+        BWy = wybar.dot(B)
+
+        # Ratio of traces of B'WB and Omega, excluding 3 knots at each end
+        nk = B.shape[1]
+        diag = np.arange(2, nk - 3)
+        ratio = (BWB[:, diag, diag].sum(axis=1) / omega[diag, diag].sum())
+        lambda_ = ratio * 256. ** (3 * self.spar - 1)
+
+        coef = np.linalg.solve(BWB + lambda_[:, None, None] * omega,
+                               BWy[..., None])[..., 0]
+
+        if self._1d:
+            self.coef_, self.lambda_ = coef[0], lambda_[0]
+        else:
+            self.coef_, self.lambda_ = coef, lambda_
+
+        return self
+
+    def predict(self, x):
+        """ Return smoothing spline prediction for ``x``
+
+        Predictions outside of the range of ``x`` used to fit the spline are
+        linearly extrapolated from the boundaries.
+
+        Args:
+            x (np.ndarray): 1D array of independent variable
+
+        Returns:
+            np.ndarray: smoothed prediction (``x.size``), or predictions for
+                each series (``n_series`` x ``x.size``)
+
+        """
+        xs = (np.asarray(x, dtype=np.float64) - self.x_min_) / self.x_range_
+        coef = np.atleast_2d(self.coef_)
+
+        interp = (xs >= 0) & (xs <= 1)
+        y = np.empty((coef.shape[0], xs.size))
+        B = _cached((self.knots_.tobytes(), xs[interp].tobytes()),
+                    bspline_basis, xs[interp], self.knots_)
+        y[:, interp] = coef.dot(B.T)
+
+        if not np.all(interp):
+            ends = np.array([0., 1.])
+            end_y = coef.dot(bspline_basis(ends, self.knots_).T)
+            end_slope = coef.dot(bspline_basis(ends, self.knots_, 1).T)
+            left, right = xs < 0, xs > 1
+            y[:, left] = (end_y[:, :1] + end_slope[:, :1] * xs[left])
+            y[:, right] = (end_y[:, 1:] + end_slope[:, 1:] * (xs[right] - 1))
+
+        return y[0] if self._1d else y
@@ -206,6 +206,8 @@ def iter_records(records, warn_on_empty=False, yield_filename=False):
       np.ndarray or tuple: Result saved in record and the filename, if desired
 
     """
+    from .io.results import load_record
+
     n_records = len(records)
 
     for _i, r in enumerate(records):
@@ -214,7 +216,7 @@ def iter_records(records, warn_on_empty=False, yield_filename=False):
             logger.debug('{0:.1f}%'.format(_i / n_records * 100))
         # Open output
         try:
-            rec = np.load(r)['record']
+            rec = load_record(r)
         except (ValueError, AssertionError, IOError) as e:
             logger.warning('Error reading a result file (may be corrupted) '
                            '({}): {}'.format(r, str(e)))
@@ -232,6 +234,73 @@ def iter_records(records, warn_on_empty=False, yield_filename=False):
             yield rec
 
 
+# DATE UTILITIES
+_DATE_TABLES = {}
+_DATE_TABLES_MAX = 8
+
+
+def ordinal2datefmt_table(first, last, date_format='%Y%j'):
+    """ Return lookup table of formatted dates for a range of ordinal dates
+
+    Element ``i`` of the table contains the ordinal date ``first + i``
+    formatted using ``date_format`` and converted to an integer. Tables are
+    cached so repeated requests for the same date range are free.
+
+    Args:
+        first (int): first ordinal date in table
+        last (int): last ordinal date in table
+        date_format (str): date format that creates integer representations
+            of dates (e.g., ``%Y%j`` or ``%Y%m%d``)
+
+    Returns:
+        np.ndarray: lookup table of integer dates
+
+    """
+    key = (int(first), int(last), date_format)
+    if key not in _DATE_TABLES:
+        if len(_DATE_TABLES) >= _DATE_TABLES_MAX:
+            _DATE_TABLES.clear()
+        _DATE_TABLES[key] = np.array([
+            int(dt.fromordinal(d).strftime(date_format))
+            for d in range(key[0], key[1] + 1)
+        ], dtype=np.int32)
+    return _DATE_TABLES[key]
+
+
+def ordinal2datefmt(ordinal, date_format='%Y%j', first=None, last=None):
+    """ Convert ordinal dates to integer formatted dates using a lookup table
+
+    Args:
+        ordinal (np.ndarray): ordinal dates
+        date_format (str): date format that creates integer representations
+            of dates (e.g., ``%Y%j`` or ``%Y%m%d``)
+        first (int): first date of lookup table. Specifying ``first`` and
+            ``last`` as the date range of a dataset allows the lookup table to
+            be reused between calls (default: minimum of ``ordinal``)
+        last (int): last date of lookup table (default: maximum of
+            ``ordinal``)
+
+    Returns:
+        np.ndarray: integer formatted dates
+
+    Raises:
+        ValueError: raise if ``ordinal`` contains dates outside of ``first``
+            and ``last``
+
+    """
+    ordinal = np.asarray(ordinal, dtype=np.int64)
+    if ordinal.size == 0:
+        return np.zeros(ordinal.shape, dtype=np.int32)
+    first = ordinal.min() if first is None else first
+    last = ordinal.max() if last is None else last
+    if ordinal.min() < first or ordinal.max() > last:
+        raise ValueError('Ordinal dates must be within %s and %s' %
+                         (first, last))
+
+    table = ordinal2datefmt_table(first, last, date_format)
+    return table[ordinal - first]
+
+
 # MISC UTILITIES
 def date2index(dates, d):
     """ Returns index of sorted array `dates` containing the date `d`